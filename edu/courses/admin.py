@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, Module, Subject
+from .models import Course, Module, PdfIndexJob, Subject
 
 
 @admin.register(Subject)
@@ -41,3 +41,11 @@ class CourseAdmin(admin.ModelAdmin):
 
     # Allow editing related modules within Course admin
     inlines = [ModuleInline]
+
+
+@admin.register(PdfIndexJob)
+class PdfIndexJobAdmin(admin.ModelAdmin):
+    list_display = ("file", "status", "attempts", "available_at", "updated")
+    list_filter = ("status",)
+    search_fields = ("file__title",)
+    raw_id_fields = ("file",)
@@ -0,0 +1,49 @@
+import functools
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def _etag(request, stamp):
+    # Same stamp and URL always render the same JSON bytes: a strong ETag.
+    payload = f'{stamp[0]}|{request.build_absolute_uri()}'
+    return '"%s"' % hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def conditional_on_stamp(get_stamp):
+    """
+    Decorate a viewset action with ETag/Last-Modified validators.
+
+    `get_stamp(view, request, **kwargs)` returns `(version, modified)` from
+    the cache, or None to skip validation. A matching If-None-Match (or
+    If-Modified-Since) gets a 304 before the queryset or serializers run.
+    Only JSON responses are validated; the browsable API shows the user.
+    """
+    def decorator(action):
+        @functools.wraps(action)
+        def wrapper(self, request, *args, **kwargs):
+            stamp = None
+            if getattr(request.accepted_renderer, 'format', None) == 'json':
+                try:
+                    stamp = get_stamp(self, request, **kwargs)
+                except Exception:
+                    # No validators when the cache is unreachable; serve normally.
+                    stamp = None
+            if stamp is None:
+                return action(self, request, *args, **kwargs)
+
+            etag = _etag(request, stamp)
+            last_modified = stamp[1]
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = action(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -2,4 +2,13 @@ from rest_framework.permissions import BasePermission
 
 class IsEnrolled(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.students.filter(id=request.user.id).exists()
\ No newline at end of file
+        return obj.students.filter(id=request.user.id).exists()
+
+class IsCourseOwner(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return obj.owner_id == request.user.id
+
+
+class CanAddCourse(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.has_perm("courses.add_course")
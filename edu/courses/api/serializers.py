@@ -1,22 +1,53 @@
 from rest_framework import serializers
 from courses.models import Subject, Course, Module, Content
-from django.db.models import Count
+from courses.ordering import position_of
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+
+class PositionListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        # Stored ranks are sparse sort keys; number the rows as listed instead.
+        for position, item in enumerate(items, start=1):
+            item.position = position
+        return super().to_representation(items)
+
+
+class PositionField(serializers.ReadOnlyField):
+    """
+    1-based position of a module or content within its group.
+    """
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        position = getattr(value, 'position', None)
+        return position if position is not None else position_of(value)
+
 
 class ItemRelatedField(serializers.RelatedField):
     def to_representation(self, value):
-        return value.render()
+        # Views may pre-read every fragment in one round trip (get_rendered_html_many).
+        rendered = self.context.get('rendered_items', {}).get((value._meta.label_lower, value.pk))
+        return rendered if rendered is not None else value.render()
 class ContentSerializer(serializers.ModelSerializer):
+    order = PositionField()
     item = ItemRelatedField(read_only=True)
     class Meta:
         model = Content
         fields = ['order', 'item']
+        list_serializer_class = PositionListSerializer
         
 class ModuleWithContentsSerializer(serializers.ModelSerializer):
+    order = PositionField()
     contents = ContentSerializer(many=True)
     
     class Meta:
         model = Module
         fields = ['order', 'title', 'description', 'contents']
+        list_serializer_class = PositionListSerializer
         
 class CourseWithContentsSerializer(serializers.ModelSerializer):
     modules = ModuleWithContentsSerializer(many=True)
@@ -28,12 +59,20 @@ class CourseWithContentsSerializer(serializers.ModelSerializer):
         ]
 
 class ModuleSerializer(serializers.ModelSerializer):
+    order = PositionField()
     class Meta:
         model = Module
         fields = ['order', 'title', 'description']
+        list_serializer_class = PositionListSerializer
         
 class CourseSerializer(serializers.ModelSerializer):
-    modules = serializers.StringRelatedField(many=True, read_only=True)
+    modules = serializers.SerializerMethodField()
+
+    def get_modules(self, obj):
+        return [
+            f'{position}. {module.title}'
+            for position, module in enumerate(obj.modules.all(), start=1)
+        ]
     class Meta:
         model = Course
         fields = [
@@ -47,19 +86,57 @@ class CourseSerializer(serializers.ModelSerializer):
             'modules'
         ]
 
+POPULAR_COURSES_PER_SUBJECT = 3
+
+
+def popular_courses_by_subject(subject_ids, limit=POPULAR_COURSES_PER_SUBJECT):
+    """
+    Return {subject_id: [(title, students), ...]} with the `limit` most
+    enrolled courses of every subject, from one windowed query.
+    """
+    rows = (
+        Course.objects.filter(subject_id__in=subject_ids)
+        .annotate(
+            total_students=Count('students'),
+            popularity_rank=Window(
+                RowNumber(),
+                partition_by=F('subject_id'),
+                order_by=[F('total_students').desc(), F('id').asc()],
+            ),
+        )
+        .filter(popularity_rank__lte=limit)
+        .order_by('subject_id', 'popularity_rank')
+        .values_list('subject_id', 'title', 'total_students')
+    )
+    popular = {subject_id: [] for subject_id in subject_ids}
+    for subject_id, title, total_students in rows:
+        popular[subject_id].append((title, total_students))
+    return popular
+
+
+class SubjectListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        subjects = list(data.all() if hasattr(data, 'all') else data)
+        # One query for the whole page instead of one per subject.
+        popular = popular_courses_by_subject([subject.id for subject in subjects])
+        for subject in subjects:
+            subject.popular_course_rows = popular[subject.id]
+        return super().to_representation(subjects)
+
+
 class SubjectSerializer(serializers.ModelSerializer):
     total_courses = serializers.IntegerField()
     popular_courses = serializers.SerializerMethodField()
     
     def get_popular_courses(self, obj):
-        courses = obj.courses.annotate(
-            total_students = Count('students')
-        ).order_by('total_students')[:3]
+        rows = getattr(obj, 'popular_course_rows', None)
+        if rows is None:
+            rows = popular_courses_by_subject([obj.id])[obj.id]
         return [
-            f'{c.title} ({c.total_students} Students)'
-            for c in courses
+            f'{title} ({total_students} Students)'
+            for title, total_students in rows
         ]
     class Meta:
         model = Subject
         fields = ['id', 'title', 'slug', 'total_courses', 'popular_courses']
-        
\ No newline at end of file
+        list_serializer_class = SubjectListSerializer
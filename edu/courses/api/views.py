@@ -1,23 +1,53 @@
-from rest_framework import viewsets
+import tempfile
+
+from rest_framework import status, viewsets
 from rest_framework.response import Response
 from rest_framework.authentication import BasicAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.authtoken.models import Token
 
 from courses.api.serializers import SubjectSerializer, CourseSerializer, CourseWithContentsSerializer
 from courses.api.pagination import StandardPagination
-from courses.api.permissions import IsEnrolled
-from courses.search import search_courses
+from courses.api.conditional import conditional_on_stamp
+from courses.api.permissions import CanAddCourse, IsCourseOwner, IsEnrolled
+from courses.catalog import get_catalog_stamp, get_course_stamp, get_enrollment_stamp
+from courses.course_transfer import CourseArchiveError, export_course, import_course
+from courses.content_items import attach_content_items
+from courses.render_cache import get_rendered_html_many
+from courses.search_cache import INDEX_COURSE, get_search_generation, search_courses_cached
 
 from courses.models import Subject, Course
 
 from django.db.models import Count
+from django.http import FileResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
 from django.urls import reverse
 
 
+def _course_list_stamp(view, request, **kwargs):
+    version, modified = get_catalog_stamp()
+    if (request.GET.get("q") or "").strip():
+        # Ranked results also move when the search index is rebuilt.
+        version = f"{version}.{get_search_generation(INDEX_COURSE)}"
+    return version, modified
+
+
+def _course_stamp(view, request, pk=None, **kwargs):
+    if not str(pk).isdigit():
+        return None
+    return get_course_stamp(int(pk))
+
+
+def _subject_stamp(view, request, **kwargs):
+    # Subjects carry course counts and the most-enrolled courses.
+    catalog_version, catalog_modified = get_catalog_stamp()
+    enrollment_version, enrollment_modified = get_enrollment_stamp()
+    return f"{catalog_version}.{enrollment_version}", max(catalog_modified, enrollment_modified)
+
+
 class CourseViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
@@ -25,13 +55,17 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
     authentication_classes = [TokenAuthentication, BasicAuthentication]
 
     def get_queryset(self):
-        return Course.objects.select_related("subject", "owner").prefetch_related("modules")
+        queryset = Course.objects.select_related("subject", "owner")
+        if self.action == "contents":
+            return queryset.prefetch_related("modules__contents")
+        return queryset.prefetch_related("modules")
 
+    @conditional_on_stamp(_course_list_stamp)
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         query = (request.GET.get("q") or "").strip()
         if query:
-            queryset = search_courses(queryset, query)
+            queryset = search_courses_cached(queryset, query)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -41,6 +75,10 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @conditional_on_stamp(_course_stamp)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(
         detail=True,
         methods=['get'],
@@ -48,7 +86,17 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
         permission_classes=[IsAuthenticated, IsEnrolled]
     )
     def contents(self, request, *args, **kwargs):
-        return self.retrieve(request, *args, **kwargs)
+        course = self.get_object()
+        contents = attach_content_items(
+            content
+            for module in course.modules.all()
+            for content in module.contents.all()
+        )
+        items = [content.item for content in contents]
+        context = self.get_serializer_context()
+        context['rendered_items'] = get_rendered_html_many(items)
+        serializer = self.get_serializer(course, context=context)
+        return Response(serializer.data)
     
     @action(
         detail=True,
@@ -61,6 +109,52 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
         course.students.add(request.user)
         return Response({'enrolled': True})
 
+    @action(
+        detail=True,
+        methods=['get'],
+        permission_classes=[IsAuthenticated, IsCourseOwner]
+    )
+    def export(self, request, *args, **kwargs):
+        course = self.get_object()
+        # Spooled to disk so large media never sits in memory.
+        archive = tempfile.TemporaryFile()
+        export_course(course, archive)
+        archive.seek(0)
+        return FileResponse(
+            archive,
+            as_attachment=True,
+            filename=f"{course.slug}.zip",
+            content_type='application/zip',
+        )
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        url_name='import',
+        parser_classes=[MultiPartParser],
+        permission_classes=[IsAuthenticated, CanAddCourse]
+    )
+    def import_archive(self, request, *args, **kwargs):
+        archive = request.FILES.get('archive')
+        if archive is None:
+            return Response({'detail': 'Upload the course zip as "archive".'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = import_course(archive, request.user, slug=request.data.get('slug') or None)
+        except CourseArchiveError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        course = result['course']
+        return Response(
+            {
+                'id': course.id,
+                'slug': course.slug,
+                'modules': result['modules'],
+                'contents': result['contents'],
+                'pdf_jobs': result['pdf_jobs'],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
 # class SubjectListView(generics.ListAPIView):
 #     queryset = Subject.objects.annotate(total_courses=Count('courses'))
 #     serializer_class = SubjectSerializer
@@ -76,6 +170,14 @@ class SubjectViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SubjectSerializer
     pagination_class = StandardPagination
 
+    @conditional_on_stamp(_subject_stamp)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_on_stamp(_subject_stamp)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class TokenDashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'courses/api/token_dashboard.html'
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Course, Module, Subject
+from .search import search_courses
+from .search_cache import get_ranked_course_ids, is_truncated
+
+CATALOG_SNAPSHOT_TTL = int(getattr(settings, "CATALOG_SNAPSHOT_TTL", 60 * 60 * 24))
+CATALOG_PAGE_SIZE = int(getattr(settings, "CATALOG_PAGE_SIZE", 24))
+# Per-course counters expire so unknown ids never pin keys; expiry only reseeds them.
+CATALOG_COURSE_VERSION_TTL = int(getattr(settings, "CATALOG_COURSE_VERSION_TTL", 60 * 60 * 24 * 30))
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_COURSE_VERSION_KEY = "catalog:course:{course_id}:version"
+CATALOG_ENROLLMENT_VERSION_KEY = "catalog:enrollment:version"
+CATALOG_SNAPSHOT_KEY = "catalog:snapshot:{version}"
+CATALOG_PAGE_KEY = "catalog:page:{version}:{digest}"
+CATALOG_JOINED_COURSES_KEY = "catalog:joined:{user_id}:{version}"
+
+
+@dataclass(frozen=True)
+class CatalogSubject:
+    id: int
+    slug: str
+    title: str
+    total_courses: int
+
+    def __str__(self) -> str:
+        return self.title
+
+
+@dataclass(frozen=True)
+class CatalogCourse:
+    id: int
+    slug: str
+    title: str
+    subject_id: int
+    subject_slug: str
+    subject_title: str
+    owner_name: str
+    total_modules: int
+    created: datetime
+
+
+@dataclass(frozen=True)
+class CatalogPage:
+    courses: list[CatalogCourse]
+    next_cursor: str | None
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CatalogSnapshot:
+    """
+    Read-only view over one cached catalog version's subjects, ordered by title.
+    """
+
+    def __init__(self, subjects: list[tuple]):
+        self.subjects = [CatalogSubject(*row) for row in subjects]
+        self._subjects_by_slug = {subject.slug: subject for subject in self.subjects}
+
+    def subject_by_slug(self, slug: str) -> CatalogSubject | None:
+        return self._subjects_by_slug.get(slug)
+
+
+def _modified_key(key: str) -> str:
+    return f"{key}:modified"
+
+
+def _get_version_stamp(key: str, timeout: int | None = None) -> tuple[int, int]:
+    """
+    Return `(version, modified)` for a version counter, where `modified` is
+    the Unix time of its last bump. Both are read in one round trip.
+    """
+    values = cache.get_many([key, _modified_key(key)])
+    if values.get(key) is None:
+        # Seed from the clock so an evicted counter never reuses an old snapshot.
+        now = time.time()
+        cache.add(key, int(now * 1000), timeout=timeout)
+        cache.add(_modified_key(key), int(now), timeout=timeout)
+        values = cache.get_many([key, _modified_key(key)])
+    return int(values.get(key) or 0), int(values.get(_modified_key(key)) or time.time())
+
+
+def _bump_key_now(key: str, timeout: int | None = None) -> None:
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), timeout=timeout)
+        cache.set(_modified_key(key), int(time.time()), timeout=timeout)
+    except Exception:
+        # Snapshots expire on their own TTL if the cache is unreachable.
+        return
+
+
+def get_catalog_version() -> int:
+    return _get_version_stamp(CATALOG_VERSION_KEY)[0]
+
+
+def get_catalog_stamp() -> tuple[int, int]:
+    return _get_version_stamp(CATALOG_VERSION_KEY)
+
+
+def _bump_now() -> None:
+    _bump_key_now(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version() -> None:
+    """
+    Retire the current catalog snapshot once the current transaction commits.
+    """
+    transaction.on_commit(_bump_now)
+
+
+def get_course_stamp(course_id: int) -> tuple[int, int]:
+    """
+    Version stamp of one course's public representation (its row and modules).
+    """
+    return _get_version_stamp(
+        CATALOG_COURSE_VERSION_KEY.format(course_id=course_id),
+        timeout=CATALOG_COURSE_VERSION_TTL,
+    )
+
+
+def bump_course_version(course_id: int | None) -> None:
+    if course_id is None:
+        return
+    key = CATALOG_COURSE_VERSION_KEY.format(course_id=course_id)
+    transaction.on_commit(lambda: _bump_key_now(key, timeout=CATALOG_COURSE_VERSION_TTL))
+
+
+def get_enrollment_stamp() -> tuple[int, int]:
+    return _get_version_stamp(CATALOG_ENROLLMENT_VERSION_KEY)
+
+
+def bump_enrollment_version() -> None:
+    """
+    Mark enrollment counts (subject popular courses) changed on commit.
+    """
+    transaction.on_commit(lambda: _bump_key_now(CATALOG_ENROLLMENT_VERSION_KEY))
+
+
+def get_joined_course_ids(user) -> list[int]:
+    """
+    Ids of the courses `user` has joined, cached until any enrollment changes.
+    """
+    version, _ = get_enrollment_stamp()
+    key = CATALOG_JOINED_COURSES_KEY.format(user_id=user.id, version=version)
+    course_ids = cache.get(key)
+    if course_ids is None:
+        course_ids = list(user.courses_joined.values_list("id", flat=True))
+        cache.set(key, course_ids, timeout=CATALOG_SNAPSHOT_TTL)
+    return course_ids
+
+
+def _build_subject_rows() -> list[tuple]:
+    return [
+        (row["id"], row["slug"], row["title"], row["total_courses"])
+        for row in Subject.objects.annotate(total_courses=Count("courses"))
+        .order_by("title")
+        .values("id", "slug", "title", "total_courses")
+    ]
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """
+    Return the current subject list, served from the cache when possible.
+
+    Rows are stored as plain tuples under the catalog version; any course,
+    subject or module change bumps the version, so a snapshot is never stale.
+    """
+    try:
+        key = CATALOG_SNAPSHOT_KEY.format(version=get_catalog_version())
+        cached = cache.get(key)
+    except Exception:
+        return CatalogSnapshot(_build_subject_rows())
+    if cached is not None:
+        return CatalogSnapshot(cached)
+
+    subjects = _build_subject_rows()
+    try:
+        cache.set(key, subjects, CATALOG_SNAPSHOT_TTL)
+    except Exception:
+        pass
+    return CatalogSnapshot(subjects)
+
+
+def encode_cursor(*parts) -> str:
+    payload = "|".join(str(part) for part in parts)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, kind: str) -> list[str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|")
+    except (ValueError, UnicodeError):
+        raise InvalidCursor(cursor) from None
+    if len(parts) != 3 or parts[0] != kind:
+        raise InvalidCursor(cursor)
+    return parts[1:]
+
+
+def _course_rows(queryset) -> list[tuple]:
+    # Correlated count, evaluated only for the rows of the page.
+    module_count = (
+        Module.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    rows = []
+    for row in queryset.annotate(total_modules=Coalesce(Subquery(module_count), 0)).values(
+        "id",
+        "slug",
+        "title",
+        "subject_id",
+        "subject__slug",
+        "subject__title",
+        "owner__first_name",
+        "owner__last_name",
+        "total_modules",
+        "created",
+    ):
+        # Same string User.get_full_name() renders.
+        owner_name = f"{row['owner__first_name']} {row['owner__last_name']}".strip()
+        rows.append(
+            (
+                row["id"],
+                row["slug"],
+                row["title"],
+                row["subject_id"],
+                row["subject__slug"],
+                row["subject__title"],
+                owner_name,
+                row["total_modules"],
+                row["created"],
+            )
+        )
+    return rows
+
+
+def _cached_page(parts: tuple, build) -> CatalogPage:
+    def page(rows, next_cursor):
+        return CatalogPage(courses=[CatalogCourse(*row) for row in rows], next_cursor=next_cursor)
+
+    try:
+        digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+        key = CATALOG_PAGE_KEY.format(version=get_catalog_version(), digest=digest)
+        cached = cache.get(key)
+    except Exception:
+        return page(*build())
+    if cached is not None:
+        return page(*cached)
+
+    rows, next_cursor = build()
+    try:
+        cache.set(key, (rows, next_cursor), CATALOG_SNAPSHOT_TTL)
+    except Exception:
+        pass
+    return page(rows, next_cursor)
+
+
+def get_catalog_page(
+    subject_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = CATALOG_PAGE_SIZE,
+) -> CatalogPage:
+    """
+    Return one page of the catalog, newest first, optionally for one subject.
+
+    Pages are keyed on the last row's `(created, id)`, so a cursor keeps
+    pointing at the same place however many courses are added meanwhile.
+    Each page is cached under the catalog version.
+    """
+    after = None
+    if cursor:
+        created, course_id = _decode_cursor(cursor, "t")
+        try:
+            after = (datetime.fromisoformat(created), int(course_id))
+        except ValueError:
+            raise InvalidCursor(cursor) from None
+
+    def build():
+        queryset = Course.objects.all()
+        if subject_id:
+            queryset = queryset.filter(subject_id=subject_id)
+        if after is not None:
+            queryset = queryset.filter(
+                Q(created__lt=after[0]) | Q(created=after[0], id__lt=after[1])
+            )
+        rows = _course_rows(queryset.order_by("-created", "-id")[: limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor("t", rows[-1][8].isoformat(), rows[-1][0])
+        return rows, next_cursor
+
+    return _cached_page(("catalog", subject_id, cursor, limit), build)
+
+
+def _live_ranked_ids(query: str, subject_id: int | None, start: int, count: int) -> list[int]:
+    base = Course.objects.all()
+    if subject_id:
+        base = base.filter(subject_id=subject_id)
+    return list(search_courses(base, query).values_list("id", flat=True)[start : start + count])
+
+
+def get_search_page(
+    query: str,
+    subject_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = CATALOG_PAGE_SIZE,
+) -> CatalogPage:
+    """
+    Return one page of ranked search results from the cached ranking.
+
+    Search cursors carry the last course id and its position. A page resumes
+    right after that course, even if a newer ranking has moved it. Pages
+    past the end of a capped cached ranking are read from the live search.
+    """
+    ranked = get_ranked_course_ids(query, subject_id=subject_id)
+    ranked_ids = [course_id for course_id, _ in ranked]
+    start = 0
+    if cursor:
+        position, course_id = _decode_cursor(cursor, "r")
+        try:
+            position, course_id = int(position), int(course_id)
+        except ValueError:
+            raise InvalidCursor(cursor) from None
+        start = ranked_ids.index(course_id) + 1 if course_id in ranked_ids else position + 1
+
+    if is_truncated(ranked) and start + limit >= len(ranked_ids):
+        page_ids = _live_ranked_ids(query, subject_id, start, limit + 1)
+        has_more = len(page_ids) > limit
+        page_ids = page_ids[:limit]
+    else:
+        page_ids = ranked_ids[start : start + limit]
+        has_more = start + limit < len(ranked_ids)
+    next_cursor = None
+    if has_more and page_ids:
+        next_cursor = encode_cursor("r", start + len(page_ids) - 1, page_ids[-1])
+
+    def build():
+        by_id = {row[0]: row for row in _course_rows(Course.objects.filter(id__in=page_ids))}
+        return [by_id[course_id] for course_id in page_ids if course_id in by_id], next_cursor
+
+    if not page_ids:
+        return CatalogPage(courses=[], next_cursor=None)
+    return _cached_page(("search", tuple(page_ids)), build)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable
+
+from django.contrib.contenttypes.models import ContentType
+
+from .models import Content
+
+
+def attach_content_items(contents: Iterable[Content]) -> list[Content]:
+    """
+    Resolve `Content.item` for many rows with one query per item model.
+
+    Rows are grouped by content type, each item table is read once with
+    `id__in`, and the results are stored in the generic relation's cache, so
+    later `content.item` lookups run no queries. Rows whose item was deleted
+    resolve to None, as they would through the relation itself.
+    """
+    contents = list(contents)
+    relation = Content._meta.get_field("item")
+    pending = [content for content in contents if not relation.is_cached(content)]
+
+    ids_by_type: dict[int, set[int]] = defaultdict(set)
+    for content in pending:
+        ids_by_type[content.content_type_id].add(content.object_id)
+
+    items = {}
+    for content_type_id, object_ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        for item in model._default_manager.filter(id__in=object_ids):
+            items[(content_type_id, item.pk)] = item
+
+    for content in pending:
+        relation.set_cached_value(content, items.get((content.content_type_id, content.object_id)))
+    return contents
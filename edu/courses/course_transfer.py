@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import json
+import os
+import zipfile
+from typing import BinaryIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.files import File as DjangoFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import Content, Course, File, Image, Module, Subject, Text, Video
+from .ordering import ORDER_GAP
+from .pdf_indexing import _is_pdf_path, compute_file_sha256, update_pdf_index_from_cache
+from .pdf_jobs import enqueue_pdf_index_jobs
+from .search import rebuild_content_search_index, rebuild_course_search_index
+
+COURSE_ARCHIVE_VERSION = 1
+COURSE_ARCHIVE_MANIFEST = "manifest.json"
+# Checked against the zip directory before anything is extracted. zipfile never
+# inflates a member past its declared size, so these bound the disk an
+# uploaded archive can fill.
+COURSE_ARCHIVE_MAX_MEMBERS = int(getattr(settings, "COURSE_ARCHIVE_MAX_MEMBERS", 5000))
+COURSE_ARCHIVE_MAX_BYTES = int(getattr(settings, "COURSE_ARCHIVE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+COURSE_ARCHIVE_MAX_MANIFEST_BYTES = 16 * 1024 * 1024
+
+# Manifest "type" -> item model, and the item fields carried besides title/media.
+ITEM_MODELS = {"text": Text, "video": Video, "image": Image, "file": File}
+ITEM_FIELDS = {"text": ["content"], "video": ["url"], "image": [], "file": []}
+
+
+class CourseArchiveError(ValueError):
+    pass
+
+
+def export_course(course: Course, archive: BinaryIO) -> dict[str, int]:
+    """
+    Write `course` as a zip: a JSON manifest plus every uploaded media file.
+
+    Media is streamed from storage into the archive one file at a time.
+    """
+    modules = (
+        Module.objects.filter(course=course)
+        .order_by("order", "id")
+        .prefetch_related("contents__content_type", "contents__item")
+    )
+    manifest = {
+        "version": COURSE_ARCHIVE_VERSION,
+        "course": {
+            "title": course.title,
+            "slug": course.slug,
+            "overview": course.overview,
+            "subject": {"title": course.subject.title, "slug": course.subject.slug},
+        },
+        "modules": [],
+    }
+    media_count = 0
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for module in modules:
+            contents = []
+            for content in module.contents.all():
+                item = content.item
+                if item is None:
+                    continue
+                kind = content.content_type.model
+                entry = {"type": kind, "title": item.title}
+                for name in ITEM_FIELDS[kind]:
+                    entry[name] = getattr(item, name)
+                upload = getattr(item, "file", None)
+                if upload:
+                    media_count += 1
+                    member = f"media/{media_count}/{os.path.basename(upload.name)}"
+                    with upload.open("rb"), bundle.open(member, "w") as target:
+                        for chunk in upload.chunks():
+                            target.write(chunk)
+                    entry["media"] = member
+                contents.append(entry)
+            manifest["modules"].append(
+                {"title": module.title, "description": module.description, "contents": contents}
+            )
+        bundle.writestr(COURSE_ARCHIVE_MANIFEST, json.dumps(manifest, indent=2))
+
+    return {
+        "modules": len(manifest["modules"]),
+        "contents": sum(len(module["contents"]) for module in manifest["modules"]),
+        "media": media_count,
+    }
+
+
+def _check_archive_size(bundle: zipfile.ZipFile) -> None:
+    members = bundle.infolist()
+    if len(members) > COURSE_ARCHIVE_MAX_MEMBERS:
+        raise CourseArchiveError(
+            f"Archive has {len(members)} members; the limit is {COURSE_ARCHIVE_MAX_MEMBERS}."
+        )
+    total = sum(member.file_size for member in members)
+    if total > COURSE_ARCHIVE_MAX_BYTES:
+        raise CourseArchiveError(
+            f"Archive expands to {total} bytes; the limit is {COURSE_ARCHIVE_MAX_BYTES}."
+        )
+
+
+def _read_manifest(bundle: zipfile.ZipFile) -> dict:
+    _check_archive_size(bundle)
+    try:
+        if bundle.getinfo(COURSE_ARCHIVE_MANIFEST).file_size > COURSE_ARCHIVE_MAX_MANIFEST_BYTES:
+            raise CourseArchiveError("Manifest is too large.")
+        manifest = json.loads(bundle.read(COURSE_ARCHIVE_MANIFEST))
+    except KeyError:
+        raise CourseArchiveError(f"Archive has no {COURSE_ARCHIVE_MANIFEST}.") from None
+    except ValueError as exc:
+        raise CourseArchiveError(f"Invalid manifest: {exc}") from None
+    if not isinstance(manifest, dict) or manifest.get("version") != COURSE_ARCHIVE_VERSION:
+        raise CourseArchiveError("Unsupported course archive version.")
+    subject = (manifest.get("course") or {}).get("subject") or {}
+    if not isinstance(subject, dict) or not subject.get("slug"):
+        raise CourseArchiveError("Manifest has no course subject slug.")
+    for module in manifest.get("modules", []):
+        for entry in module.get("contents", []):
+            if entry.get("type") not in ITEM_MODELS:
+                raise CourseArchiveError(f"Unknown content type {entry.get('type')!r}.")
+    return manifest
+
+
+def _build_item(bundle: zipfile.ZipFile, entry: dict, owner: User):
+    kind = entry["type"]
+    item = ITEM_MODELS[kind](
+        owner=owner,
+        title=entry.get("title", ""),
+        **{name: entry.get(name, "") for name in ITEM_FIELDS[kind]},
+    )
+    member = entry.get("media")
+    if member:
+        try:
+            media = DjangoFile(bundle.open(member), name=os.path.basename(member))
+        except KeyError:
+            raise CourseArchiveError(f"Archive is missing {member}.") from None
+        # bulk_create saves the upload to storage but sends no pre_save signal.
+        item.file = media
+        if kind == "file":
+            item.content_sha256 = compute_file_sha256(media)
+            if not _is_pdf_path(member):
+                item.pdf_index_status = File.PDF_STATUS_SKIPPED
+                item.pdf_indexed_at = timezone.now()
+    return item
+
+
+def _delete_stored_media(items) -> None:
+    for item in items:
+        upload = getattr(item, "file", None)
+        if upload and getattr(upload, "_committed", False):
+            upload.storage.delete(upload.name)
+
+
+def import_course(
+    archive: BinaryIO,
+    owner: User,
+    slug: str | None = None,
+) -> dict:
+    """
+    Create a course from an `export_course` archive.
+
+    Modules, contents and items are bulk-inserted, so none of the per-row
+    search or PDF receivers run. Instead, the new course is indexed once and
+    every PDF without cached extraction is queued in a single batch.
+    """
+    try:
+        bundle = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile as exc:
+        raise CourseArchiveError(f"Not a course archive: {exc}") from None
+
+    items_by_model: dict[type, list] = {}
+    with bundle:
+        manifest = _read_manifest(bundle)
+        course_data = manifest.get("course") or {}
+        slug = slug or course_data.get("slug")
+        if not slug:
+            raise CourseArchiveError("Course slug is required.")
+        if Course.objects.filter(slug=slug).exists():
+            raise CourseArchiveError(f"A course with slug {slug!r} already exists.")
+
+        try:
+            with transaction.atomic():
+                subject_data = course_data.get("subject") or {}
+                subject = Subject.objects.filter(slug=subject_data.get("slug")).first()
+                if subject is None:
+                    try:
+                        with transaction.atomic():
+                            (subject,) = Subject.objects.bulk_create(
+                                [
+                                    Subject(
+                                        title=subject_data.get("title") or subject_data["slug"],
+                                        slug=subject_data["slug"],
+                                    )
+                                ]
+                            )
+                    except IntegrityError:
+                        # A concurrent import created the subject first.
+                        subject = Subject.objects.get(slug=subject_data["slug"])
+                try:
+                    with transaction.atomic():
+                        (course,) = Course.objects.bulk_create(
+                            [
+                                Course(
+                                    owner=owner,
+                                    subject=subject,
+                                    title=course_data.get("title", ""),
+                                    slug=slug,
+                                    overview=course_data.get("overview", ""),
+                                )
+                            ]
+                        )
+                except IntegrityError:
+                    # The check above ran outside the transaction; a concurrent
+                    # import can take the slug in between.
+                    raise CourseArchiveError(f"A course with slug {slug!r} already exists.") from None
+
+                module_rows = manifest.get("modules", [])
+                modules = Module.objects.bulk_create(
+                    [
+                        Module(
+                            course=course,
+                            title=row.get("title", ""),
+                            description=row.get("description", ""),
+                            order=(idx + 1) * ORDER_GAP,
+                        )
+                        for idx, row in enumerate(module_rows)
+                    ]
+                )
+
+                # (module, position, item) in manifest order; items are inserted per model.
+                placements = []
+                for module, row in zip(modules, module_rows):
+                    for idx, entry in enumerate(row.get("contents", [])):
+                        item = _build_item(bundle, entry, owner)
+                        items_by_model.setdefault(type(item), []).append(item)
+                        placements.append((module, idx, item))
+                for model, items in items_by_model.items():
+                    model.objects.bulk_create(items)
+
+                content_types = ContentType.objects.get_for_models(*items_by_model)
+                contents = Content.objects.bulk_create(
+                    [
+                        Content(
+                            module=module,
+                            content_type=content_types[type(item)],
+                            object_id=item.id,
+                            order=(idx + 1) * ORDER_GAP,
+                        )
+                        for module, idx, item in placements
+                    ]
+                )
+
+                # PDFs seen before reuse their cached pages; the rest go to the worker,
+                # which indexes their contents once extraction finishes.
+                queued_file_ids = [
+                    item.id
+                    for item in items_by_model.get(File, [])
+                    if _is_pdf_path(item.file.name) and update_pdf_index_from_cache(item.id) is None
+                ]
+                enqueue_pdf_index_jobs(queued_file_ids)
+                queued = set(queued_file_ids)
+                content_ids = [
+                    content.id
+                    for content, (_, _, item) in zip(contents, placements)
+                    if not (isinstance(item, File) and item.id in queued)
+                ]
+                if content_ids:
+                    rebuild_content_search_index(content_ids=content_ids)
+                rebuild_course_search_index(course_ids=[course.id])
+                bump_catalog_version()
+        except BaseException:
+            _delete_stored_media(item for items in items_by_model.values() for item in items)
+            raise
+
+    return {
+        "course": course,
+        "modules": len(modules),
+        "contents": len(contents),
+        "pdf_jobs": len(queued_file_ids),
+    }
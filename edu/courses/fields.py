@@ -1,17 +1,19 @@
 from typing import Any
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 
+from .ordering import append_rank
 
-class OrderField(models.PositiveIntegerField):
+
+class OrderField(models.PositiveBigIntegerField):
     """
-    Auto-fills an order/index number when the field is empty.
+    Auto-fills a sortable rank when the field is empty.
+
+    Ranks are gapped (see courses.ordering): new rows are appended one gap
+    after the group's last rank, and a moved row takes a rank between its new
+    neighbours, so only that row is rewritten.
 
-    If `for_fields` is given, numbering is grouped by those fields.
-    Example:
-    - for_fields=["course"]
-    - Module(course=A) gets order 0,1,2...
-    - Module(course=B) starts again at 0,1,2...
+    `for_fields` names the grouping key, e.g. for_fields=["course"] orders
+    modules within their course; courses.ordering uses it to find siblings.
     """
 
     def __init__(self, for_fields=None, *args, **kwargs):
@@ -27,31 +29,7 @@ class OrderField(models.PositiveIntegerField):
         if current_value is not None:
             return super().pre_save(model_instance, add)
 
-        # Field is empty -> compute next order value automatically.
-        try:
-            # Start from all rows of the same model.
-            qs = self.model.objects.all()
-
-            if self.for_fields:
-                # Build dynamic filter using the current instance values.
-                # Example for for_fields=["course"]:
-                # {"course": model_instance.course}
-                query = {
-                    field: getattr(model_instance, field)
-                    for field in self.for_fields
-                }
-                qs = qs.filter(**query)
-
-            # Pick the row with the greatest current order value.
-            last_item = qs.latest(self.attname)
-
-            # Next item should be last + 1.
-            value = getattr(last_item, self.attname) + 1
-
-        except ObjectDoesNotExist:
-            # No previous row in this group -> first value is 0.
-            value = 0
-
-        # Save computed value back to model instance before DB write.
+        # Field is empty -> append after the rest of the group.
+        value = append_rank(model_instance)
         setattr(model_instance, self.attname, value)
         return value
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.course_transfer import export_course
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Export a course, its modules, contents and media as a zip archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course", help="Course id or slug.")
+        parser.add_argument("output", help="Path of the zip archive to write.")
+
+    def handle(self, *args, **options):
+        lookup = options["course"]
+        field = "id" if lookup.isdigit() else "slug"
+        course = Course.objects.select_related("subject").filter(**{field: lookup}).first()
+        if course is None:
+            raise CommandError(f"Course {lookup!r} does not exist.")
+
+        with open(options["output"], "wb") as archive:
+            result = export_course(course, archive)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                (
+                    f"Course exported to {options['output']}: "
+                    f"modules={result['modules']}, "
+                    f"contents={result['contents']}, "
+                    f"media={result['media']}"
+                )
+            )
+        )
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.course_transfer import CourseArchiveError, import_course
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a course archive written by `export_course`. Rows are bulk-inserted; "
+        "the course is indexed once and new PDFs are queued for the PDF worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archive", help="Path of the zip archive to read.")
+        parser.add_argument(
+            "--owner",
+            required=True,
+            help="Username of the instructor who will own the imported course.",
+        )
+        parser.add_argument(
+            "--slug",
+            help="Slug for the new course (defaults to the exported slug).",
+        )
+
+    def handle(self, *args, **options):
+        owner = User.objects.filter(username=options["owner"]).first()
+        if owner is None:
+            raise CommandError(f"User {options['owner']!r} does not exist.")
+
+        try:
+            with open(options["archive"], "rb") as archive:
+                result = import_course(archive, owner, slug=options.get("slug"))
+        except (CourseArchiveError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        course = result["course"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                (
+                    f"Course imported: id={course.id}, slug={course.slug}, "
+                    f"modules={result['modules']}, "
+                    f"contents={result['contents']}, "
+                    f"pdf_jobs={result['pdf_jobs']}"
+                )
+            )
+        )
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from courses.pdf_jobs import process_pdf_index_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the PDF indexing worker: claim queued extraction jobs, extract page text, "
+        "refresh search entries, and retry failures with backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process a single batch of due jobs and exit (useful for schedulers).",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=10,
+            help="Maximum jobs to process per loop iteration.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Delay between loops in seconds when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        batch = max(1, int(options["batch"] or 10))
+        sleep_seconds = float(options["sleep"] or 0)
+        run_once = bool(options["once"])
+
+        self.stdout.write(f"PDF index worker started (batch={batch}, sleep={sleep_seconds}s).")
+
+        while True:
+            close_old_connections()
+            try:
+                result = process_pdf_index_jobs(limit=batch)
+            except KeyboardInterrupt:
+                self.stdout.write("Stopped.")
+                return
+            except Exception as exc:
+                self.stderr.write(f"PDF index worker error: {exc}")
+                result = {"processed": 0, "succeeded": 0, "failed": 0}
+
+            if result["processed"]:
+                self.stdout.write(
+                    "PDF jobs: "
+                    f"processed={result['processed']}, "
+                    f"succeeded={result['succeeded']}, "
+                    f"failed={result['failed']}"
+                )
+
+            if run_once:
+                return
+
+            # Keep draining while there is backlog; only sleep on an idle queue.
+            if result["processed"] < batch and sleep_seconds > 0:
+                try:
+                    time.sleep(sleep_seconds)
+                except KeyboardInterrupt:
+                    self.stdout.write("Stopped.")
+                    return
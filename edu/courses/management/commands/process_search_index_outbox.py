@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from courses.search_outbox import drain_search_index_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Drain the search index outbox: rebuild each dirty course document and "
+        "content entry once per burst of writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the outbox until empty and exit (useful for schedulers).",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=500,
+            help="Maximum outbox keys to claim per drain.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Delay between drains in seconds when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        batch = max(1, int(options["batch"] or 500))
+        sleep_seconds = float(options["sleep"] or 0)
+        run_once = bool(options["once"])
+
+        self.stdout.write(f"Search outbox drainer started (batch={batch}, sleep={sleep_seconds}s).")
+
+        while True:
+            close_old_connections()
+            try:
+                result = drain_search_index_outbox(limit=batch)
+            except KeyboardInterrupt:
+                self.stdout.write("Stopped.")
+                return
+            except Exception as exc:
+                self.stderr.write(f"Search outbox drainer error: {exc}")
+                result = {"keys": 0, "courses": 0, "contents": 0}
+
+            if result["keys"]:
+                self.stdout.write(
+                    "Search outbox: "
+                    f"keys={result['keys']}, "
+                    f"courses={result['courses']}, "
+                    f"contents={result['contents']}"
+                )
+                continue
+
+            if run_once:
+                return
+
+            if sleep_seconds > 0:
+                try:
+                    time.sleep(sleep_seconds)
+                except KeyboardInterrupt:
+                    self.stdout.write("Stopped.")
+                    return
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 
 from courses.search import rebuild_content_search_index
+from courses.search_rebuild import add_rebuild_arguments, run_rebuild_command
 
 
 class Command(BaseCommand):
@@ -14,9 +15,15 @@ class Command(BaseCommand):
             dest="content_ids",
             help="Optional content id filter. Repeat for multiple ids.",
         )
+        add_rebuild_arguments(parser)
 
     def handle(self, *args, **options):
         content_ids = options.get("content_ids") or None
+        if not content_ids:
+            # Full rebuilds run in checkpointed batches that can be resumed.
+            run_rebuild_command(self, "content", "Content search index", options)
+            return
+
         result = rebuild_content_search_index(content_ids=content_ids)
         self.stdout.write(
             self.style.SUCCESS(
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 
 from courses.search import rebuild_course_search_index
+from courses.search_rebuild import add_rebuild_arguments, run_rebuild_command
 
 
 class Command(BaseCommand):
@@ -14,9 +15,15 @@ class Command(BaseCommand):
             dest="course_ids",
             help="Optional course id filter. Repeat for multiple ids.",
         )
+        add_rebuild_arguments(parser)
 
     def handle(self, *args, **options):
         course_ids = options.get("course_ids") or None
+        if not course_ids:
+            # Full rebuilds run in checkpointed batches that can be resumed.
+            run_rebuild_command(self, "course", "Course search index", options)
+            return
+
         result = rebuild_course_search_index(course_ids=course_ids)
         self.stdout.write(
             self.style.SUCCESS(
@@ -15,16 +15,22 @@ class Command(BaseCommand):
             dest="file_ids",
             help="Optional file id filter. Repeat for multiple ids.",
         )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Re-parse every PDF instead of reusing cached extraction results.",
+        )
 
     def handle(self, *args, **options):
         file_ids = options.get("file_ids") or list(File.objects.values_list("id", flat=True))
+        use_cache = not options.get("no_cache")
         processed = 0
         indexed = 0
         failed = 0
         skipped = 0
 
         for file_id in file_ids:
-            result = update_pdf_index_for_file(file_id)
+            result = update_pdf_index_for_file(file_id, use_cache=use_cache)
             if result is None:
                 continue
             processed += 1
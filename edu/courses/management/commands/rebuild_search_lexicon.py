@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import SearchLexeme
+from courses.search_lexicon import rebuild_search_lexicon
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the word lexicon used for fuzzy query expansion and "
+        "\"did you mean\" suggestions from the stored search vectors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scope",
+            action="append",
+            choices=[choice for choice, _ in SearchLexeme.SCOPE_CHOICES],
+            dest="scopes",
+            help="Optional lexicon scope. Repeat for multiple scopes.",
+        )
+
+    def handle(self, *args, **options):
+        scopes = options.get("scopes") or None
+        result = rebuild_search_lexicon(scopes=scopes)
+        summary = ", ".join(f"{scope}={count}" for scope, count in result.items())
+        self.stdout.write(self.style.SUCCESS(f"Search lexicon rebuilt: {summary}"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from courses.search_suggest import rebuild_search_suggestions
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis prefix index behind the search box typeahead."
+
+    def handle(self, *args, **options):
+        result = rebuild_search_suggestions()
+        self.stdout.write(
+            self.style.SUCCESS(f"Search suggestions rebuilt: members={result['members']}")
+        )
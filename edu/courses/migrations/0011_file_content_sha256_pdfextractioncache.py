@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0010_pdfindexjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="file",
+            name="content_sha256",
+            field=models.CharField(blank=True, db_index=True, default="", max_length=64),
+        ),
+        migrations.CreateModel(
+            name="PdfExtractionCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                ("page_count", models.PositiveIntegerField(default=0)),
+                ("page_texts", models.JSONField(blank=True, default=list)),
+                ("max_pages", models.PositiveIntegerField(default=0)),
+                ("max_chars", models.PositiveIntegerField(default=0)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
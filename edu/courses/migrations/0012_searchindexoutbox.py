@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_file_content_sha256_pdfextractioncache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchIndexOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("course", "Course"),
+                            ("subject", "Subject"),
+                            ("content", "Content"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["id"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "object_id"),
+                        name="search_outbox_kind_object_uniq",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+from django.db.models import F, Func
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0012_searchindexoutbox"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="coursesearchindex",
+            name="course_idx_doc_tsv_gin",
+        ),
+        migrations.RemoveIndex(
+            model_name="contentsearchentry",
+            name="content_idx_doc_tsv_gin",
+        ),
+        migrations.AddField(
+            model_name="coursesearchindex",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    Func(
+                        F("document"),
+                        function="immutable_unaccent",
+                        output_field=models.TextField(),
+                    ),
+                    config="simple",
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="contentsearchentry",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    Func(
+                        F("document"),
+                        function="immutable_unaccent",
+                        output_field=models.TextField(),
+                    ),
+                    config="simple",
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="coursesearchindex",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"],
+                name="course_idx_doc_tsv_gin",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contentsearchentry",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"],
+                name="content_idx_doc_tsv_gin",
+            ),
+        ),
+    ]
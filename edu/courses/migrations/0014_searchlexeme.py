@@ -0,0 +1,55 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0013_search_vector_columns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchLexeme",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(
+                        choices=[
+                            ("course", "Course"),
+                            ("content", "Content"),
+                            ("note", "Note"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("word", models.CharField(max_length=64)),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["word"],
+                        name="search_lexeme_word_trgm_gin",
+                        opclasses=["gin_trgm_ops"],
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("scope", "word"),
+                        name="search_lexeme_scope_word_uniq",
+                    ),
+                ],
+            },
+        ),
+    ]
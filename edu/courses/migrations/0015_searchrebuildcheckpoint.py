@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0014_searchlexeme"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchRebuildCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=32)),
+                ("range_start", models.BigIntegerField()),
+                ("range_end", models.BigIntegerField()),
+                ("last_id", models.BigIntegerField()),
+                ("processed", models.PositiveBigIntegerField(default=0)),
+                ("finished", models.BooleanField(default=False)),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["name", "range_start"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("name", "range_start"),
+                        name="search_rebuild_name_range_uniq",
+                    ),
+                ],
+            },
+        ),
+    ]
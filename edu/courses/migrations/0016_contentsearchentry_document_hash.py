@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0015_searchrebuildcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contentsearchentry",
+            name="document_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.RunSQL(
+            sql=(
+                "UPDATE courses_contentsearchentry "
+                "SET document_hash = encode(sha256(convert_to(document, 'UTF8')), 'hex');"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        # Delete-and-reinsert refreshes could leave duplicates behind; keep the oldest row.
+        migrations.RunSQL(
+            sql=(
+                "DELETE FROM courses_contentsearchentry AS a "
+                "USING courses_contentsearchentry AS b "
+                "WHERE a.content_id = b.content_id "
+                "AND a.page_number IS NOT DISTINCT FROM b.page_number "
+                "AND a.id > b.id;"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="contentsearchentry",
+            constraint=models.UniqueConstraint(
+                fields=("content", "page_number"),
+                name="content_entry_content_page_uniq",
+                nulls_distinct=False,
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0016_contentsearchentry_document_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FilePdfText",
+            fields=[
+                (
+                    "file",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="pdf_text",
+                        serialize=False,
+                        to="courses.file",
+                    ),
+                ),
+                ("text", models.TextField(blank=True, default="")),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunSQL(
+            sql=(
+                "INSERT INTO courses_filepdftext (file_id, text, updated) "
+                "SELECT id, pdf_text_index, NOW() FROM courses_file "
+                "WHERE pdf_text_index <> '';"
+            ),
+            reverse_sql=(
+                "UPDATE courses_file SET pdf_text_index = t.text "
+                "FROM courses_filepdftext AS t WHERE t.file_id = courses_file.id;"
+            ),
+        ),
+        migrations.RemoveField(
+            model_name="file",
+            name="pdf_text_index",
+        ),
+    ]
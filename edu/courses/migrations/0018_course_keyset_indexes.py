@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0017_filepdftext"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["-created", "-id"], name="course_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                fields=["subject", "-created", "-id"],
+                name="course_subject_created_id_idx",
+            ),
+        ),
+    ]
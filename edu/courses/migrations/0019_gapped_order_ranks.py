@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations
+
+REBASE_SQL = (
+    'UPDATE {table} AS t SET "order" = r.rank '
+    "FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {group} ORDER BY \"order\", id) {rank} AS rank "
+    "FROM {table}) AS r WHERE t.id = r.id;"
+)
+
+
+def _rebase(table, group, rank):
+    return REBASE_SQL.format(table=table, group=group, rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0018_course_keyset_indexes"),
+    ]
+
+    operations = [
+        # OrderField is now a PositiveBigIntegerField; its deconstruction is
+        # unchanged, so the column type is altered explicitly.
+        migrations.RunSQL(
+            sql='ALTER TABLE courses_module ALTER COLUMN "order" TYPE bigint;',
+            reverse_sql='ALTER TABLE courses_module ALTER COLUMN "order" TYPE integer;',
+        ),
+        migrations.RunSQL(
+            sql='ALTER TABLE courses_content ALTER COLUMN "order" TYPE bigint;',
+            reverse_sql='ALTER TABLE courses_content ALTER COLUMN "order" TYPE integer;',
+        ),
+        # Spread existing 0, 1, 2... orders out so moves have room between rows.
+        migrations.RunSQL(
+            sql=_rebase("courses_module", "course_id", "* 1024"),
+            reverse_sql=_rebase("courses_module", "course_id", "- 1"),
+        ),
+        migrations.RunSQL(
+            sql=_rebase("courses_content", "module_id", "* 1024"),
+            reverse_sql=_rebase("courses_content", "module_id", "- 1"),
+        ),
+        migrations.AlterModelOptions(
+            name="module",
+            options={"ordering": ["order", "id"]},
+        ),
+        migrations.AlterModelOptions(
+            name="content",
+            options={"ordering": ["order", "id"]},
+        ),
+    ]
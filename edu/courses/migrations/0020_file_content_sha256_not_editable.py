@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0019_gapped_order_ranks"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="file",
+            name="content_sha256",
+            field=models.CharField(blank=True, db_index=True, default="", editable=False, max_length=64),
+        ),
+    ]
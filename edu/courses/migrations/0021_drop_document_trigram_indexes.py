@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0020_file_content_sha256_not_editable"),
+    ]
+
+    operations = [
+        # Typo tolerance goes through the SearchLexeme lexicon now; no query
+        # reads trigrams of whole documents.
+        migrations.RemoveIndex(
+            model_name="contentsearchentry",
+            name="content_idx_doc_trgm_gin",
+        ),
+        migrations.RemoveIndex(
+            model_name="coursesearchindex",
+            name="course_idx_doc_trgm_gin",
+        ),
+    ]
@@ -2,13 +2,14 @@ from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.indexes import GinIndex
-from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import F, Func
-from django.template.loader import render_to_string
+from django.db import models, transaction
+from django.db.models import F, Func, Q
+from django.utils import timezone
 
 from .fields import OrderField
+from .render_cache import get_rendered_html
 
 
 class Subject(models.Model):
@@ -57,6 +58,11 @@ class Course(models.Model):
     class Meta:
         # Default order: newest course first
         ordering = ["-created"]
+        indexes = [
+            # Keyset pagination of the catalog, overall and per subject.
+            models.Index(fields=["-created", "-id"], name="course_created_id_idx"),
+            models.Index(fields=["subject", "-created", "-id"], name="course_subject_created_id_idx"),
+        ]
 
     def __str__(self) -> str:
         # Display course title in admin/shell
@@ -71,26 +77,27 @@ class CourseSearchIndex(models.Model):
         on_delete=models.CASCADE,
     )
     document = models.TextField(blank=True, default="")
+    # Tokenized once at write time so ranking never re-parses the document.
+    search_vector = models.GeneratedField(
+        expression=SearchVector(
+            Func(
+                F("document"),
+                function="immutable_unaccent",
+                output_field=models.TextField(),
+            ),
+            config="simple",
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             GinIndex(
-                SearchVector(
-                    Func(
-                        F("document"),
-                        function="immutable_unaccent",
-                        output_field=models.TextField(),
-                    ),
-                    config="simple",
-                ),
+                fields=["search_vector"],
                 name="course_idx_doc_tsv_gin",
             ),
-            GinIndex(
-                fields=["document"],
-                opclasses=["gin_trgm_ops"],
-                name="course_idx_doc_trgm_gin",
-            ),
         ]
 
     def __str__(self) -> str:
@@ -120,29 +127,40 @@ class ContentSearchEntry(models.Model):
     item_title = models.CharField(max_length=250, blank=True, default="")
     # Searchable document text (plain text).
     document = models.TextField(blank=True, default="")
+    # Tokenized once at write time so ranking never re-parses the document.
+    search_vector = models.GeneratedField(
+        expression=SearchVector(
+            Func(
+                F("document"),
+                function="immutable_unaccent",
+                output_field=models.TextField(),
+            ),
+            config="simple",
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # SHA-256 of `document`, so refreshes can skip rows whose text is unchanged.
+    document_hash = models.CharField(max_length=64, blank=True, default="")
     # Optional page number when the entry maps to a PDF page.
     page_number = models.PositiveIntegerField(null=True, blank=True)
     # Auto-updated timestamp for ranking/maintenance.
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
+        constraints = [
+            # One entry per PDF page; non-PDF content has a single null-page entry.
+            models.UniqueConstraint(
+                fields=["content", "page_number"],
+                nulls_distinct=False,
+                name="content_entry_content_page_uniq",
+            ),
+        ]
         indexes = [
             GinIndex(
-                SearchVector(
-                    Func(
-                        F("document"),
-                        function="immutable_unaccent",
-                        output_field=models.TextField(),
-                    ),
-                    config="simple",
-                ),
+                fields=["search_vector"],
                 name="content_idx_doc_tsv_gin",
             ),
-            GinIndex(
-                fields=["document"],
-                opclasses=["gin_trgm_ops"],
-                name="content_idx_doc_trgm_gin",
-            ),
             models.Index(
                 fields=["course", "module", "content"],
                 name="content_idx_course_module",
@@ -160,6 +178,92 @@ class ContentSearchEntry(models.Model):
         return f"ContentSearchEntry({label})"
 
 
+class SearchIndexOutbox(models.Model):
+    # Dirty (kind, id) keys waiting for the search outbox drainer.
+    KIND_COURSE = "course"
+    KIND_SUBJECT = "subject"
+    KIND_CONTENT = "content"
+    KIND_CHOICES = (
+        (KIND_COURSE, "Course"),
+        (KIND_SUBJECT, "Subject"),
+        (KIND_CONTENT, "Content"),
+    )
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        constraints = [
+            # Repeated writes to the same row collapse into one pending key.
+            models.UniqueConstraint(
+                fields=["kind", "object_id"],
+                name="search_outbox_kind_object_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"SearchIndexOutbox({self.kind}={self.object_id})"
+
+
+class SearchLexeme(models.Model):
+    # Distinct normalized words seen in one search index, for fuzzy query expansion.
+    SCOPE_COURSE = "course"
+    SCOPE_CONTENT = "content"
+    SCOPE_NOTE = "note"
+    SCOPE_CHOICES = (
+        (SCOPE_COURSE, "Course"),
+        (SCOPE_CONTENT, "Content"),
+        (SCOPE_NOTE, "Note"),
+    )
+
+    scope = models.CharField(max_length=16, choices=SCOPE_CHOICES)
+    word = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "word"],
+                name="search_lexeme_scope_word_uniq",
+            ),
+        ]
+        indexes = [
+            GinIndex(
+                fields=["word"],
+                opclasses=["gin_trgm_ops"],
+                name="search_lexeme_word_trgm_gin",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"SearchLexeme({self.scope}:{self.word})"
+
+
+class SearchRebuildCheckpoint(models.Model):
+    # Progress of one id range of a resumable search index rebuild.
+    name = models.CharField(max_length=32)
+    range_start = models.BigIntegerField()
+    range_end = models.BigIntegerField()
+    # Highest source id already rebuilt in this range.
+    last_id = models.BigIntegerField()
+    processed = models.PositiveBigIntegerField(default=0)
+    finished = models.BooleanField(default=False)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name", "range_start"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "range_start"],
+                name="search_rebuild_name_range_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"SearchRebuildCheckpoint({self.name}:{self.range_start}-{self.range_end})"
+
+
 class Module(models.Model):
     # Module belongs to a course; deleting course deletes its modules
     course = models.ForeignKey(
@@ -174,11 +278,17 @@ class Module(models.Model):
     order = OrderField(blank=True, for_fields=["course"])
 
     class Meta:
-        ordering = ["order"]
+        ordering = ["order", "id"]
 
     def __str__(self) -> str:
-        # Display module title and order in admin/shell
-        return f"{self.order}. {self.title}"
+        # Ranks are sparse sort keys, not positions; show the title only.
+        return self.title
+
+    def save(self, *args, **kwargs):
+        # OrderField locks the course row to pick the next rank; hold that
+        # lock until the module is inserted.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Content(models.Model):
@@ -209,7 +319,12 @@ class Content(models.Model):
     order = OrderField(blank=True, for_fields=["module"])
 
     class Meta:
-        ordering = ["order"]
+        ordering = ["order", "id"]
+
+    def save(self, *args, **kwargs):
+        # Same as Module.save: keep the module row lock until the insert.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class ItemBase(models.Model):
@@ -232,10 +347,8 @@ class ItemBase(models.Model):
     updated = models.DateTimeField(auto_now=True)
 
     def render(self):
-        return render_to_string(
-            f"courses/content/{self._meta.model_name}.html",
-            {"item": self},
-        )
+        # Served from the rendered-fragment cache (see courses.render_cache).
+        return get_rendered_html(self)
 
     class Meta:
         # No database table for ItemBase itself; fields are inherited into child tables
@@ -248,13 +361,105 @@ class Text(ItemBase):
 
 
 class File(ItemBase):
+    # Lifecycle of pdf_index_status: queued -> running -> indexed/failed.
+    PDF_STATUS_PENDING = "pending"
+    PDF_STATUS_QUEUED = "queued"
+    PDF_STATUS_RUNNING = "running"
+    PDF_STATUS_INDEXED = "indexed"
+    PDF_STATUS_FAILED = "failed"
+    PDF_STATUS_SKIPPED = "skipped"
+
     # General file upload, stored under MEDIA_ROOT/files/
     file = models.FileField(upload_to="files", max_length=500)
-    pdf_text_index = models.TextField(blank=True, default="")
     pdf_page_count = models.PositiveIntegerField(default=0)
-    pdf_index_status = models.CharField(max_length=24, default="pending")
+    pdf_index_status = models.CharField(max_length=24, default=PDF_STATUS_PENDING)
     pdf_index_error = models.TextField(blank=True, default="")
     pdf_indexed_at = models.DateTimeField(null=True, blank=True)
+    # Streaming SHA-256 of the uploaded bytes; keys PdfExtractionCache.
+    content_sha256 = models.CharField(max_length=64, blank=True, default="", db_index=True, editable=False)
+
+
+class FilePdfText(models.Model):
+    # Extracted PDF text lives off the File row so serving a file never loads it.
+    file = models.OneToOneField(
+        File,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="pdf_text",
+    )
+    text = models.TextField(blank=True, default="")
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"FilePdfText({self.file_id})"
+
+
+class PdfExtractionCache(models.Model):
+    # Content-addressed extraction output shared by every File with the same bytes.
+    sha256 = models.CharField(max_length=64, unique=True)
+    page_count = models.PositiveIntegerField(default=0)
+    page_texts = models.JSONField(default=list, blank=True)
+    # Limits the pages were extracted under; a settings change invalidates the row.
+    max_pages = models.PositiveIntegerField(default=0)
+    max_chars = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"PdfExtractionCache({self.sha256[:12]})"
+
+
+class PdfIndexJob(models.Model):
+    # Durable work item consumed by the `process_pdf_index_jobs` worker.
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    file = models.ForeignKey(
+        File,
+        related_name="pdf_index_jobs",
+        on_delete=models.CASCADE,
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest time a worker may claim the job (pushed back on retry).
+    available_at = models.DateTimeField(default=timezone.now)
+    # Set when a worker claims the job; stale leases are reclaimed.
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["available_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["status", "available_at"],
+                name="pdf_job_status_avail_idx",
+            ),
+        ]
+        constraints = [
+            # At most one pending job per file; re-saves reuse it.
+            models.UniqueConstraint(
+                fields=["file"],
+                condition=Q(status="queued"),
+                name="pdf_job_one_queued_per_file",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"PdfIndexJob(file={self.file_id}, status={self.status})"
 
 
 class Image(ItemBase):
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from django.db import connection, transaction
+from django.db.models import Max, Q
+
+# Spacing between neighbouring ranks after a renumber; a move takes the midpoint.
+ORDER_GAP = 1024
+
+
+def append_rank(instance) -> int:
+    """
+    Rank for `instance` appended to the end of its group: the group's highest
+    rank plus ORDER_GAP.
+
+    The parent rows named by the field's `for_fields` (the course of a module,
+    the module of a content) are locked first, so concurrent appends to one
+    group take turns instead of reading the same maximum. Call it inside the
+    transaction that inserts the row.
+    """
+    model = type(instance)
+    for name in model._meta.get_field("order").for_fields or []:
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            list(
+                field.related_model.objects.select_for_update()
+                .filter(pk=getattr(instance, field.attname))
+                .values_list("pk", flat=True)
+            )
+    last = _group_queryset(instance).aggregate(last=Max("order"))["last"]
+    return (last if last is not None else 0) + ORDER_GAP
+
+
+def position_of(instance) -> int:
+    """
+    1-based position of `instance` within its group; ranks are sparse sort
+    keys, so this is what users see as the item's number.
+    """
+    return _group_queryset(instance).filter(
+        Q(order__lt=instance.order) | Q(order=instance.order, id__lt=instance.id)
+    ).count() + 1
+
+
+def rank_between(low: int | None, high: int | None) -> int | None:
+    """
+    Return a rank strictly between two neighbours (None is an open end), or
+    None when they are too close and the group must be renumbered.
+    """
+    if high is None:
+        return (low if low is not None else 0) + ORDER_GAP
+    if low is None:
+        low = max(-1, high - 2 * ORDER_GAP)
+    if high - low < 2:
+        return None
+    return (low + high) // 2
+
+
+def bulk_set_order(model, ranks: list[tuple[int, int]]) -> int:
+    """
+    Write many `(id, rank)` pairs in a single UPDATE ... FROM (VALUES ...).
+    """
+    if not ranks:
+        return 0
+    quote = connection.ops.quote_name
+    values_sql = ", ".join(["(%s::bigint, %s::bigint)"] * len(ranks))
+    sql = (
+        f"UPDATE {quote(model._meta.db_table)} AS t "
+        f"SET {quote(model._meta.get_field('order').column)} = v.rank "
+        f"FROM (VALUES {values_sql}) AS v(id, rank) "
+        "WHERE t.id = v.id"
+    )
+    params = [value for pair in ranks for value in pair]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def reorder(model, ordered_ids: list[int]) -> int:
+    """
+    Apply a whole new ordering: `ordered_ids[0]` first, evenly gapped.
+    """
+    ranks = [(object_id, (idx + 1) * ORDER_GAP) for idx, object_id in enumerate(ordered_ids)]
+    with transaction.atomic():
+        return bulk_set_order(model, ranks)
+
+
+def _group_queryset(instance):
+    model = type(instance)
+    field = model._meta.get_field("order")
+    scope = {
+        name: getattr(instance, model._meta.get_field(name).attname)
+        for name in field.for_fields or []
+    }
+    return model.objects.filter(**scope)
+
+
+def move_between(instance, prev_id: int | None = None, next_id: int | None = None) -> int:
+    """
+    Move `instance` between two siblings of its group and return its new rank.
+
+    Normally only the moved row is written. When its neighbours have no rank
+    left between them, the group is renumbered with one bulk statement.
+    """
+    model = type(instance)
+    with transaction.atomic():
+        siblings = list(
+            _group_queryset(instance)
+            .select_for_update()
+            .exclude(id=instance.id)
+            .order_by("order", "id")
+            .values_list("id", "order")
+        )
+        ranks = dict(siblings)
+        low = ranks.get(prev_id) if prev_id is not None else None
+        high = ranks.get(next_id) if next_id is not None else None
+
+        rank = rank_between(low, high)
+        if rank is not None:
+            model.objects.filter(id=instance.id).update(order=rank)
+            instance.order = rank
+            return rank
+
+        ordered_ids = [sibling_id for sibling_id, _ in siblings]
+        position = ordered_ids.index(prev_id) + 1 if prev_id in ranks else 0
+        ordered_ids.insert(position, instance.id)
+        reorder(model, ordered_ids)
+        instance.order = (position + 1) * ORDER_GAP
+        return instance.order
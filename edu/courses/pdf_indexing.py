@@ -1,11 +1,26 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from dataclasses import dataclass
+from typing import Iterator
 
 from django.conf import settings
 from django.utils import timezone
 
-from .models import File
+from .models import File, FilePdfText, PdfExtractionCache
+from .pdf_sandbox import (
+    PdfSandbox,
+    PdfSandboxError,
+    apply_char_budget,
+    normalize_text,
+    sandbox_supported,
+)
 
 try:
     from pypdf import PdfReader
@@ -16,92 +31,302 @@ except Exception:  # pragma: no cover - optional runtime dependency fallback
 PDF_INDEX_MAX_PAGES = int(getattr(settings, "PDF_INDEX_MAX_PAGES", 60))
 PDF_INDEX_MAX_CHARS = int(getattr(settings, "PDF_INDEX_MAX_CHARS", 180000))
 PDF_INDEX_ERROR_MAX = 4000
+# Parse each PDF in a resource-limited child process (see pdf_sandbox). On by
+# default where the sandbox works (POSIX); Windows dev setups parse in-process.
+# The sandbox extracts pages serially in its one child, so PDF_INDEX_WORKERS
+# only applies when it is off: isolation is traded for per-document speed.
+PDF_INDEX_SANDBOX = bool(getattr(settings, "PDF_INDEX_SANDBOX", sandbox_supported()))
+PDF_INDEX_CPU_SECONDS = int(getattr(settings, "PDF_INDEX_CPU_SECONDS", 60))
+PDF_INDEX_MEMORY_MB = int(getattr(settings, "PDF_INDEX_MEMORY_MB", 512))
+PDF_INDEX_TIMEOUT_SECONDS = float(getattr(settings, "PDF_INDEX_TIMEOUT_SECONDS", 120))
+# Interpreter for the sandbox child; empty picks the running environment's python.
+PDF_INDEX_SANDBOX_PYTHON = str(getattr(settings, "PDF_INDEX_SANDBOX_PYTHON", "") or "")
+# Without the sandbox, pages are split across this many processes; 1 keeps
+# extraction in-process. Ignored while PDF_INDEX_SANDBOX is on: the sandbox
+# always uses one child so its CPU limit covers the whole document.
+PDF_INDEX_WORKERS = int(getattr(settings, "PDF_INDEX_WORKERS", min(4, os.cpu_count() or 1)))
+# Small documents are cheaper to parse serially than to spin up a pool for.
+PDF_INDEX_PARALLEL_MIN_PAGES = int(getattr(settings, "PDF_INDEX_PARALLEL_MIN_PAGES", 8))
+# Pages handed to a pool worker per task; at most one task per worker is in flight.
+PDF_INDEX_PAGES_PER_TASK = int(getattr(settings, "PDF_INDEX_PAGES_PER_TASK", 4))
+# Ceiling on extracted text buffered before it is written to the index.
+PDF_INDEX_BUFFER_CHARS = int(getattr(settings, "PDF_INDEX_BUFFER_CHARS", 64000))
 
 
 @dataclass
 class PdfIndexResult:
     status: str
-    text: str
     page_count: int
     error: str
     page_texts: list[str]
+    # False when a sandbox limit stopped extraction; retrying would hit it again.
+    retryable: bool = True
 
-
-def _normalize_text(value: str) -> str:
-    return " ".join((value or "").split())
+    @property
+    def text(self) -> str:
+        return "\n".join(text for text in self.page_texts if text)
 
 
 def _is_pdf_path(name: str) -> bool:
     return str(name or "").lower().endswith(".pdf")
 
 
+def _extract_page_range(path: str, start: int, stop: int) -> list[str]:
+    # Runs inside a pool worker: open the file independently so nothing large is pickled.
+    reader = PdfReader(path)
+    return [
+        normalize_text(reader.pages[idx].extract_text() or "")[:PDF_INDEX_MAX_CHARS]
+        for idx in range(start, stop)
+    ]
+
+
+def _local_path(file_obj: File) -> str | None:
+    try:
+        return file_obj.file.path
+    except (NotImplementedError, ValueError):
+        # Remote storage backends have no filesystem path.
+        return None
+
+
+def _iter_pool_pages(path: str, page_count: int, workers: int) -> Iterator[str]:
+    """
+    Yield page texts in order while at most `workers` small page ranges are
+    being extracted, so a long document is never materialized at once.
+    """
+    ranges = deque(
+        (start, min(page_count, start + PDF_INDEX_PAGES_PER_TASK))
+        for start in range(0, page_count, max(1, PDF_INDEX_PAGES_PER_TASK))
+    )
+    pool = ProcessPoolExecutor(max_workers=max(1, min(workers, len(ranges))))
+    pending: deque = deque()
+    try:
+        while ranges or pending:
+            while ranges and len(pending) < workers:
+                pending.append(pool.submit(_extract_page_range, path, *ranges.popleft()))
+            # Collect in submission order so page order never depends on scheduling.
+            yield from pending.popleft().result()
+    finally:
+        # The consumer may stop early once the character budget is spent.
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _iter_pages_serial(reader, page_count: int, start: int = 0) -> Iterator[str]:
+    for idx in range(start, page_count):
+        yield normalize_text(reader.pages[idx].extract_text() or "")
+
+
+def _iter_pages_parallel(reader, path: str, page_count: int, workers: int) -> Iterator[str]:
+    emitted = 0
+    try:
+        for text in _iter_pool_pages(path, page_count, workers):
+            emitted += 1
+            yield text
+    except (BrokenProcessPool, OSError):
+        # Workers could not start or died; finish the remaining pages in-process.
+        yield from _iter_pages_serial(reader, page_count, start=emitted)
+
+
+def _iter_reader_pages(reader, path: str | None) -> Iterator[str]:
+    max_pages = max(1, min(len(reader.pages), PDF_INDEX_MAX_PAGES))
+    if path and PDF_INDEX_WORKERS > 1 and max_pages >= PDF_INDEX_PARALLEL_MIN_PAGES:
+        raw_pages = _iter_pages_parallel(reader, path, max_pages, PDF_INDEX_WORKERS)
+    else:
+        raw_pages = _iter_pages_serial(reader, max_pages)
+    return apply_char_budget(raw_pages, PDF_INDEX_MAX_CHARS, max_pages)
+
+
+@contextmanager
+def _sandbox_path(file_obj: File):
+    path = _local_path(file_obj)
+    if path:
+        yield path
+        return
+    # The child cannot reach remote storage; hand it a local copy.
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as copy:
+        with file_obj.file.open("rb"):
+            for chunk in file_obj.file.chunks():
+                copy.write(chunk)
+        copy.flush()
+        yield copy.name
+
+
+@contextmanager
+def _open_pdf_pages(file_obj: File):
+    """
+    Yield `(page_total, page_texts)` for a PDF, parsed in the sandbox unless
+    PDF_INDEX_SANDBOX is off.
+    """
+    if PDF_INDEX_SANDBOX:
+        with _sandbox_path(file_obj) as path, PdfSandbox(
+            path,
+            max_pages=PDF_INDEX_MAX_PAGES,
+            max_chars=PDF_INDEX_MAX_CHARS,
+            cpu_seconds=PDF_INDEX_CPU_SECONDS,
+            memory_mb=PDF_INDEX_MEMORY_MB,
+            timeout_seconds=PDF_INDEX_TIMEOUT_SECONDS,
+            python=PDF_INDEX_SANDBOX_PYTHON or None,
+        ) as sandbox:
+            yield sandbox.page_count, sandbox.pages()
+        return
+
+    with file_obj.file.open("rb") as handle:
+        reader = PdfReader(handle)
+        yield len(reader.pages), _iter_reader_pages(reader, _local_path(file_obj))
+
+
+def iter_pdf_page_texts(file_obj: File) -> Iterator[str]:
+    """
+    Yield the budgeted text of each page of a PDF, one page at a time.
+
+    Extraction errors propagate to the consumer; non-PDF files yield nothing.
+    """
+    if PdfReader is None or not file_obj.file or not _is_pdf_path(file_obj.file.name):
+        return
+    with _open_pdf_pages(file_obj) as (_, page_texts):
+        yield from page_texts
+
+
 def extract_pdf_index_data(file_obj: File) -> PdfIndexResult:
     if not file_obj.file or not _is_pdf_path(file_obj.file.name):
-        return PdfIndexResult(status="skipped", text="", page_count=0, error="", page_texts=[])
+        return PdfIndexResult(status="skipped", page_count=0, error="", page_texts=[])
 
     if PdfReader is None:
         return PdfIndexResult(
             status="failed",
-            text="",
             page_count=0,
             error="pypdf not installed",
             page_texts=[],
         )
 
     try:
-        with file_obj.file.open("rb") as handle:
-            reader = PdfReader(handle)
-            page_total = len(reader.pages)
-            max_pages = max(1, min(page_total, PDF_INDEX_MAX_PAGES))
-
-            chunks = []
-            page_texts: list[str] = []
-            current_chars = 0
-            for idx in range(max_pages):
-                raw = reader.pages[idx].extract_text() or ""
-                clean = _normalize_text(raw)
-                if not clean:
-                    page_texts.append("")
-                    continue
-                remaining = PDF_INDEX_MAX_CHARS - current_chars
-                if remaining <= 0:
-                    page_texts.append("")
-                    continue
-                if len(clean) > remaining:
-                    clean = clean[:remaining]
-                chunks.append(clean)
-                page_texts.append(clean)
-                current_chars += len(clean)
-
-            return PdfIndexResult(
-                status="indexed",
-                text="\n".join(chunks),
-                page_count=page_total,
-                error="",
-                page_texts=page_texts,
-            )
+        # The worker keeps every page: they feed the extraction cache row, the
+        # joined FilePdfText and the per-page search entries. PDF_INDEX_MAX_PAGES
+        # and PDF_INDEX_MAX_CHARS bound that list; iter_pdf_page_texts() is the
+        # streaming path for callers that only index pages.
+        with _open_pdf_pages(file_obj) as (page_total, page_texts):
+            page_texts = list(page_texts)
+        return PdfIndexResult(
+            status="indexed",
+            page_count=page_total,
+            error="",
+            page_texts=page_texts,
+        )
+    except PdfSandboxError as exc:
+        return PdfIndexResult(
+            status="failed",
+            page_count=0,
+            error=str(exc)[:PDF_INDEX_ERROR_MAX],
+            page_texts=[],
+            retryable=not exc.limit_exceeded,
+        )
     except Exception as exc:
         return PdfIndexResult(
             status="failed",
-            text="",
             page_count=0,
             error=str(exc)[:PDF_INDEX_ERROR_MAX],
             page_texts=[],
         )
 
 
-def update_pdf_index_for_file(file_id: int) -> PdfIndexResult | None:
+def compute_file_sha256(field_file, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    for chunk in field_file.chunks(chunk_size=chunk_size):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ensure_file_digest(file_obj: File) -> str:
+    if file_obj.content_sha256 or not file_obj.file:
+        return file_obj.content_sha256
     try:
-        file_obj = File.objects.get(id=file_id)
-    except File.DoesNotExist:
+        with file_obj.file.open("rb"):
+            file_obj.content_sha256 = compute_file_sha256(file_obj.file)
+    except (FileNotFoundError, OSError):
+        return ""
+    File.objects.filter(id=file_obj.id).update(content_sha256=file_obj.content_sha256)
+    return file_obj.content_sha256
+
+
+def get_cached_pdf_index_data(sha256: str) -> PdfIndexResult | None:
+    if not sha256:
+        return None
+    row = PdfExtractionCache.objects.filter(
+        sha256=sha256,
+        max_pages=PDF_INDEX_MAX_PAGES,
+        max_chars=PDF_INDEX_MAX_CHARS,
+    ).first()
+    if row is None:
         return None
+    page_texts = [str(text or "") for text in (row.page_texts or [])]
+    return PdfIndexResult(
+        status="indexed",
+        page_count=row.page_count,
+        error="",
+        page_texts=page_texts,
+    )
+
+
+def store_pdf_index_cache(sha256: str, result: PdfIndexResult) -> None:
+    # Only successful extractions are cached; failures may be transient.
+    if not sha256 or result.status != "indexed":
+        return
+    PdfExtractionCache.objects.update_or_create(
+        sha256=sha256,
+        defaults={
+            "page_count": result.page_count,
+            "page_texts": result.page_texts,
+            "max_pages": PDF_INDEX_MAX_PAGES,
+            "max_chars": PDF_INDEX_MAX_CHARS,
+        },
+    )
+
 
-    result = extract_pdf_index_data(file_obj)
+def _save_pdf_index_result(file_id: int, result: PdfIndexResult) -> None:
+    text = result.text
+    if text:
+        FilePdfText.objects.update_or_create(file_id=file_id, defaults={"text": text})
+    else:
+        FilePdfText.objects.filter(file_id=file_id).delete()
     File.objects.filter(id=file_id).update(
-        pdf_text_index=result.text,
         pdf_page_count=result.page_count,
         pdf_index_status=result.status,
         pdf_index_error=result.error,
         pdf_indexed_at=timezone.now(),
     )
+
+
+def update_pdf_index_from_cache(file_id: int) -> PdfIndexResult | None:
+    """
+    Apply cached extraction output to a file without parsing it.
+
+    Returns None on a cache miss so the caller can queue a real extraction.
+    """
+    file_obj = File.objects.filter(id=file_id).first()
+    if file_obj is None or not _is_pdf_path(file_obj.file.name):
+        return None
+
+    result = get_cached_pdf_index_data(_ensure_file_digest(file_obj))
+    if result is not None:
+        _save_pdf_index_result(file_id, result)
+    return result
+
+
+def update_pdf_index_for_file(file_id: int, use_cache: bool = True) -> PdfIndexResult | None:
+    try:
+        file_obj = File.objects.get(id=file_id)
+    except File.DoesNotExist:
+        return None
+
+    result = None
+    sha256 = ""
+    if _is_pdf_path(file_obj.file.name):
+        sha256 = _ensure_file_digest(file_obj)
+        if use_cache:
+            result = get_cached_pdf_index_data(sha256)
+
+    if result is None:
+        result = extract_pdf_index_data(file_obj)
+        store_pdf_index_cache(sha256, result)
+
+    _save_pdf_index_result(file_id, result)
     return result
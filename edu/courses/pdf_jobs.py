@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import File, PdfIndexJob
+from .pdf_indexing import PDF_INDEX_ERROR_MAX, update_pdf_index_for_file
+from .search import (
+    refresh_content_search_entries_for_file,
+    refresh_file_related_course_indexes,
+)
+
+PDF_INDEX_JOB_MAX_ATTEMPTS = int(getattr(settings, "PDF_INDEX_JOB_MAX_ATTEMPTS", 3))
+PDF_INDEX_JOB_RETRY_SECONDS = int(getattr(settings, "PDF_INDEX_JOB_RETRY_SECONDS", 30))
+PDF_INDEX_JOB_LEASE_SECONDS = int(getattr(settings, "PDF_INDEX_JOB_LEASE_SECONDS", 60 * 10))
+
+
+def enqueue_pdf_index_job(file_id: int) -> None:
+    """
+    Schedule extraction for a file and mark it as queued.
+
+    Repeated saves collapse into the single queued job for the file.
+    """
+    now = timezone.now()
+    reused = PdfIndexJob.objects.filter(
+        file_id=file_id,
+        status=PdfIndexJob.STATUS_QUEUED,
+    ).update(available_at=now, attempts=0, last_error="")
+    if not reused:
+        try:
+            with transaction.atomic():
+                PdfIndexJob.objects.create(file_id=file_id, available_at=now)
+        except IntegrityError:
+            # Another request queued the same file concurrently.
+            pass
+
+    File.objects.filter(id=file_id).update(
+        pdf_index_status=File.PDF_STATUS_QUEUED,
+        pdf_index_error="",
+    )
+
+
+def enqueue_pdf_index_jobs(file_ids: list[int]) -> int:
+    """
+    Queue extraction for many files with one INSERT and one UPDATE.
+
+    Files that already have a queued job keep it.
+    """
+    if not file_ids:
+        return 0
+    now = timezone.now()
+    PdfIndexJob.objects.bulk_create(
+        [PdfIndexJob(file_id=file_id, available_at=now) for file_id in file_ids],
+        ignore_conflicts=True,
+    )
+    return File.objects.filter(id__in=file_ids).update(
+        pdf_index_status=File.PDF_STATUS_QUEUED,
+        pdf_index_error="",
+    )
+
+
+def claim_next_pdf_index_job() -> PdfIndexJob | None:
+    """
+    Lock and mark the next due job as running.
+
+    `SKIP LOCKED` lets several workers poll the table without blocking each
+    other; running jobs whose lease expired (crashed worker) are reclaimed.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=PDF_INDEX_JOB_LEASE_SECONDS)
+    with transaction.atomic():
+        job = (
+            PdfIndexJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=PdfIndexJob.STATUS_QUEUED, available_at__lte=now)
+                | Q(status=PdfIndexJob.STATUS_RUNNING, locked_at__lt=stale_before)
+            )
+            .order_by("available_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = PdfIndexJob.STATUS_RUNNING
+        job.locked_at = now
+        job.attempts += 1
+        job.save(update_fields=["status", "locked_at", "attempts", "updated"])
+        File.objects.filter(id=job.file_id).update(
+            pdf_index_status=File.PDF_STATUS_RUNNING,
+        )
+    return job
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=PDF_INDEX_JOB_RETRY_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+def _fail_job(job: PdfIndexJob, error: str, retry: bool = True) -> None:
+    error = (error or "unknown error")[:PDF_INDEX_ERROR_MAX]
+    job.last_error = error
+    job.locked_at = None
+
+    if retry and job.attempts < PDF_INDEX_JOB_MAX_ATTEMPTS:
+        job.status = PdfIndexJob.STATUS_QUEUED
+        job.available_at = timezone.now() + _retry_delay(job.attempts)
+        file_status = File.PDF_STATUS_QUEUED
+    else:
+        job.status = PdfIndexJob.STATUS_FAILED
+        file_status = File.PDF_STATUS_FAILED
+
+    try:
+        job.save(update_fields=["status", "available_at", "locked_at", "last_error", "updated"])
+    except IntegrityError:
+        # The file was re-queued while running; the newer job takes over.
+        PdfIndexJob.objects.filter(id=job.id).update(
+            status=PdfIndexJob.STATUS_FAILED,
+            locked_at=None,
+            last_error=error,
+        )
+        return
+
+    File.objects.filter(id=job.file_id).update(
+        pdf_index_status=file_status,
+        pdf_index_error=error,
+    )
+
+
+def run_pdf_index_job(job: PdfIndexJob) -> bool:
+    """
+    Extract, persist and index one claimed job. Returns True on success.
+    """
+    try:
+        result = update_pdf_index_for_file(job.file_id)
+        if result is None:
+            # File was deleted after the job was claimed.
+            PdfIndexJob.objects.filter(id=job.id).delete()
+            return True
+        if result.status == File.PDF_STATUS_FAILED:
+            _fail_job(job, result.error, retry=result.retryable)
+            return False
+
+        refresh_content_search_entries_for_file(job.file_id, page_texts=result.page_texts)
+        refresh_file_related_course_indexes(job.file_id)
+    except Exception as exc:
+        _fail_job(job, str(exc))
+        return False
+
+    PdfIndexJob.objects.filter(id=job.id).update(
+        status=PdfIndexJob.STATUS_DONE,
+        locked_at=None,
+        last_error="",
+        updated=timezone.now(),
+    )
+    return True
+
+
+def process_pdf_index_jobs(limit: int = 10) -> dict[str, int]:
+    processed = 0
+    succeeded = 0
+    failed = 0
+
+    for _ in range(max(1, int(limit or 1))):
+        job = claim_next_pdf_index_job()
+        if job is None:
+            break
+        processed += 1
+        if run_pdf_index_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+
+    return {"processed": processed, "succeeded": succeeded, "failed": failed}
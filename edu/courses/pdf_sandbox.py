@@ -0,0 +1,263 @@
+"""
+Resource-limited PDF text extraction.
+
+Everything here must stay importable without Django: the extraction child runs
+this file as a script in a fresh interpreter.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from typing import Iterable, Iterator
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+try:
+    from pypdf import PdfReader
+except Exception:  # pragma: no cover - optional runtime dependency fallback
+    PdfReader = None
+
+_MB = 1024 * 1024
+
+
+class PdfSandboxError(Exception):
+    """
+    Extraction failed inside the sandbox. `limit_exceeded` is set when a CPU,
+    memory or wall-clock limit stopped it, which retrying will not fix.
+    """
+
+    def __init__(self, reason: str, limit_exceeded: bool = False):
+        super().__init__(reason)
+        self.limit_exceeded = limit_exceeded
+
+
+def normalize_text(value: str) -> str:
+    return " ".join((value or "").split())
+
+
+def apply_char_budget(raw_pages: Iterable[str], max_chars: int, page_count: int) -> Iterator[str]:
+    """
+    Yield one text per page for `page_count` pages, clipped to a shared
+    `max_chars` budget.
+
+    Once the budget is spent the remaining pages are yielded empty without
+    being pulled from `raw_pages`, so a long document is never extracted
+    past the budget but page numbers stay aligned.
+    """
+    pages = iter(raw_pages)
+    remaining = max_chars
+    try:
+        for _ in range(page_count):
+            if remaining <= 0:
+                # Release the extractor (a process pool, say) before padding.
+                _close(pages)
+                yield ""
+                continue
+            clean = next(pages, "")[:remaining]
+            remaining -= len(clean)
+            yield clean
+    finally:
+        _close(pages)
+
+
+def _close(pages) -> None:
+    close = getattr(pages, "close", None)
+    if close is not None:
+        close()
+
+
+def python_executable(configured: str | None = None) -> str:
+    """
+    Return the interpreter that runs the extraction child.
+
+    Under uWSGI `sys.executable` is the uwsgi binary, so it is only trusted
+    when it is a Python; otherwise the active environment's python is used.
+    """
+    if configured:
+        return configured
+    if os.path.basename(sys.executable or "").lower().startswith("python"):
+        return sys.executable
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    for name in (f"python{version}", f"python{sys.version_info.major}", "python"):
+        candidate = os.path.join(sys.prefix, "bin", name)
+        if os.access(candidate, os.X_OK):
+            return candidate
+    found = shutil.which(f"python{version}") or shutil.which("python3")
+    if found:
+        return found
+    raise PdfSandboxError("no Python interpreter found for the sandbox; set PDF_INDEX_SANDBOX_PYTHON")
+
+
+def sandbox_supported() -> bool:
+    """
+    The sandbox relies on POSIX rlimits, kill signals and select() on pipes,
+    none of which Windows provides.
+    """
+    return os.name == "posix" and resource is not None
+
+
+def _limit_resources(cpu_seconds: int, memory_bytes: int) -> None:
+    if resource is None:
+        return
+    # The soft CPU limit delivers SIGXCPU; the hard limit a second later is SIGKILL.
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def _emit(message: dict) -> None:
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def _sandbox_main(path: str, max_pages: int, max_chars: int, cpu_seconds: int, memory_bytes: int) -> None:
+    try:
+        _limit_resources(cpu_seconds, memory_bytes)
+        reader = PdfReader(path)
+        page_total = len(reader.pages)
+        _emit({"pages": page_total})
+        page_count = min(page_total, max_pages)
+        raw_pages = (
+            normalize_text(reader.pages[idx].extract_text() or "")
+            for idx in range(page_count)
+        )
+        for text in apply_char_budget(raw_pages, max_chars, page_count):
+            _emit({"page": text})
+        _emit({"done": True})
+    except MemoryError:
+        _emit({"error": f"memory limit of {memory_bytes // _MB} MB exceeded", "limit": True})
+    except Exception as exc:
+        _emit({"error": f"{exc.__class__.__name__}: {exc}"})
+
+
+class PdfSandbox:
+    """
+    Extract one PDF in a child process with CPU-time and address-space limits
+    and a wall-clock deadline.
+
+    Used as a context manager: entering starts the child and reads the page
+    count, `pages()` streams budgeted page texts, and leaving always reaps
+    the child. Failures raise `PdfSandboxError` with a precise reason.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_pages: int,
+        max_chars: int,
+        cpu_seconds: int,
+        memory_mb: int,
+        timeout_seconds: float,
+        python: str | None = None,
+    ):
+        self.path = path
+        self.python = python
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout_seconds = timeout_seconds
+        self.page_count = 0
+        self._process = None
+        self._deadline = 0.0
+        self._buffer = bytearray()
+
+    def __enter__(self) -> PdfSandbox:
+        if PdfReader is None:
+            raise PdfSandboxError("pypdf not installed")
+        if not sandbox_supported():
+            raise PdfSandboxError("the extraction sandbox needs a POSIX system; set PDF_INDEX_SANDBOX = False")
+        # A fresh interpreter rather than a fork: the child must not inherit the
+        # web worker's address space (counted against RLIMIT_AS), locks or sockets.
+        self._process = subprocess.Popen(
+            [
+                python_executable(self.python),
+                os.path.abspath(__file__),
+                self.path,
+                str(self.max_pages),
+                str(self.max_chars),
+                str(self.cpu_seconds),
+                str(self.memory_mb * _MB),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+        )
+        self._deadline = time.monotonic() + self.timeout_seconds
+        try:
+            self.page_count = self._receive()["pages"]
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        self._process.stdout.close()
+        self._process = None
+
+    def pages(self) -> Iterator[str]:
+        while True:
+            message = self._receive()
+            if message.get("done"):
+                return
+            yield message["page"]
+
+    def _receive(self) -> dict:
+        # Raw reads into our own buffer: select() cannot see data a buffered
+        # reader has already pulled off the pipe.
+        fd = self._process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = self._deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise PdfSandboxError(
+                    f"extraction timed out after {self.timeout_seconds:g}s",
+                    limit_exceeded=True,
+                )
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise self._exit_error()
+            self._buffer.extend(chunk)
+        end = self._buffer.index(b"\n")
+        message = json.loads(bytes(self._buffer[:end]))
+        del self._buffer[: end + 1]
+        if "error" in message:
+            raise PdfSandboxError(message["error"], limit_exceeded=bool(message.get("limit")))
+        return message
+
+    def _exit_error(self) -> PdfSandboxError:
+        code = self._process.wait()
+        sigxcpu = getattr(signal, "SIGXCPU", None)
+        if sigxcpu is not None and code == -sigxcpu:
+            return PdfSandboxError(f"CPU time limit of {self.cpu_seconds}s exceeded", limit_exceeded=True)
+        if code == -signal.SIGKILL:
+            return PdfSandboxError(
+                f"extraction process killed (CPU limit {self.cpu_seconds}s, memory limit {self.memory_mb} MB)",
+                limit_exceeded=True,
+            )
+        return PdfSandboxError(f"extraction process exited unexpectedly (exit code {code})")
+
+
+if __name__ == "__main__":
+    _sandbox_main(
+        sys.argv[1],
+        int(sys.argv[2]),
+        int(sys.argv[3]),
+        int(sys.argv[4]),
+        int(sys.argv[5]),
+    )
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString, mark_safe
+
+CONTENT_RENDER_CACHE_TTL = int(getattr(settings, "CONTENT_RENDER_CACHE_TTL", 60 * 60 * 24 * 7))
+# Bump when the courses/content/* templates change so old fragments are ignored.
+CONTENT_RENDER_CACHE_VERSION = int(getattr(settings, "CONTENT_RENDER_CACHE_VERSION", 2))
+
+CONTENT_RENDER_KEY = "content:render:{model}:{pk}:{stamp}"
+
+
+def render_item_html(item) -> SafeString:
+    return render_to_string(
+        f"courses/content/{item._meta.model_name}.html",
+        {"item": item},
+    )
+
+
+def rendered_item_key(item) -> str:
+    # `updated` moves on every save, so an edited item never hits an old fragment.
+    stamp = int(item.updated.timestamp() * 1_000_000) if item.updated else 0
+    return CONTENT_RENDER_KEY.format(model=item._meta.label_lower, pk=item.pk, stamp=stamp)
+
+
+def store_rendered_html(item) -> SafeString:
+    html = render_item_html(item)
+    try:
+        cache.set(
+            rendered_item_key(item),
+            str(html),
+            CONTENT_RENDER_CACHE_TTL,
+            version=CONTENT_RENDER_CACHE_VERSION,
+        )
+    except Exception:
+        pass
+    return html
+
+
+def get_rendered_html(item) -> SafeString:
+    """
+    Return the item's context-free HTML fragment, rendering it on a miss.
+    """
+    try:
+        html = cache.get(rendered_item_key(item), version=CONTENT_RENDER_CACHE_VERSION)
+    except Exception:
+        html = None
+    if html is None:
+        return store_rendered_html(item)
+    return mark_safe(html)
+
+
+def get_rendered_html_many(items: Iterable) -> dict[tuple[str, int], SafeString]:
+    """
+    Return `{(model label, pk): html}` for many items with one cache read.
+
+    Misses are rendered and written back with a single `set_many`.
+    """
+    keys = {rendered_item_key(item): item for item in items if item is not None}
+    try:
+        cached = cache.get_many(list(keys), version=CONTENT_RENDER_CACHE_VERSION)
+    except Exception:
+        cached = {}
+
+    rendered = {}
+    missing = {}
+    for key, item in keys.items():
+        html = cached.get(key)
+        if html is None:
+            html = missing[key] = str(render_item_html(item))
+        rendered[(item._meta.label_lower, item.pk)] = mark_safe(html)
+
+    if missing:
+        try:
+            cache.set_many(missing, CONTENT_RENDER_CACHE_TTL, version=CONTENT_RENDER_CACHE_VERSION)
+        except Exception:
+            pass
+    return rendered
@@ -1,21 +1,23 @@
 from __future__ import annotations
 
-import unicodedata
+import hashlib
 import html
+import unicodedata
 from functools import lru_cache
+from typing import Iterable, Iterator
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.search import (
     SearchQuery,
     SearchRank,
-    SearchVector,
     TrigramSimilarity,
 )
 from django.db.models import F, FloatField, Q, TextField, Value
 from django.db.models.expressions import ExpressionWrapper
-from django.db.models.functions import Coalesce, Greatest, Substr
+from django.db.models.functions import Coalesce, Greatest, Left, Substr
 from django.db.models import Func
 from django.db import transaction
+from django.utils import timezone
 from django.utils.html import strip_tags
 from django.db import IntegrityError
 
@@ -30,15 +32,24 @@ from .models import (
     Course,
     CourseSearchIndex,
     File,
+    FilePdfText,
+    SearchLexeme,
     Text,
 )
-from .pdf_indexing import extract_pdf_index_data
+from .pdf_indexing import PDF_INDEX_BUFFER_CHARS, get_cached_pdf_index_data, iter_pdf_page_texts
+from .search_cache import INDEX_COURSE, bump_search_generation
+from .search_lexicon import build_fuzzy_search_query, record_search_lexemes
+from .search_rebuild import iter_id_batches
+from .search_suggest import update_content_suggestions, update_course_suggestions
 
 RANK_THRESHOLD = 0.02
 SIMILARITY_THRESHOLD = 0.08
 COURSE_DOC_MAX_PDF_CHARS = 220000
+COURSE_DOC_PDF_CHUNK_ROWS = 4
 CONTENT_RANK_THRESHOLD = 0.02
-CONTENT_SIMILARITY_THRESHOLD = 0.08
+# Upper bound on rows scored per query (newest matches win); snippets are only
+# built for the final page.
+CONTENT_CANDIDATE_LIMIT = 400
 
 
 def _normalize_whitespace(value: str) -> str:
@@ -62,10 +73,17 @@ def _course_pdf_text_chunks(course_id: int):
         module__course_id=course_id,
         content_type_id=file_ct,
     ).values_list("object_id", flat=True)
-    return File.objects.filter(
-        id__in=file_ids,
-        pdf_index_status="indexed",
-    ).exclude(pdf_text_index="").values_list("pdf_text_index", flat=True)
+    # Only the budgeted prefix of each file leaves the database, streamed a few rows at a time.
+    return (
+        FilePdfText.objects.filter(
+            file_id__in=file_ids,
+            file__pdf_index_status="indexed",
+        )
+        .exclude(text="")
+        .order_by("file_id")
+        .values_list(Left("text", COURSE_DOC_MAX_PDF_CHARS), flat=True)
+        .iterator(chunk_size=COURSE_DOC_PDF_CHUNK_ROWS)
+    )
 
 
 def build_course_search_document(course: Course) -> str:
@@ -101,17 +119,21 @@ def refresh_course_search_index(course_id: int) -> bool:
         .first()
     )
     if not course:
+        update_course_suggestions(course_id)
         return False
 
     document = build_course_search_document(course)
     try:
-        CourseSearchIndex.objects.update_or_create(
+        row, _ = CourseSearchIndex.objects.update_or_create(
             course_id=course_id,
             defaults={"document": document},
         )
     except IntegrityError:
         # Course vanished during delete cascade
         return False
+    record_search_lexemes(SearchLexeme.SCOPE_COURSE, [row.id])
+    bump_search_generation(INDEX_COURSE)
+    update_course_suggestions(course_id)
     return True
 
 
@@ -140,29 +162,59 @@ def refresh_file_related_course_indexes(file_id: int) -> int:
     return updated
 
 
+def rebuild_course_search_batch(course_ids: list[int]) -> dict[str, int]:
+    """
+    Rebuild the index rows for one batch of courses with a single upsert.
+    """
+    courses = list(
+        Course.objects.select_related("subject")
+        .prefetch_related("modules")
+        .filter(id__in=course_ids)
+    )
+    if not courses:
+        return {"processed": 0, "created": 0, "updated": 0}
+
+    ids = [course.id for course in courses]
+    existing = set(
+        CourseSearchIndex.objects.filter(course_id__in=ids).values_list("course_id", flat=True)
+    )
+    CourseSearchIndex.objects.bulk_create(
+        [
+            CourseSearchIndex(course=course, document=build_course_search_document(course))
+            for course in courses
+        ],
+        update_conflicts=True,
+        unique_fields=["course"],
+        update_fields=["document", "updated"],
+    )
+    record_search_lexemes(
+        SearchLexeme.SCOPE_COURSE,
+        list(CourseSearchIndex.objects.filter(course_id__in=ids).values_list("id", flat=True)),
+    )
+    bump_search_generation(INDEX_COURSE)
+    for course_id in ids:
+        update_course_suggestions(course_id)
+
+    return {
+        "processed": len(ids),
+        "created": len(ids) - len(existing),
+        "updated": len(existing),
+    }
+
+
 def rebuild_course_search_index(course_ids: list[int] | None = None) -> dict[str, int]:
-    queryset = Course.objects.select_related("subject").prefetch_related("modules")
+    queryset = Course.objects.all()
     if course_ids:
         queryset = queryset.filter(id__in=course_ids)
 
-    created = 0
-    updated = 0
-    processed = 0
-
-    for course in queryset:
-        processed += 1
-        _, row_created = CourseSearchIndex.objects.update_or_create(
-            course_id=course.id,
-            defaults={
-                "document": build_course_search_document(course),
-            },
-        )
-        if row_created:
-            created += 1
-        else:
-            updated += 1
-
-    return {"processed": processed, "created": created, "updated": updated}
+    totals = {"processed": 0, "created": 0, "updated": 0}
+    for batch in iter_id_batches(queryset):
+        # One short transaction per batch keeps row locks brief.
+        with transaction.atomic():
+            result = rebuild_course_search_batch(batch)
+        for key in totals:
+            totals[key] += result[key]
+    return totals
 
 
 def search_courses(queryset, query: str):
@@ -171,12 +223,6 @@ def search_courses(queryset, query: str):
         return queryset
 
     query_text = _unaccent_text(normalized_query)
-    document = Coalesce(F("search_index__document"), Value(""), output_field=TextField())
-    unaccented_document = Func(
-        document,
-        function="immutable_unaccent",
-        output_field=TextField(),
-    )
 
     unaccented_title = Func(
         F("title"),
@@ -190,19 +236,29 @@ def search_courses(queryset, query: str):
     )
 
     search_query = SearchQuery(query_text, config="simple", search_type="websearch")
-    search_vector = SearchVector(unaccented_document, config="simple")
-    search_rank = SearchRank(search_vector, search_query)
+    # Typos are matched through the lexicon instead of trigram scans of whole documents.
+    fuzzy_query = build_fuzzy_search_query(SearchLexeme.SCOPE_COURSE, query_text)
+    # Rank against the stored tsvector; courses without an index row rank 0.
+    search_rank = Coalesce(
+        SearchRank(F("search_index__search_vector"), search_query),
+        Value(0.0),
+        output_field=FloatField(),
+    )
+    fuzzy_rank = Coalesce(
+        SearchRank(F("search_index__search_vector"), fuzzy_query),
+        Value(0.0),
+        output_field=FloatField(),
+    )
 
-    trigram_document = TrigramSimilarity(unaccented_document, Value(query_text))
     trigram_title = TrigramSimilarity(unaccented_title, Value(query_text))
     trigram_subject = TrigramSimilarity(unaccented_subject, Value(query_text))
 
-    trigram_score = Greatest(trigram_title, trigram_subject, trigram_document)
+    trigram_score = Greatest(trigram_title, trigram_subject)
     combined_score = ExpressionWrapper(
         (search_rank * Value(2.2))
         + (trigram_title * Value(1.2))
         + (trigram_subject * Value(0.7))
-        + (trigram_document * Value(1.0)),
+        + (fuzzy_rank * Value(1.0)),
         output_field=FloatField(),
     )
 
@@ -210,7 +266,7 @@ def search_courses(queryset, query: str):
         queryset.select_related("subject")
         .annotate(
             search_rank=search_rank,
-            trigram_document=trigram_document,
+            fuzzy_rank=fuzzy_rank,
             trigram_title=trigram_title,
             trigram_subject=trigram_subject,
             trigram_score=trigram_score,
@@ -218,6 +274,7 @@ def search_courses(queryset, query: str):
         )
         .filter(
             Q(search_rank__gte=RANK_THRESHOLD)
+            | Q(fuzzy_rank__gte=RANK_THRESHOLD)
             | Q(trigram_score__gte=SIMILARITY_THRESHOLD)
         )
         .order_by("-combined_score", "-created")
@@ -238,46 +295,41 @@ def _content_item_title(item) -> str:
     return getattr(item, "title", "") or ""
 
 
-def refresh_content_search_entries_for_content(
-    content: Content,
-    item=None,
-    page_texts: list[str] | None = None,
-) -> int:
-    if item is None:
-        item = content.item
+def _pdf_page_texts(item: File) -> Iterator[str]:
+    cached = get_cached_pdf_index_data(item.content_sha256)
+    if cached is not None:
+        yield from cached.page_texts
+        return
+    try:
+        yield from iter_pdf_page_texts(item)
+    except Exception:
+        # Unreadable PDFs keep whatever pages were read plus the title entry.
+        return
 
-    # If the item no longer exists, drop entries.
-    if not item:
-        return ContentSearchEntry.objects.filter(content_id=content.id).delete()[0]
 
+def _iter_content_entry_rows(content: Content, item, page_texts: Iterable[str] | None):
     kind = content.content_type.model
     module = content.module
     course = module.course
     item_title = _content_item_title(item)
 
-    # Remove existing entries first to avoid stale rows.
-    ContentSearchEntry.objects.filter(content_id=content.id).delete()
-
-    rows: list[ContentSearchEntry] = []
+    def entry(document: str, page_number: int | None = None) -> ContentSearchEntry:
+        return ContentSearchEntry(
+            content=content,
+            course=course,
+            module=module,
+            kind=kind,
+            item_title=item_title,
+            document=document,
+            page_number=page_number,
+        )
 
     if isinstance(item, Text):
-        document = _build_content_document(item_title, item.content)
-        rows.append(
-            ContentSearchEntry(
-                content=content,
-                course=course,
-                module=module,
-                kind=kind,
-                item_title=item_title,
-                document=document,
-            )
-        )
+        yield entry(_build_content_document(item_title, item.content))
     elif isinstance(item, File) and _is_pdf_file(item):
         if page_texts is None:
-            result = extract_pdf_index_data(item)
-            page_texts = result.page_texts
-        if page_texts is None:
-            page_texts = []
+            page_texts = _pdf_page_texts(item)
+        emitted = False
         for idx, page_text in enumerate(page_texts, start=1):
             # Skip empty pages except for the first page so title-only searches still resolve.
             if not page_text and idx != 1:
@@ -288,48 +340,133 @@ def refresh_content_search_entries_for_content(
                 document = _normalize_whitespace(page_text)
             if not document:
                 continue
-            rows.append(
-                ContentSearchEntry(
-                    content=content,
-                    course=course,
-                    module=module,
-                    kind=kind,
-                    item_title=item_title,
-                    document=document,
-                    page_number=idx,
-                )
-            )
-        if not rows and item_title:
-            rows.append(
-                ContentSearchEntry(
-                    content=content,
-                    course=course,
-                    module=module,
-                    kind=kind,
-                    item_title=item_title,
-                    document=_normalize_whitespace(item_title),
-                    page_number=1,
-                )
-            )
+            emitted = True
+            yield entry(document, idx)
+        if not emitted and item_title:
+            yield entry(_normalize_whitespace(item_title), 1)
     else:
         document = _build_content_document(item_title, "")
         if document:
-            rows.append(
-                ContentSearchEntry(
-                    content=content,
-                    course=course,
-                    module=module,
-                    kind=kind,
-                    item_title=item_title,
-                    document=document,
-                )
-            )
-
-    if not rows:
-        return 0
+            yield entry(document)
+
+
+def refresh_content_search_entries_for_content(
+    content: Content,
+    item=None,
+    page_texts: Iterable[str] | None = None,
+) -> int:
+    """
+    Re-index one content item. PDF pages are streamed from `page_texts`, the
+    extraction cache or the file itself and written in bounded batches.
+    """
+    if item is None:
+        item = content.item
+
+    # If the item no longer exists, drop entries.
+    if not item:
+        update_content_suggestions(content.id)
+        return ContentSearchEntry.objects.filter(content_id=content.id).delete()[0]
+
+    update_content_suggestions(content.id, _content_item_title(item), content.module.course_id)
+    result = sync_content_search_entries(
+        content.id,
+        _iter_content_entry_rows(content, item, page_texts),
+    )
+    return result["rows"]
+
 
-    ContentSearchEntry.objects.bulk_create(rows, batch_size=200)
-    return len(rows)
+def content_document_hash(document: str) -> str:
+    # Matches encode(sha256(convert_to(document, 'UTF8')), 'hex') used by the backfill migration.
+    return hashlib.sha256((document or "").encode("utf-8")).hexdigest()
+
+
+def _write_content_entry_batch(existing: dict[int | None, tuple], rows: list[ContentSearchEntry]) -> tuple[int, int]:
+    to_create: list[ContentSearchEntry] = []
+    to_update: list[ContentSearchEntry] = []
+    now = timezone.now()
+    for row in rows:
+        current = existing.get(row.page_number)
+        if current is None:
+            to_create.append(row)
+            continue
+        if current[2:] != (row.document_hash, row.course_id, row.module_id, row.kind, row.item_title):
+            row.id = current[0]
+            row.updated = now
+            to_update.append(row)
+
+    if to_update:
+        ContentSearchEntry.objects.bulk_update(
+            to_update,
+            ["course", "module", "kind", "item_title", "document", "document_hash", "updated"],
+            batch_size=200,
+        )
+    if to_create:
+        # A concurrent refresh of the same content may have inserted the page meanwhile.
+        ContentSearchEntry.objects.bulk_create(
+            to_create,
+            batch_size=200,
+            update_conflicts=True,
+            unique_fields=["content", "page_number"],
+            update_fields=["course", "module", "kind", "item_title", "document", "document_hash", "updated"],
+        )
+
+    written_ids = [row.id for row in to_create + to_update if row.id]
+    if written_ids:
+        record_search_lexemes(SearchLexeme.SCOPE_CONTENT, written_ids)
+    return len(to_create), len(to_update)
+
+
+def sync_content_search_entries(
+    content_id: int,
+    rows: Iterable[ContentSearchEntry],
+    buffer_chars: int | None = None,
+) -> dict[str, int]:
+    """
+    Make the stored entries of one content match `rows`, keyed by page number.
+
+    Only rows whose document hash or placement changed are written, so
+    re-saving an unchanged 60-page PDF touches no index rows at all. `rows`
+    may be a generator: at most `buffer_chars` (PDF_INDEX_BUFFER_CHARS by
+    default) of documents are held before a batch is written.
+    """
+    buffer_chars = buffer_chars or PDF_INDEX_BUFFER_CHARS
+    existing: dict[int | None, tuple] = {}
+    duplicate_ids: list[int] = []
+    for values in ContentSearchEntry.objects.filter(content_id=content_id).order_by("id").values_list(
+        "id", "page_number", "document_hash", "course_id", "module_id", "kind", "item_title"
+    ):
+        if values[1] in existing:
+            duplicate_ids.append(values[0])
+        else:
+            existing[values[1]] = values
+
+    seen: set[int | None] = set()
+    batch: list[ContentSearchEntry] = []
+    batch_chars = 0
+    created = updated = 0
+    for row in rows:
+        row.document_hash = content_document_hash(row.document)
+        if row.page_number in seen:
+            continue
+        seen.add(row.page_number)
+        batch.append(row)
+        batch_chars += len(row.document)
+        if batch_chars >= buffer_chars:
+            batch_created, batch_updated = _write_content_entry_batch(existing, batch)
+            created += batch_created
+            updated += batch_updated
+            batch, batch_chars = [], 0
+    if batch:
+        batch_created, batch_updated = _write_content_entry_batch(existing, batch)
+        created += batch_created
+        updated += batch_updated
+
+    stale_ids = duplicate_ids + [
+        values[0] for page_number, values in existing.items() if page_number not in seen
+    ]
+    if stale_ids:
+        ContentSearchEntry.objects.filter(id__in=stale_ids).delete()
+    return {"created": created, "updated": updated, "deleted": len(stale_ids), "rows": len(seen)}
 
 
 def refresh_content_search_entries_for_item(item, page_texts: list[str] | None = None) -> int:
@@ -356,51 +493,106 @@ def refresh_content_search_entries_for_file(file_id: int, page_texts: list[str]
     return refresh_content_search_entries_for_item(file_obj, page_texts=page_texts)
 
 
-def rebuild_content_search_index(content_ids: list[int] | None = None) -> dict[str, int]:
-    queryset = Content.objects.select_related("module", "module__course", "content_type")
-    if content_ids:
-        queryset = queryset.filter(id__in=content_ids)
-
+def rebuild_content_search_batch(content_ids: list[int]) -> dict[str, int]:
+    contents = (
+        Content.objects.filter(id__in=content_ids)
+        .select_related("module", "module__course", "content_type")
+        .prefetch_related("item")
+    )
     created = 0
     processed = 0
+    for content in contents:
+        processed += 1
+        created += refresh_content_search_entries_for_content(content, item=content.item)
+    return {"processed": processed, "created": created}
 
-    with transaction.atomic():
-        for content in queryset.iterator():
-            processed += 1
-            created += refresh_content_search_entries_for_content(content)
 
-    return {"processed": processed, "created": created}
+def rebuild_content_search_index(content_ids: list[int] | None = None) -> dict[str, int]:
+    queryset = Content.objects.all()
+    if content_ids:
+        queryset = queryset.filter(id__in=content_ids)
 
+    totals = {"processed": 0, "created": 0}
+    for batch in iter_id_batches(queryset):
+        with transaction.atomic():
+            result = rebuild_content_search_batch(batch)
+        for key in totals:
+            totals[key] += result[key]
+    return totals
 
-def search_content_entries(queryset, query: str):
+
+def _content_search_query(query: str):
     normalized_query = _normalize_whitespace(query)
     if not normalized_query:
-        return queryset.none()
-
+        return "", None, None
     query_text = _unaccent_text(normalized_query)
-    document = Coalesce(F("document"), Value(""), output_field=TextField())
-    unaccented_document = Func(
-        document,
-        function="immutable_unaccent",
-        output_field=TextField(),
-    )
-
     search_query = SearchQuery(query_text, config="simple", search_type="websearch")
-    search_vector = SearchVector(unaccented_document, config="simple")
-    search_rank = SearchRank(search_vector, search_query)
+    fuzzy_query = build_fuzzy_search_query(SearchLexeme.SCOPE_CONTENT, query_text)
+    return query_text, search_query, fuzzy_query
+
+
+def search_content_entries(queryset, query: str, candidate_limit: int = CONTENT_CANDIDATE_LIMIT):
+    """
+    Rank content entries matching `query`.
+
+    Phase one pulls a bounded set of the most recently updated matches from
+    the tsvector GIN index using the lexicon-expanded query; only those are
+    ranked, and snippets are left to `add_content_snippets` so they are
+    built for the final page only.
+    """
+    _, search_query, fuzzy_query = _content_search_query(query)
+    if search_query is None:
+        return queryset.none()
 
-    trigram_document = TrigramSimilarity(unaccented_document, Value(query_text))
-    trigram_score = trigram_document
+    search_rank = SearchRank(F("search_vector"), search_query)
+    fuzzy_rank = SearchRank(F("search_vector"), fuzzy_query)
 
     combined_score = ExpressionWrapper(
-        (search_rank * Value(2.2)) + (trigram_document * Value(1.0)),
+        (search_rank * Value(2.2)) + (fuzzy_rank * Value(1.0)),
         output_field=FloatField(),
     )
 
+    # Phase one: the GIN index finds the matches and a match-only LIMIT,
+    # newest first, bounds them without scoring. Phase two computes ts_rank
+    # for those candidates only, so ranking cost never grows with the number
+    # of matching rows.
+    candidates = (
+        queryset.filter(search_vector=fuzzy_query)
+        .order_by("-updated", "-id")
+        .values("id")[:candidate_limit]
+    )
+
+    return (
+        queryset.filter(id__in=candidates)
+        .annotate(
+            search_rank=search_rank,
+            fuzzy_rank=fuzzy_rank,
+            combined_score=combined_score,
+        )
+        .filter(
+            Q(search_rank__gte=CONTENT_RANK_THRESHOLD)
+            | Q(fuzzy_rank__gte=CONTENT_RANK_THRESHOLD)
+        )
+        .order_by("-combined_score", "-updated")
+    )
+
+
+def add_content_snippets(entries, query: str):
+    """
+    Phase three: build highlighted snippets for an already-sliced result page.
+    """
+    entries = list(entries)
+    if not entries:
+        return entries
+    _, search_query, fuzzy_query = _content_search_query(query)
+    if search_query is None:
+        return entries
+
+    document = Coalesce(F("document"), Value(""), output_field=TextField())
     if SearchHeadline:
         headline = SearchHeadline(
             document,
-            search_query,
+            fuzzy_query,
             config="simple",
             start_sel="<mark class=\"search-highlight\">",
             stop_sel="</mark>",
@@ -412,17 +604,11 @@ def search_content_entries(queryset, query: str):
     else:
         headline = Substr(document, 1, 180)
 
-    return (
-        queryset.annotate(
-            search_rank=search_rank,
-            trigram_document=trigram_document,
-            trigram_score=trigram_score,
-            combined_score=combined_score,
-            snippet=headline,
-        )
-        .filter(
-            Q(search_rank__gte=CONTENT_RANK_THRESHOLD)
-            | Q(trigram_score__gte=CONTENT_SIMILARITY_THRESHOLD)
-        )
-        .order_by("-combined_score", "-updated")
+    snippets = dict(
+        ContentSearchEntry.objects.filter(id__in=[entry.id for entry in entries])
+        .annotate(snippet=headline)
+        .values_list("id", "snippet")
     )
+    for entry in entries:
+        entry.snippet = snippets.get(entry.id, "")
+    return entries
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, FloatField, IntegerField, Value, When
+
+from .models import Course
+
+SEARCH_CACHE_TTL = int(getattr(settings, "SEARCH_CACHE_TTL", 60 * 10))
+SEARCH_CACHE_MAX_RESULTS = int(getattr(settings, "SEARCH_CACHE_MAX_RESULTS", 500))
+
+INDEX_COURSE = "course"
+
+GENERATION_CACHE_KEY = "search:generation:{index}"
+RESULT_CACHE_KEY = "search:results:{index}:{generation}:{digest}"
+
+
+def _generation_cache_key(index: str) -> str:
+    return GENERATION_CACHE_KEY.format(index=index)
+
+
+def get_search_generation(index: str) -> int:
+    key = _generation_cache_key(index)
+    generation = cache.get(key)
+    if generation is None:
+        # Seed from the clock so an evicted counter never reuses an old generation.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+    return int(generation or 0)
+
+
+def _bump_now(index: str) -> None:
+    key = _generation_cache_key(index)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+    except Exception:
+        # Cached results expire on their own TTL if the cache is unreachable.
+        return
+
+
+def bump_search_generation(index: str) -> None:
+    """
+    Invalidate every cached result for `index` once the current transaction commits.
+    """
+    transaction.on_commit(lambda: _bump_now(index))
+
+
+def _result_cache_key(index: str, generation: int, query: str, scope: str) -> str:
+    normalized = " ".join((query or "").lower().split())
+    digest = hashlib.sha1(f"{scope}\x00{normalized}".encode("utf-8")).hexdigest()
+    return RESULT_CACHE_KEY.format(index=index, generation=generation, digest=digest)
+
+
+def _queryset_scope(queryset) -> str | None:
+    """
+    Cache scope for a caller's queryset, or None when it is the whole catalog.
+
+    Filtered querysets (enrolled courses, exclusions, ...) are ranked on
+    their own, keyed by their SQL, so the result cap applies inside the
+    scope instead of dropping matches ranked lower catalog-wide.
+    """
+    if queryset is None or not queryset.query.where:
+        return None
+    sql, params = queryset.values("pk").query.sql_with_params()
+    return "qs:" + hashlib.sha1(f"{sql}\x00{params!r}".encode("utf-8")).hexdigest()
+
+
+def _ranked_course_ids(query: str, subject_id: int | None, queryset=None) -> list[tuple[int, float]]:
+    # Imported lazily: the index refresh functions in search.py bump generations here.
+    from .search import search_courses
+
+    base = Course.objects.all()
+    if subject_id:
+        base = base.filter(subject_id=subject_id)
+    if _queryset_scope(queryset):
+        base = base.filter(pk__in=queryset.values("pk"))
+    return [
+        (course_id, float(score or 0.0))
+        for course_id, score in search_courses(base, query).values_list(
+            "id", "combined_score"
+        )[:SEARCH_CACHE_MAX_RESULTS]
+    ]
+
+
+def is_truncated(ranked: list) -> bool:
+    # A full ranking may have more matches below the cap.
+    return len(ranked) >= SEARCH_CACHE_MAX_RESULTS
+
+
+def get_ranked_course_ids(
+    query: str,
+    subject_id: int | None = None,
+    queryset=None,
+) -> list[tuple[int, float]]:
+    """
+    Return `(course_id, combined_score)` pairs for `query`, best first.
+
+    Rankings are cached per normalized query and scope (subject, or the
+    filters of a narrowed `queryset`) under the course index generation, so
+    any index refresh retires them at once. At most SEARCH_CACHE_MAX_RESULTS
+    pairs are kept; see `is_truncated`.
+    """
+    scope = f"subject:{subject_id}" if subject_id else "catalog"
+    queryset_scope = _queryset_scope(queryset)
+    if queryset_scope:
+        scope = f"{scope}:{queryset_scope}"
+    try:
+        key = _result_cache_key(INDEX_COURSE, get_search_generation(INDEX_COURSE), query, scope)
+        cached = cache.get(key)
+    except Exception:
+        return _ranked_course_ids(query, subject_id, queryset)
+    if cached is not None:
+        return [tuple(row) for row in cached]
+
+    ranked = _ranked_course_ids(query, subject_id, queryset)
+    try:
+        cache.set(key, ranked, SEARCH_CACHE_TTL)
+    except Exception:
+        pass
+    return ranked
+
+
+def search_courses_cached(queryset, query: str, subject_id: int | None = None):
+    """
+    Drop-in for `search_courses` that serves rankings from the result cache.
+
+    A `queryset` that narrows the catalog is ranked and cached as its own
+    scope. Rows keep the `combined_score` annotation and ranked order. When
+    the ranking hit SEARCH_CACHE_MAX_RESULTS, the uncached search runs so
+    no match (or page past the cap) goes missing.
+    """
+    if not " ".join((query or "").split()):
+        return queryset
+
+    ranked = get_ranked_course_ids(query, subject_id=subject_id, queryset=queryset)
+    if not ranked:
+        return queryset.none()
+    if is_truncated(ranked):
+        from .search import search_courses
+
+        if subject_id:
+            queryset = queryset.filter(subject_id=subject_id)
+        return search_courses(queryset, query)
+
+    position = Case(
+        *[When(id=course_id, then=Value(idx)) for idx, (course_id, _) in enumerate(ranked)],
+        output_field=IntegerField(),
+    )
+    score = Case(
+        *[When(id=course_id, then=Value(value)) for course_id, value in ranked],
+        output_field=FloatField(),
+    )
+    return (
+        queryset.filter(id__in=[course_id for course_id, _ in ranked])
+        .annotate(search_position=position, combined_score=score)
+        .order_by("search_position")
+    )
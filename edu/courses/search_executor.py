@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PARALLEL = bool(getattr(settings, "SEARCH_PARALLEL", True))
+SEARCH_WORKERS = int(getattr(settings, "SEARCH_WORKERS", 6))
+SEARCH_TIMEOUT_SECONDS = float(getattr(settings, "SEARCH_TIMEOUT_SECONDS", 2.0))
+
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+
+
+def _run_search(fn: Callable[[], Any], timeout_seconds: float) -> Any:
+    # Worker threads own their connections; recycle them like a request would.
+    close_old_connections()
+    try:
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Let PostgreSQL cancel the query instead of leaving it running after we give up.
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SET LOCAL statement_timeout = %s",
+                        [max(1, int(timeout_seconds * 1000))],
+                    )
+            return fn()
+    finally:
+        close_old_connections()
+
+
+def run_searches(
+    searches: dict[str, Callable[[], Any]],
+    timeout: float = SEARCH_TIMEOUT_SECONDS,
+) -> tuple[dict[str, Any], list[str]]:
+    """
+    Run independent searches concurrently, each on its own DB connection.
+
+    Every callable must fully evaluate its results (return a list). Returns
+    `(results, skipped)`: searches that miss the shared deadline or fail are
+    left out of `results` and named in `skipped`, so callers can render
+    partial results.
+    """
+    if not SEARCH_PARALLEL:
+        return {name: fn() for name, fn in searches.items()}, []
+
+    deadline = time.monotonic() + timeout
+    futures = {
+        name: _executor.submit(_run_search, fn, timeout)
+        for name, fn in searches.items()
+    }
+
+    results: dict[str, Any] = {}
+    skipped: list[str] = []
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            logger.warning("Search %s exceeded %.2fs budget", name, timeout)
+            skipped.append(name)
+        except Exception:
+            logger.exception("Search %s failed", name)
+            skipped.append(name)
+    return results, skipped
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, TrigramSimilarity
+from django.db import connection
+
+from notes.models import NoteSearchIndex
+
+from .models import ContentSearchEntry, CourseSearchIndex, SearchLexeme
+
+LEXICON_MIN_WORD_LENGTH = 3
+LEXICON_MAX_WORD_LENGTH = 48
+# Spelling variants folded into each query term; pg_trgm's default 0.3 threshold applies.
+LEXICON_EXPANSIONS_PER_TERM = int(getattr(settings, "SEARCH_LEXICON_EXPANSIONS_PER_TERM", 4))
+LEXICON_MAX_QUERY_TERMS = 8
+
+_WORD_RE = re.compile(r"\w+")
+# websearch_to_tsquery syntax: quoted phrases, `-` negation and the `or` keyword.
+_WEBSEARCH_TOKEN_RE = re.compile(r'-?"[^"]*"?|[^\s"]+')
+
+
+def _lexicon_sources():
+    return {
+        SearchLexeme.SCOPE_COURSE: CourseSearchIndex,
+        SearchLexeme.SCOPE_CONTENT: ContentSearchEntry,
+        SearchLexeme.SCOPE_NOTE: NoteSearchIndex,
+    }
+
+
+def _fold(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text or "")
+    return (normalized.encode("ascii", "ignore").decode("ascii") or text or "").lower()
+
+
+def _query_terms(query_text: str) -> list[str]:
+    terms: list[str] = []
+    for term in _WORD_RE.findall(_fold(query_text)):
+        if term not in terms:
+            terms.append(term)
+    return terms[:LEXICON_MAX_QUERY_TERMS]
+
+
+def _websearch_groups(query_text: str) -> list[list[tuple[str, bool, bool]]]:
+    """
+    Split a query the way websearch_to_tsquery reads it.
+
+    Returns the `or`-separated groups, each a list of
+    `(text, is_phrase, negated)` tokens that must all hold.
+    """
+    groups: list[list[tuple[str, bool, bool]]] = [[]]
+    for token in _WEBSEARCH_TOKEN_RE.findall(_fold(query_text)):
+        negated = token.startswith("-")
+        body = token.lstrip("-")
+        if body == "or" and not negated:
+            groups.append([])
+            continue
+        words = _WORD_RE.findall(body)
+        if body.startswith('"'):
+            if words:
+                groups[-1].append((" ".join(words), True, negated))
+        elif negated:
+            groups[-1].extend((word, False, True) for word in words)
+        else:
+            groups[-1].extend((word, False, False) for word in words)
+    return [group for group in groups if group]
+
+
+def _expandable_terms(groups) -> list[str]:
+    terms: list[str] = []
+    for group in groups:
+        for text, is_phrase, negated in group:
+            if not is_phrase and not negated and text not in terms:
+                terms.append(text)
+    return terms[:LEXICON_MAX_QUERY_TERMS]
+
+
+def record_search_lexemes(scope: str, ids: list[int] | None = None) -> int:
+    """
+    Copy the lexemes of the given index rows into the lexicon.
+
+    Words come straight from the stored `search_vector`, so the lexicon uses
+    exactly the normalization the tsquery will match against. Passing
+    `ids=None` reads the whole index.
+    """
+    source = _lexicon_sources()[scope]
+    if ids is not None:
+        ids = [int(row_id) for row_id in ids if row_id]
+        if not ids:
+            return 0
+
+    table = connection.ops.quote_name(source._meta.db_table)
+    lexeme_table = connection.ops.quote_name(SearchLexeme._meta.db_table)
+    sql = (
+        f"INSERT INTO {lexeme_table} (scope, word) "
+        f"SELECT DISTINCT %s, lexeme "
+        f"FROM {table}, unnest(tsvector_to_array({table}.search_vector)) AS lexeme "
+        f"WHERE char_length(lexeme) BETWEEN %s AND %s"
+    )
+    params: list = [scope, LEXICON_MIN_WORD_LENGTH, LEXICON_MAX_WORD_LENGTH]
+    if ids is not None:
+        sql += f" AND {table}.id = ANY(%s)"
+        params.append(ids)
+    sql += " ON CONFLICT (scope, word) DO NOTHING"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return max(0, cursor.rowcount)
+
+
+def rebuild_search_lexicon(scopes: list[str] | None = None) -> dict[str, int]:
+    """
+    Rebuild lexicon scopes from scratch, dropping words no document uses any more.
+    """
+    result: dict[str, int] = {}
+    for scope in scopes or list(_lexicon_sources()):
+        SearchLexeme.objects.filter(scope=scope).delete()
+        result[scope] = record_search_lexemes(scope)
+    return result
+
+
+def similar_lexemes(scope: str, term: str, limit: int = LEXICON_EXPANSIONS_PER_TERM) -> list[str]:
+    return list(
+        SearchLexeme.objects.filter(scope=scope, word__trigram_similar=term)
+        .annotate(similarity=TrigramSimilarity("word", term))
+        .order_by("-similarity", "word")
+        .values_list("word", flat=True)[:limit]
+    )
+
+
+def expand_query_terms(scope: str, query_text: str) -> dict[str, list[str]]:
+    """
+    Map each query term to itself plus its closest lexicon spellings.
+
+    Only plain required words are expanded; phrases and negated words keep
+    their exact meaning.
+    """
+    expansions: dict[str, list[str]] = {}
+    for term in _expandable_terms(_websearch_groups(query_text)):
+        variants = [term]
+        if len(term) >= LEXICON_MIN_WORD_LENGTH:
+            variants.extend(word for word in similar_lexemes(scope, term) if word != term)
+        expansions[term] = variants
+    return expansions
+
+
+def build_fuzzy_search_query(scope: str, query_text: str) -> SearchQuery:
+    """
+    Return the websearch query OR'd with a typo-tolerant variant.
+
+    The variant follows the websearch structure: every plain word is
+    satisfied by any of its lexicon spellings, so `advnced databse` matches
+    documents containing `advanced database`, while quoted phrases, `-word`
+    exclusions and `or` groups keep their exact meaning.
+    """
+    exact = SearchQuery(query_text, config="simple", search_type="websearch")
+    expansions = expand_query_terms(scope, query_text)
+    if not any(len(variants) > 1 for variants in expansions.values()):
+        return exact
+
+    group_queries = []
+    for group in _websearch_groups(query_text):
+        token_queries = []
+        for text, is_phrase, negated in group:
+            if is_phrase:
+                query = SearchQuery(text, config="simple", search_type="phrase")
+            else:
+                variants = [text] if negated else expansions.get(text, [text])
+                query = reduce(
+                    or_,
+                    [SearchQuery(word, config="simple", search_type="plain") for word in variants],
+                )
+            token_queries.append(~query if negated else query)
+        group_queries.append(reduce(and_, token_queries))
+    return exact | reduce(or_, group_queries)
+
+
+def suggest_search_query(scope: str, query_text: str) -> str | None:
+    """
+    Suggest a corrected query built from the best lexicon match per term.
+
+    Returns None when every term is already spelled as indexed or has no
+    close match.
+    """
+    terms = _query_terms(query_text)
+    if not terms:
+        return None
+
+    corrected: list[str] = []
+    changed = False
+    for term in terms:
+        best = term
+        if len(term) >= LEXICON_MIN_WORD_LENGTH:
+            matches = similar_lexemes(scope, term, limit=1)
+            if matches:
+                best = matches[0]
+        changed = changed or best != term
+        corrected.append(best)
+    return " ".join(corrected) if changed else None
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+
+from django.db import transaction
+
+from .models import Content, Course, SearchIndexOutbox
+from .search import (
+    refresh_content_search_entries_for_content,
+    refresh_course_search_index,
+)
+
+SEARCH_OUTBOX_BATCH_SIZE = 500
+
+_local = threading.local()
+
+
+class _PendingFlush:
+    """
+    on_commit callback that writes every key marked in one transaction.
+
+    It is registered once per mark, so a rollback that drops earlier
+    registrations never loses the batch; only the first call writes.
+    """
+
+    def __init__(self):
+        self.keys: set[tuple[str, int]] = set()
+        self.done = False
+
+    def __call__(self):
+        if self.done:
+            return
+        self.done = True
+        if not self.keys:
+            return
+        SearchIndexOutbox.objects.bulk_create(
+            [SearchIndexOutbox(kind=kind, object_id=object_id) for kind, object_id in self.keys],
+            ignore_conflicts=True,
+        )
+
+
+def _current_flush() -> _PendingFlush:
+    flush = getattr(_local, "flush", None)
+    if flush is None or flush.done:
+        flush = _local.flush = _PendingFlush()
+    return flush
+
+
+def mark_search_dirty(kind: str, object_id: int | None) -> None:
+    """
+    Record that the search documents derived from (kind, id) are stale.
+
+    Inside a transaction the keys are collected and written once on commit,
+    so a formset touching twenty modules of one course still produces a
+    single outbox row. In autocommit mode the key is written immediately.
+    Keys marked in a rolled-back transaction ride along with the next
+    commit, which only costs a redundant rebuild.
+    """
+    if not object_id:
+        return
+    flush = _current_flush()
+    flush.keys.add((kind, int(object_id)))
+    transaction.on_commit(flush)
+
+
+def mark_course_dirty(course_id: int | None) -> None:
+    mark_search_dirty(SearchIndexOutbox.KIND_COURSE, course_id)
+
+
+def mark_subject_dirty(subject_id: int | None) -> None:
+    mark_search_dirty(SearchIndexOutbox.KIND_SUBJECT, subject_id)
+
+
+def mark_content_dirty(content_id: int | None) -> None:
+    mark_search_dirty(SearchIndexOutbox.KIND_CONTENT, content_id)
+
+
+def claim_search_outbox_keys(limit: int = SEARCH_OUTBOX_BATCH_SIZE) -> list[tuple[str, int]]:
+    """
+    Remove up to `limit` keys from the outbox and return them.
+
+    Rows are deleted before processing, so a write that lands mid-rebuild
+    inserts a fresh key and is picked up by the next drain.
+    """
+    with transaction.atomic():
+        rows = list(
+            SearchIndexOutbox.objects.select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", "kind", "object_id")[: max(1, int(limit or 1))]
+        )
+        if not rows:
+            return []
+        SearchIndexOutbox.objects.filter(id__in=[row[0] for row in rows]).delete()
+    return [(kind, object_id) for _, kind, object_id in rows]
+
+
+def apply_search_outbox_keys(keys: list[tuple[str, int]]) -> dict[str, int]:
+    course_ids: set[int] = set()
+    content_ids: set[int] = set()
+    subject_ids: set[int] = set()
+    for kind, object_id in keys:
+        if kind == SearchIndexOutbox.KIND_COURSE:
+            course_ids.add(object_id)
+        elif kind == SearchIndexOutbox.KIND_SUBJECT:
+            subject_ids.add(object_id)
+        elif kind == SearchIndexOutbox.KIND_CONTENT:
+            content_ids.add(object_id)
+
+    if subject_ids:
+        course_ids.update(
+            Course.objects.filter(subject_id__in=subject_ids).values_list("id", flat=True)
+        )
+
+    contents = 0
+    for content in Content.objects.filter(id__in=content_ids).select_related(
+        "module", "module__course", "content_type"
+    ):
+        refresh_content_search_entries_for_content(content)
+        course_ids.add(content.module.course_id)
+        contents += 1
+
+    courses = 0
+    for course_id in sorted(course_ids):
+        if refresh_course_search_index(course_id):
+            courses += 1
+
+    return {"keys": len(keys), "courses": courses, "contents": contents}
+
+
+def drain_search_index_outbox(limit: int = SEARCH_OUTBOX_BATCH_SIZE) -> dict[str, int]:
+    keys = claim_search_outbox_keys(limit=limit)
+    if not keys:
+        return {"keys": 0, "courses": 0, "contents": 0}
+    try:
+        return apply_search_outbox_keys(keys)
+    except Exception:
+        # Put the batch back so a transient failure does not drop updates.
+        SearchIndexOutbox.objects.bulk_create(
+            [SearchIndexOutbox(kind=kind, object_id=object_id) for kind, object_id in keys],
+            ignore_conflicts=True,
+        )
+        raise
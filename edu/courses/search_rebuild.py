@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Max, Min, Sum
+from django.utils.module_loading import import_string
+
+from .models import SearchRebuildCheckpoint
+
+SEARCH_REBUILD_BATCH_SIZE = int(getattr(settings, "SEARCH_REBUILD_BATCH_SIZE", 200))
+SEARCH_REBUILD_PROGRESS_SECONDS = 5.0
+
+# name -> (source model, batch function taking a list of source ids)
+REBUILD_TARGETS = {
+    "course": ("courses.Course", "courses.search.rebuild_course_search_batch"),
+    "content": ("courses.Content", "courses.search.rebuild_content_search_batch"),
+    "note": ("notes.Note", "notes.search.rebuild_note_search_batch"),
+}
+
+
+def iter_id_batches(queryset, batch_size: int = SEARCH_REBUILD_BATCH_SIZE, after_id: int = 0):
+    """
+    Yield ascending primary-key lists of at most `batch_size` ids.
+
+    Keyset pagination on `id` keeps every step an index range scan, however
+    far into the table the rebuild is.
+    """
+    last_id = after_id
+    while True:
+        ids = list(
+            queryset.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def _target(name: str):
+    model_label, batch_path = REBUILD_TARGETS[name]
+    return apps.get_model(model_label), import_string(batch_path)
+
+
+def plan_rebuild(name: str, workers: int = 1, resume: bool = False) -> list[SearchRebuildCheckpoint]:
+    """
+    Return the unfinished id ranges to process for `name`.
+
+    With `resume`, ranges left by an interrupted run are reused as-is;
+    otherwise old checkpoints are dropped and the id space is split into
+    `workers` contiguous ranges.
+    """
+    checkpoints = SearchRebuildCheckpoint.objects.filter(name=name)
+    if resume and checkpoints.exists():
+        return list(checkpoints.filter(finished=False))
+
+    model, _ = _target(name)
+    bounds = model.objects.aggregate(low=Min("id"), high=Max("id"))
+    with transaction.atomic():
+        checkpoints.delete()
+        if bounds["low"] is None:
+            return []
+
+        low, high = bounds["low"], bounds["high"]
+        step = max(1, -(-(high - low + 1) // max(1, workers)))
+        return [
+            SearchRebuildCheckpoint.objects.create(
+                name=name,
+                range_start=start,
+                range_end=min(high, start + step - 1),
+                last_id=start - 1,
+            )
+            for start in range(low, high + 1, step)
+        ]
+
+
+def _rebuild_checkpoint(
+    checkpoint: SearchRebuildCheckpoint,
+    batch_size: int,
+    on_batch: Callable[[], None] | None = None,
+) -> int:
+    model, rebuild_batch = _target(checkpoint.name)
+    queryset = model.objects.filter(id__lte=checkpoint.range_end)
+
+    processed = 0
+    for batch in iter_id_batches(queryset, batch_size, after_id=checkpoint.last_id):
+        # The batch and its checkpoint commit together, so a crash never skips rows.
+        with transaction.atomic():
+            result = rebuild_batch(batch)
+            processed += result["processed"]
+            checkpoint.last_id = batch[-1]
+            checkpoint.processed += result["processed"]
+            checkpoint.save(update_fields=["last_id", "processed", "updated"])
+        if on_batch is not None:
+            on_batch()
+
+    checkpoint.finished = True
+    checkpoint.save(update_fields=["finished", "updated"])
+    return processed
+
+
+def run_rebuild_range(checkpoint_id: int, batch_size: int = SEARCH_REBUILD_BATCH_SIZE) -> int:
+    """
+    Process entry point: rebuild one checkpointed id range.
+    """
+    checkpoint = SearchRebuildCheckpoint.objects.get(id=checkpoint_id)
+    return _rebuild_checkpoint(checkpoint, batch_size)
+
+
+def _init_worker() -> None:
+    import django
+
+    django.setup()
+    close_old_connections()
+
+
+def _progress_total(name: str) -> int:
+    return SearchRebuildCheckpoint.objects.filter(name=name).aggregate(total=Sum("processed"))["total"] or 0
+
+
+def rebuild_search_index_resumable(
+    name: str,
+    *,
+    workers: int = 1,
+    batch_size: int = SEARCH_REBUILD_BATCH_SIZE,
+    resume: bool = False,
+    progress: Callable[[int, float], None] | None = None,
+) -> dict[str, float]:
+    """
+    Rebuild a whole search index in checkpointed id-range batches.
+
+    Ranges are spread over `workers` processes, each with its own DB
+    connection. `progress(processed, elapsed_seconds)` is called after each
+    batch (single worker) or every few seconds (parallel).
+    """
+    workers = max(1, int(workers or 1))
+    checkpoints = plan_rebuild(name, workers=workers, resume=resume)
+    started_from = _progress_total(name)
+    started = time.monotonic()
+
+    def report():
+        if progress is not None:
+            progress(_progress_total(name) - started_from, time.monotonic() - started)
+
+    if workers == 1 or len(checkpoints) <= 1:
+        for checkpoint in checkpoints:
+            _rebuild_checkpoint(checkpoint, batch_size, on_batch=report)
+    else:
+        # Children must open their own connections, not inherit the parent's sockets.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(checkpoints)),
+            initializer=_init_worker,
+        ) as executor:
+            pending = {
+                executor.submit(run_rebuild_range, checkpoint.id, batch_size)
+                for checkpoint in checkpoints
+            }
+            while pending:
+                done, pending = wait(
+                    pending,
+                    timeout=SEARCH_REBUILD_PROGRESS_SECONDS,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    future.result()
+                report()
+
+    elapsed = time.monotonic() - started
+    processed = _progress_total(name) - started_from
+    return {
+        "processed": processed,
+        "seconds": elapsed,
+        "rows_per_sec": processed / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def add_rebuild_arguments(parser) -> None:
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Split the id space across this many worker processes.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=SEARCH_REBUILD_BATCH_SIZE,
+        help="Rows rebuilt per short transaction.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the unfinished ranges of an interrupted rebuild.",
+    )
+
+
+def run_rebuild_command(command, name: str, label: str, options) -> None:
+    """
+    Shared handler for the rebuild_* management commands.
+    """
+
+    def progress(processed: int, elapsed: float) -> None:
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        command.stdout.write(f"{label}: processed={processed} ({rate:.1f} rows/s)")
+
+    result = rebuild_search_index_resumable(
+        name,
+        workers=options.get("workers") or 1,
+        batch_size=max(1, int(options.get("batch_size") or SEARCH_REBUILD_BATCH_SIZE)),
+        resume=bool(options.get("resume")),
+        progress=progress,
+    )
+    command.stdout.write(
+        command.style.SUCCESS(
+            (
+                f"{label} rebuilt: "
+                f"processed={result['processed']}, "
+                f"seconds={result['seconds']:.1f}, "
+                f"rows_per_sec={result['rows_per_sec']:.1f}"
+            )
+        )
+    )
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import unicodedata
+from typing import Iterable
+
+from django.conf import settings
+
+from .models import ContentSearchEntry, Course, Module, Subject
+
+SUGGEST_INDEX_KEY = "search:suggest"
+SUGGEST_OWNER_KEY = "search:suggest:owner:{kind}:{object_id}"
+SUGGEST_LIMIT = int(getattr(settings, "SEARCH_SUGGEST_LIMIT", 8))
+SUGGEST_MIN_PREFIX = 2
+SUGGEST_MAX_TITLE_WORDS = 12
+# Lookups read at most this many ZRANGEBYLEX pages looking for visible titles.
+SUGGEST_MAX_PAGES = 4
+
+KIND_COURSE = "course"
+KIND_SUBJECT = "subject"
+KIND_MODULE = "module"
+KIND_CONTENT = "content"
+# Courses first, then the broader and narrower things that lead to them.
+KIND_PRIORITY = {KIND_COURSE: 0, KIND_SUBJECT: 1, KIND_MODULE: 2, KIND_CONTENT: 3}
+
+_SEPARATOR = "\x01"
+
+
+def _redis():
+    """
+    Return the raw Redis client behind the default cache, or None.
+
+    The prefix index needs sorted-set commands, so it is disabled when the
+    cache backend is not django-redis (tests, local memory cache).
+    """
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+    except Exception:
+        return None
+
+
+def normalize_suggest_text(value: str) -> str:
+    normalized = unicodedata.normalize("NFKD", value or "")
+    ascii_text = normalized.encode("ascii", "ignore").decode("ascii") or value or ""
+    return " ".join(ascii_text.lower().split())
+
+
+def _title_members(kind: str, object_id: int, title: str, course_id: int | None = None) -> list[str]:
+    """
+    One member per word start, so "Advanced Databases" answers both "adv"
+    and "data". The display title rides along after the key.
+
+    Content members carry their course id so lookups can hide titles from
+    courses the user has not joined.
+    """
+    display = " ".join((title or "").split())
+    words = normalize_suggest_text(display).split()[:SUGGEST_MAX_TITLE_WORDS]
+    scope = str(course_id) if course_id is not None else ""
+    members = []
+    for idx in range(len(words)):
+        key = " ".join(words[idx:])
+        members.append(_SEPARATOR.join([key, kind, str(object_id), scope, display]))
+    return members
+
+
+def _replace_owner_members(client, owner_kind: str, owner_id: int, members: list[str]) -> None:
+    owner_key = SUGGEST_OWNER_KEY.format(kind=owner_kind, object_id=owner_id)
+    previous = {
+        member.decode("utf-8") if isinstance(member, bytes) else member
+        for member in client.smembers(owner_key)
+    }
+    current = set(members)
+
+    pipe = client.pipeline()
+    stale = previous - current
+    if stale:
+        pipe.zrem(SUGGEST_INDEX_KEY, *stale)
+    if current:
+        pipe.zadd(SUGGEST_INDEX_KEY, {member: 0 for member in current})
+        pipe.delete(owner_key)
+        pipe.sadd(owner_key, *current)
+    else:
+        pipe.delete(owner_key)
+    pipe.execute()
+
+
+def update_course_suggestions(course_id: int) -> None:
+    """
+    Refresh the course title, its module titles and its subject title.
+    """
+    client = _redis()
+    if client is None:
+        return
+    try:
+        _update_course_suggestions(client, course_id)
+    except Exception:
+        # Suggestions are best effort; rebuild_search_suggestions repairs drift.
+        return
+
+
+def _update_course_suggestions(client, course_id: int) -> None:
+    course = Course.objects.select_related("subject").filter(id=course_id).first()
+    if course is None:
+        _replace_owner_members(client, KIND_COURSE, course_id, [])
+        return
+
+    members = _title_members(KIND_COURSE, course.id, course.title)
+    for module_id, module_title in Module.objects.filter(course_id=course.id).values_list("id", "title"):
+        members.extend(_title_members(KIND_MODULE, module_id, module_title))
+    _replace_owner_members(client, KIND_COURSE, course.id, members)
+
+    if course.subject_id:
+        _replace_owner_members(
+            client,
+            KIND_SUBJECT,
+            course.subject_id,
+            _title_members(KIND_SUBJECT, course.subject_id, course.subject.title),
+        )
+
+
+def update_content_suggestions(
+    content_id: int,
+    item_title: str = "",
+    course_id: int | None = None,
+) -> None:
+    client = _redis()
+    if client is None:
+        return
+    try:
+        _replace_owner_members(
+            client,
+            KIND_CONTENT,
+            content_id,
+            _title_members(KIND_CONTENT, content_id, item_title, course_id) if item_title else [],
+        )
+    except Exception:
+        return
+
+
+def remove_suggestions(kind: str, object_id: int) -> None:
+    """
+    Drop every member owned by a deleted course or subject.
+    """
+    client = _redis()
+    if client is None:
+        return
+    try:
+        _replace_owner_members(client, kind, object_id, [])
+    except Exception:
+        return
+
+
+def rebuild_search_suggestions() -> dict[str, int]:
+    """
+    Rebuild the whole prefix index from the catalog and search index tables.
+    """
+    client = _redis()
+    if client is None:
+        return {"members": 0}
+
+    owner_keys = list(client.scan_iter(match=SUGGEST_OWNER_KEY.format(kind="*", object_id="*")))
+    pipe = client.pipeline()
+    pipe.delete(SUGGEST_INDEX_KEY)
+    if owner_keys:
+        pipe.delete(*owner_keys)
+    pipe.execute()
+
+    owners: dict[tuple[str, int], list[str]] = {}
+    for course_id, title in Course.objects.values_list("id", "title"):
+        owners[(KIND_COURSE, course_id)] = _title_members(KIND_COURSE, course_id, title)
+    for module_id, course_id, title in Module.objects.values_list("id", "course_id", "title"):
+        members = owners.setdefault((KIND_COURSE, course_id), [])
+        members.extend(_title_members(KIND_MODULE, module_id, title))
+    for subject_id, title in Subject.objects.values_list("id", "title"):
+        owners[(KIND_SUBJECT, subject_id)] = _title_members(KIND_SUBJECT, subject_id, title)
+    for content_id, course_id, item_title in (
+        ContentSearchEntry.objects.exclude(item_title="")
+        .values_list("content_id", "course_id", "item_title")
+        .distinct()
+    ):
+        owners[(KIND_CONTENT, content_id)] = _title_members(KIND_CONTENT, content_id, item_title, course_id)
+
+    total = 0
+    for (kind, object_id), members in owners.items():
+        if members:
+            _replace_owner_members(client, kind, object_id, members)
+            total += len(set(members))
+    return {"members": total}
+
+
+def get_search_suggestions(
+    prefix: str,
+    limit: int = SUGGEST_LIMIT,
+    course_ids: Iterable[int] = (),
+) -> list[dict[str, str]]:
+    """
+    Return up to `limit` distinct titles whose words start with `prefix`.
+
+    ZRANGEBYLEX pages through the sorted set. Content titles are only
+    suggested from `course_ids`, the courses the user has joined, as on the
+    search results page; hidden members are skipped and the next page read.
+    """
+    normalized = normalize_suggest_text(prefix)
+    if len(normalized) < SUGGEST_MIN_PREFIX:
+        return []
+    client = _redis()
+    if client is None:
+        return []
+    visible_courses = {str(course_id) for course_id in course_ids}
+
+    batch = limit * 4
+    candidates = []
+    for start in range(0, batch * SUGGEST_MAX_PAGES, batch):
+        try:
+            raw = client.zrangebylex(
+                SUGGEST_INDEX_KEY,
+                f"[{normalized}".encode("utf-8"),
+                f"[{normalized}".encode("utf-8") + b"\xff",
+                start=start,
+                num=batch,
+            )
+        except Exception:
+            return []
+
+        for member in raw:
+            if isinstance(member, bytes):
+                member = member.decode("utf-8")
+            parts = member.split(_SEPARATOR, 4)
+            if len(parts) != 5:
+                continue
+            key, kind, _, scope, display = parts
+            if kind == KIND_CONTENT and scope not in visible_courses:
+                continue
+            # Whole-title matches beat mid-title word matches.
+            starts_title = normalize_suggest_text(display) == key
+            candidates.append((not starts_title, KIND_PRIORITY.get(kind, 9), len(display), display, kind))
+        if len(raw) < batch or len(candidates) >= batch:
+            break
+
+    suggestions: list[dict[str, str]] = []
+    seen: set[str] = set()
+    for _, _, _, display, kind in sorted(candidates):
+        folded = display.lower()
+        if folded in seen:
+            continue
+        seen.add(folded)
+        suggestions.append({"text": display, "kind": kind})
+        if len(suggestions) >= limit:
+            break
+    return suggestions
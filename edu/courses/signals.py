@@ -1,30 +1,38 @@
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
+from .catalog import bump_catalog_version, bump_course_version, bump_enrollment_version
 from .models import Content, Course, File, Module, Subject, Text, Video, Image, ContentSearchEntry
-from .pdf_indexing import update_pdf_index_for_file
-from .search import (
-    refresh_content_search_entries_for_content,
-    refresh_content_search_entries_for_file,
-    refresh_content_search_entries_for_item,
-    refresh_course_search_index,
-    refresh_file_related_course_indexes,
-    refresh_subject_course_indexes,
+from .pdf_indexing import (
+    _is_pdf_path,
+    compute_file_sha256,
+    get_cached_pdf_index_data,
+    update_pdf_index_for_file,
+    update_pdf_index_from_cache,
+)
+from .pdf_jobs import enqueue_pdf_index_job
+from .render_cache import store_rendered_html
+from .search_outbox import mark_content_dirty, mark_course_dirty, mark_subject_dirty
+from .search_suggest import (
+    KIND_COURSE,
+    KIND_SUBJECT,
+    remove_suggestions,
+    update_content_suggestions,
 )
 
-def _safe_refresh_course_index(course_id):
-    if not course_id:
-        return
-
-    def _refresh():
-        if Course.objects.filter(id=course_id).exists():
-            refresh_course_search_index(course_id)
-
-    transaction.on_commit(_refresh)
 
+def _mark_item_contents_dirty(item):
+    ct = ContentType.objects.get_for_model(item)
+    rows = Content.objects.filter(content_type=ct, object_id=item.id).values_list(
+        "id", "module__course_id"
+    )
+    for content_id, course_id in rows:
+        mark_content_dirty(content_id)
+        mark_course_dirty(course_id)
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -33,48 +41,136 @@ def create_auth_token(sender, instance, created, **kwargs):
         Token.objects.get_or_create(user=instance)
 
 
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def refresh_catalog_snapshot(sender, instance, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def refresh_course_version(sender, instance, **kwargs):
+    # Per-course API ETags; module titles are part of the course representation.
+    bump_course_version(instance.id if sender is Course else instance.course_id)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def refresh_enrollment_version(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_enrollment_version()
+
+
+def _instructor_name(user):
+    # Read from __dict__ so a deferred name is never fetched just to compare.
+    return (user.__dict__.get("first_name"), user.__dict__.get("last_name"))
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def remember_instructor_name(sender, instance, **kwargs):
+    instance._catalog_name = _instructor_name(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_catalog_for_instructor(sender, instance, created, **kwargs):
+    # Instructor names are the only user data in the snapshot.
+    previous = getattr(instance, "_catalog_name", None)
+    instance._catalog_name = _instructor_name(instance)
+    if created or previous == instance._catalog_name:
+        return
+    if Course.objects.filter(owner_id=instance.id).exists():
+        bump_catalog_version()
+
+
 @receiver(post_save, sender=Course)
 def update_course_search_index(sender, instance, **kwargs):
-    refresh_course_search_index(instance.id)
+    mark_course_dirty(instance.id)
 
 
 @receiver(post_save, sender=Module)
 @receiver(post_delete, sender=Module)
 def update_module_course_search_index(sender, instance, **kwargs):
-    _safe_refresh_course_index(instance.course_id)
+    mark_course_dirty(instance.course_id)
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_suggestions(sender, instance, **kwargs):
+    # Module-less courses never reach the outbox, so nothing else clears them.
+    course_id = instance.id
+    transaction.on_commit(lambda: remove_suggestions(KIND_COURSE, course_id))
+
+
+@receiver(post_delete, sender=Subject)
+def remove_subject_suggestions(sender, instance, **kwargs):
+    subject_id = instance.id
+    transaction.on_commit(lambda: remove_suggestions(KIND_SUBJECT, subject_id))
 
 
 @receiver(post_save, sender=Subject)
 def update_subject_courses_search_indexes(sender, instance, **kwargs):
-    refresh_subject_course_indexes(instance.id)
+    mark_subject_dirty(instance.id)
 
 
 @receiver(post_save, sender=Content)
 def refresh_course_index_for_content_save(sender, instance, **kwargs):
     if instance.module_id:
         course_id = Module.objects.filter(id=instance.module_id).values_list("course_id", flat=True).first()
-        if course_id:
-            refresh_course_search_index(course_id)
-    refresh_content_search_entries_for_content(instance)
+        mark_course_dirty(course_id)
+
+    item = instance.item
+    if isinstance(item, File) and _is_pdf_path(item.file.name):
+        if get_cached_pdf_index_data(item.content_sha256) is None:
+            # Page entries are written by the PDF worker once extraction finishes.
+            enqueue_pdf_index_job(item.id)
+            return
+    mark_content_dirty(instance.id)
 
 
 @receiver(post_delete, sender=Content)
 def refresh_course_index_for_content_delete(sender, instance, **kwargs):
     course_id = Module.objects.filter(id=instance.module_id).values_list("course_id", flat=True).first()
-    _safe_refresh_course_index(course_id)
+    mark_course_dirty(course_id)
     ContentSearchEntry.objects.filter(content_id=instance.id).delete()
+    update_content_suggestions(instance.id)
+
+
+@receiver(pre_save, sender=File)
+def record_file_content_digest(sender, instance, **kwargs):
+    upload = instance.file
+    # Only hash fresh uploads; an untouched FieldFile keeps its stored digest.
+    if upload and not getattr(upload, "_committed", True):
+        instance.content_sha256 = compute_file_sha256(upload)
 
 
 @receiver(post_save, sender=File)
 def update_pdf_index_and_refresh_search(sender, instance, **kwargs):
-    result = update_pdf_index_for_file(instance.id)
-    if result:
-        refresh_content_search_entries_for_file(instance.id, page_texts=result.page_texts)
-    refresh_file_related_course_indexes(instance.id)
+    if _is_pdf_path(instance.file.name):
+        # Same bytes as an earlier extraction: reuse the cached pages.
+        if update_pdf_index_from_cache(instance.id) is None:
+            # Extraction is slow; hand it to the `process_pdf_index_jobs` worker.
+            enqueue_pdf_index_job(instance.id)
+            return
+    else:
+        update_pdf_index_for_file(instance.id)
+    _mark_item_contents_dirty(instance)
 
 
 @receiver(post_save, sender=Text)
 @receiver(post_save, sender=Video)
 @receiver(post_save, sender=Image)
 def refresh_content_entries_for_items(sender, instance, **kwargs):
-    refresh_content_search_entries_for_item(instance)
+    _mark_item_contents_dirty(instance)
+
+
+@receiver(post_save, sender=Text)
+@receiver(post_save, sender=Video)
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=File)
+def cache_rendered_item_html(sender, instance, **kwargs):
+    # Warm the fragment cache so the first reader does not pay for rendering.
+    store_rendered_html(instance)
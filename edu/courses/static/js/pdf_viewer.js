@@ -157,7 +157,14 @@
         async _loadDocument() {
             this._setTotalText("…");
             try {
-                this.loadingTask = this.pdfjsLib.getDocument(this.sourceUrl);
+                // Fetch only the byte ranges the visible pages need instead of
+                // downloading the whole file before the first page renders.
+                this.loadingTask = this.pdfjsLib.getDocument({
+                    url: this.sourceUrl,
+                    disableAutoFetch: true,
+                    disableStream: true,
+                    rangeChunkSize: 256 * 1024,
+                });
                 this.doc = await this.loadingTask.promise;
             } catch (error) {
                 this._setTotalText("error");
@@ -1,83 +1,218 @@
+import io
+import json
+import os
+import tempfile
+import time
 import unittest
+import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest import mock
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import cache
 from django.core.management import call_command
-from django.db import connection
-from django.test import TestCase
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.authtoken.models import Token
 
-from courses.models import Content, Course, CourseSearchIndex, File, Module, Subject
-from courses.search import rebuild_course_search_index, search_courses
+from courses.models import (
+    Content,
+    ContentSearchEntry,
+    Course,
+    CourseSearchIndex,
+    File,
+    FilePdfText,
+    Module,
+    PdfIndexJob,
+    SearchIndexOutbox,
+    SearchLexeme,
+    SearchRebuildCheckpoint,
+    Subject,
+    Text,
+)
+from courses.api.serializers import CourseSerializer, CourseWithContentsSerializer, ModuleSerializer
+from courses.catalog import get_catalog_page, get_catalog_snapshot, get_search_page
+from courses.content_items import attach_content_items
+from courses.course_transfer import CourseArchiveError, export_course, import_course
+from courses.ordering import ORDER_GAP
+from courses import pdf_indexing
+from courses.pdf_indexing import PdfIndexResult
+from courses.pdf_sandbox import PdfSandbox, PdfSandboxError, apply_char_budget
+from courses import search as search_module
+from courses.pdf_jobs import PDF_INDEX_JOB_MAX_ATTEMPTS, process_pdf_index_jobs
+from courses.search import (
+    add_content_snippets,
+    rebuild_course_search_index,
+    refresh_content_search_entries_for_content,
+    refresh_course_search_index,
+    search_content_entries,
+    search_courses,
+)
+from courses.search_cache import search_courses_cached
+from courses.search_executor import run_searches
+from courses.search_lexicon import rebuild_search_lexicon, suggest_search_query
+from courses.search_suggest import get_search_suggestions, rebuild_search_suggestions
+from courses.views import ContentCreateUpdateView
+from courses.search_outbox import drain_search_index_outbox, mark_course_dirty
+from courses.search_rebuild import (
+    plan_rebuild,
+    rebuild_search_index_resumable,
+    run_rebuild_range,
+)
+
+
+def _text_pdf(page_texts):
+    """
+    Build a small PDF with one line of Helvetica text per page.
+    """
+    page_count = len(page_texts)
+    font_id = 3 + 2 * page_count
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % (3 + 2 * idx) for idx in range(page_count)), page_count),
+    ]
+    for idx, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, 4 + 2 * idx)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+class _SortedSetRedis:
+    """
+    The handful of sorted-set and set commands the suggestion index uses,
+    kept in memory so tests do not need a Redis server.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, set()).update(mapping)
+
+    def zrem(self, key, *members):
+        self.data.setdefault(key, set()).difference_update(members)
+
+    def scan_iter(self, match):
+        prefix = match.split("*", 1)[0]
+        return [key for key in list(self.data) if key.startswith(prefix)]
+
+    def zrangebylex(self, key, low, high, start, num):
+        low, high = low[1:], high[1:]
+        members = sorted(member.encode("utf-8") for member in self.data.get(key, ()))
+        return [member for member in members if low <= member <= high][start:start + num]
 
 
 @unittest.skipUnless(
     connection.vendor == "postgresql",
     "PostgreSQL-specific search tests.",
 )
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
 class PostgresCourseSearchTests(TestCase):
     def setUp(self):
-        self.owner = User.objects.create_user(
-            username="owner",
-            password="pass123",
-            email="owner@example.com",
-        )
-        self.db_subject = Subject.objects.create(title="Databases", slug="databases")
-        self.web_subject = Subject.objects.create(title="Web", slug="web")
+        # Generation bumps run on commit, which never happens inside TestCase.
+        cache.clear()
+        # Run the outbox on_commit hooks so later saves start a fresh batch.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner = User.objects.create_user(
+                username="owner",
+                password="pass123",
+                email="owner@example.com",
+            )
+            self.db_subject = Subject.objects.create(title="Databases", slug="databases")
+            self.web_subject = Subject.objects.create(title="Web", slug="web")
 
-        self.title_match_course = Course.objects.create(
-            owner=self.owner,
-            subject=self.db_subject,
-            title="Advanced Databases",
-            slug="advanced-databases",
-            overview="PostgreSQL indexing and performance tuning.",
-        )
-        self.overview_match_course = Course.objects.create(
-            owner=self.owner,
-            subject=self.db_subject,
-            title="Storage Fundamentals",
-            slug="storage-fundamentals",
-            overview="This module covers advanced databases search tactics.",
-        )
-        self.module_match_course = Course.objects.create(
-            owner=self.owner,
-            subject=self.web_subject,
-            title="Web Foundations",
-            slug="web-foundations",
-            overview="Core web architecture and HTTP.",
-        )
+            self.title_match_course = Course.objects.create(
+                owner=self.owner,
+                subject=self.db_subject,
+                title="Advanced Databases",
+                slug="advanced-databases",
+                overview="PostgreSQL indexing and performance tuning.",
+            )
+            self.overview_match_course = Course.objects.create(
+                owner=self.owner,
+                subject=self.db_subject,
+                title="Storage Fundamentals",
+                slug="storage-fundamentals",
+                overview="This module covers advanced databases search tactics.",
+            )
+            self.module_match_course = Course.objects.create(
+                owner=self.owner,
+                subject=self.web_subject,
+                title="Web Foundations",
+                slug="web-foundations",
+                overview="Core web architecture and HTTP.",
+            )
 
-        Module.objects.create(
-            course=self.title_match_course,
-            title="PostgreSQL Search",
-            description="Full-text search and ranking.",
-        )
-        self.refresh_target_module = Module.objects.create(
-            course=self.module_match_course,
-            title="Routing",
-            description="Request lifecycle details.",
-        )
+            Module.objects.create(
+                course=self.title_match_course,
+                title="PostgreSQL Search",
+                description="Full-text search and ranking.",
+            )
+            self.refresh_target_module = Module.objects.create(
+                course=self.module_match_course,
+                title="Routing",
+                description="Request lifecycle details.",
+            )
 
-        pdf_item = File.objects.create(
-            owner=self.owner,
-            title="DB PDF",
-            file=SimpleUploadedFile(
-                "db-notes.pdf",
-                b"%PDF-1.4 fake test pdf",
-                content_type="application/pdf",
-            ),
-        )
-        File.objects.filter(id=pdf_item.id).update(
-            pdf_index_status="indexed",
-            pdf_text_index="vectorized write ahead logging index",
-            pdf_page_count=4,
-        )
-        Content.objects.create(
-            module=self.title_match_course.modules.first(),
-            content_type=ContentType.objects.get_for_model(File),
-            object_id=pdf_item.id,
-        )
+            pdf_item = File.objects.create(
+                owner=self.owner,
+                title="DB PDF",
+                file=SimpleUploadedFile(
+                    "db-notes.pdf",
+                    b"%PDF-1.4 fake test pdf",
+                    content_type="application/pdf",
+                ),
+            )
+            File.objects.filter(id=pdf_item.id).update(
+                pdf_index_status="indexed",
+                pdf_page_count=4,
+            )
+            FilePdfText.objects.create(file=pdf_item, text="vectorized write ahead logging index")
+            Content.objects.create(
+                module=self.title_match_course.modules.first(),
+                content_type=ContentType.objects.get_for_model(File),
+                object_id=pdf_item.id,
+            )
 
         rebuild_course_search_index()
 
@@ -94,6 +229,40 @@ class PostgresCourseSearchTests(TestCase):
             list(qs.values_list("id", flat=True)),
         )
 
+    def test_fuzzy_query_keeps_exclusions_and_phrases(self):
+        excluded = list(
+            search_courses(Course.objects.all(), "advnced -postgresql").values_list("id", flat=True)
+        )
+        self.assertIn(self.overview_match_course.id, excluded)
+        self.assertNotIn(self.title_match_course.id, excluded)
+
+        reordered = search_courses(Course.objects.all(), 'advnced "databases advanced"')
+        self.assertFalse(reordered.exists())
+
+    def test_search_vector_is_generated_by_the_database_on_write(self):
+        index = CourseSearchIndex.objects.get(course=self.module_match_course)
+        self.assertIn("'routing'", index.search_vector)
+
+        index.document = "Crème brûlée replication"
+        index.save()
+        index.refresh_from_db()
+
+        self.assertIn("'creme'", index.search_vector)
+        self.assertIn("'replication'", index.search_vector)
+        self.assertNotIn("'routing'", index.search_vector)
+        self.assertEqual(
+            list(
+                CourseSearchIndex.objects.filter(
+                    search_vector=SearchQuery("replication", config="simple")
+                ).values_list("course_id", flat=True)
+            ),
+            [self.module_match_course.id],
+        )
+        self.assertIn(
+            self.module_match_course.id,
+            list(search_courses(Course.objects.all(), "creme").values_list("id", flat=True)),
+        )
+
     def test_subject_and_query_filter_in_catalog_view(self):
         url = f"{reverse('course_list_subject', args=[self.db_subject.slug])}?q=advanced"
         response = self.client.get(url)
@@ -123,9 +292,194 @@ class PostgresCourseSearchTests(TestCase):
         self.assertEqual(api_response.status_code, 200)
         self.assertIn("results", api_response.json())
 
+    def test_catalog_snapshot_is_cached_and_refreshed_on_change(self):
+        get_catalog_snapshot()
+        get_catalog_page()
+        with self.assertNumQueries(0):
+            snapshot = get_catalog_snapshot()
+            page = get_catalog_page()
+        self.assertEqual(len(snapshot.subjects), Subject.objects.count())
+        self.assertEqual(len(page.courses), Course.objects.count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = Course.objects.create(
+                owner=self.owner,
+                subject=self.db_subject,
+                title="Query Planning",
+                slug="query-planning",
+                overview="Join orders.",
+            )
+        response = self.client.get(reverse("course_list_subject", args=[self.db_subject.slug]))
+        self.assertEqual(response.context["courses"][0].id, fresh.id)
+
+    def test_only_instructor_name_changes_refresh_the_catalog(self):
+        owner = User.objects.get(id=self.owner.id)
+        owner.email = "instructor@example.com"
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks() as callbacks:
+            owner.save()
+        self.assertEqual(callbacks, [])
+
+        get_catalog_page()
+        owner.first_name = "Ada"
+        with self.captureOnCommitCallbacks(execute=True):
+            owner.save()
+        self.assertEqual(get_catalog_page().courses[0].owner_name, "Ada")
+
+    def test_catalog_cursor_survives_inserts(self):
+        expected = list(Course.objects.order_by("-created", "-id").values_list("id", flat=True))
+        first = get_catalog_page(limit=2)
+        self.assertEqual([course.id for course in first.courses], expected[:2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(
+                owner=self.owner,
+                subject=self.db_subject,
+                title="Newer Course",
+                slug="newer-course",
+                overview="Inserted between page loads.",
+            )
+
+        seen = [course.id for course in first.courses]
+        cursor = first.next_cursor
+        while cursor:
+            page = get_catalog_page(cursor=cursor, limit=2)
+            seen.extend(course.id for course in page.courses)
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+
+        response = self.client.get(
+            reverse("course_list_page"),
+            {"cursor": first.next_cursor, "subject": self.db_subject.slug},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("html", response.json())
+        self.assertEqual(self.client.get(reverse("course_list_page"), {"cursor": "bogus"}).status_code, 404)
+
+    def test_api_answers_matching_etag_with_not_modified(self):
+        url = reverse("api:course-detail", args=[self.title_match_course.id])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)
+        etag = first["ETag"]
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Module.objects.create(course=self.title_match_course, title="Vacuum")
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+        subjects_url = reverse("api:subject-list")
+        subjects_etag = self.client.get(subjects_url)["ETag"]
+        self.assertEqual(
+            self.client.get(subjects_url, HTTP_IF_NONE_MATCH=subjects_etag).status_code,
+            304,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.title_match_course.students.add(self.owner)
+        self.assertEqual(
+            self.client.get(subjects_url, HTTP_IF_NONE_MATCH=subjects_etag).status_code,
+            200,
+        )
+
+    def test_subject_api_lists_most_enrolled_courses_in_constant_queries(self):
+        student = User.objects.create_user(username="student", password="pass123")
+        self.overview_match_course.students.add(self.owner, student)
+        self.title_match_course.students.add(student)
+        for idx in range(3):
+            Subject.objects.create(title=f"Extra {idx}", slug=f"extra-{idx}")
+
+        # Page count, page rows and one windowed query for every popular list.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("api:subject-list"))
+        self.assertEqual(response.status_code, 200)
+        subjects = {row["slug"]: row for row in response.json()["results"]}
+        self.assertEqual(
+            subjects["databases"]["popular_courses"],
+            ["Storage Fundamentals (2 Students)", "Advanced Databases (1 Students)"],
+        )
+        self.assertEqual(subjects["extra-0"]["popular_courses"], [])
+
+    def test_contents_api_serves_item_html_from_fragment_cache(self):
+        course = self.title_match_course
+        text = Text.objects.create(owner=self.owner, title="Cached", content="**Bold** body")
+        Content.objects.create(module=course.modules.get(), item=text)
+        course.students.add(self.owner)
+        token = Token.objects.get(user=self.owner)
+
+        with mock.patch("courses.render_cache.render_item_html") as render:
+            response = self.client.get(
+                reverse("api:course-contents", args=[course.id]),
+                HTTP_AUTHORIZATION=f"Token {token.key}",
+            )
+        self.assertEqual(response.status_code, 200)
+        render.assert_not_called()
+        items = [content["item"] for content in response.json()["modules"][0]["contents"]]
+        self.assertIn("<strong>Bold</strong>", items[-1])
+
+        text.content = "Edited body"
+        text.save()
+        self.assertIn("Edited body", text.render())
+
+    def test_module_move_rewrites_one_row_and_reorder_is_one_statement(self):
+        course = self.title_match_course
+        first = course.modules.get()
+        second = Module.objects.create(course=course, title="Second")
+        third = Module.objects.create(course=course, title="Third")
+        self.assertEqual(list(course.modules.all()), [first, second, third])
+
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("module_move"),
+                data={"id": third.id, "prev_id": first.id, "next_id": second.id},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        updates = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(list(course.modules.all()), [first, third, second])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("module_order"),
+                data={str(second.id): 0, str(first.id): 1, str(third.id): 2},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        updates = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(list(course.modules.all()), [second, first, third])
+        self.assertEqual(
+            list(course.modules.values_list("order", flat=True)),
+            [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP],
+        )
+
+    def test_appended_modules_follow_the_last_rank_and_serialize_positions(self):
+        course = self.title_match_course
+        first = course.modules.get()
+        Module.objects.filter(id=first.id).update(order=5 * ORDER_GAP)
+        second = Module.objects.create(course=course, title="Second")
+        self.assertEqual(second.order, 6 * ORDER_GAP)
+
+        course = Course.objects.prefetch_related("modules__contents").get(id=course.id)
+        self.assertEqual(
+            CourseSerializer(course).data["modules"],
+            [f"1. {first.title}", "2. Second"],
+        )
+        modules = CourseWithContentsSerializer(course).data["modules"]
+        self.assertEqual([module["order"] for module in modules], [1, 2])
+        self.assertEqual(ModuleSerializer(second).data["order"], 2)
+
     def test_module_change_refreshes_index(self):
-        self.refresh_target_module.title = "Distributed Search Systems"
-        self.refresh_target_module.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.refresh_target_module.title = "Distributed Search Systems"
+            self.refresh_target_module.save()
+        drain_search_index_outbox()
 
         qs = search_courses(Course.objects.all(), "distributed search")
         self.assertIn(
@@ -133,6 +487,46 @@ class PostgresCourseSearchTests(TestCase):
             list(qs.values_list("id", flat=True)),
         )
 
+    def test_burst_of_module_saves_coalesces_into_one_outbox_key(self):
+        SearchIndexOutbox.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for idx in range(5):
+                    Module.objects.create(
+                        course=self.module_match_course,
+                        title=f"Caching layer {idx}",
+                    )
+
+        self.assertEqual(
+            list(SearchIndexOutbox.objects.values_list("kind", "object_id")),
+            [(SearchIndexOutbox.KIND_COURSE, self.module_match_course.id)],
+        )
+        with mock.patch(
+            "courses.search_outbox.refresh_course_search_index",
+            return_value=True,
+        ) as refresh:
+            result = drain_search_index_outbox()
+        refresh.assert_called_once_with(self.module_match_course.id)
+        self.assertEqual(result["courses"], 1)
+        self.assertFalse(SearchIndexOutbox.objects.exists())
+
+    def test_outbox_keys_marked_after_a_rolled_back_savepoint_are_written(self):
+        SearchIndexOutbox.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        mark_course_dirty(self.title_match_course.id)
+                        raise RuntimeError("roll back the savepoint")
+                except RuntimeError:
+                    pass
+                mark_course_dirty(self.module_match_course.id)
+
+        self.assertIn(
+            (SearchIndexOutbox.KIND_COURSE, self.module_match_course.id),
+            set(SearchIndexOutbox.objects.values_list("kind", "object_id")),
+        )
+
     def test_rebuild_command_backfills_missing_rows(self):
         CourseSearchIndex.objects.all().delete()
         self.assertEqual(CourseSearchIndex.objects.count(), 0)
@@ -152,3 +546,656 @@ class PostgresCourseSearchTests(TestCase):
             self.title_match_course.id,
             list(qs.values_list("id", flat=True)),
         )
+
+    def test_content_search_builds_snippets_only_for_result_page(self):
+        content = Content.objects.filter(module__course=self.title_match_course).first()
+        ContentSearchEntry.objects.filter(content=content).delete()
+        for idx in range(3):
+            ContentSearchEntry.objects.create(
+                content=content,
+                course=self.title_match_course,
+                module=content.module,
+                kind="file",
+                item_title="DB PDF",
+                document=f"page {idx} explains write ahead logging for recovery",
+                page_number=idx + 1,
+            )
+
+        results = search_content_entries(
+            ContentSearchEntry.objects.all(),
+            "write ahead logging",
+            candidate_limit=2,
+        )
+        page = add_content_snippets(results[:1], "write ahead logging")
+
+        self.assertEqual(results.count(), 2)
+        self.assertFalse(hasattr(results[0], "snippet"))
+        self.assertEqual(len(page), 1)
+        self.assertIn('<mark class="search-highlight">', page[0].snippet)
+
+    def test_content_candidates_are_bounded_before_ranking(self):
+        content = Content.objects.filter(module__course=self.title_match_course).first()
+        ContentSearchEntry.objects.filter(content=content).delete()
+        documents = [
+            "logging logging logging: write ahead logging",
+            "logging appears once among many other unrelated words here",
+            "logging logging and more logging",
+        ]
+        now = timezone.now()
+        for idx, document in enumerate(documents):
+            entry = ContentSearchEntry.objects.create(
+                content=content,
+                course=self.title_match_course,
+                module=content.module,
+                kind="file",
+                item_title="DB PDF",
+                document=document,
+                page_number=idx + 1,
+            )
+            ContentSearchEntry.objects.filter(id=entry.id).update(updated=now + timedelta(minutes=idx))
+
+        results = search_content_entries(ContentSearchEntry.objects.all(), "logging", candidate_limit=2)
+
+        # The oldest match is never scored; the two newest are ranked.
+        self.assertEqual([entry.page_number for entry in results], [3, 2])
+
+    def test_lexicon_expands_typos_in_pdf_body_terms(self):
+        self.assertTrue(
+            SearchLexeme.objects.filter(scope=SearchLexeme.SCOPE_COURSE, word="logging").exists()
+        )
+        qs = search_courses(Course.objects.all(), "write ahaed loging")
+        self.assertIn(
+            self.title_match_course.id,
+            list(qs.values_list("id", flat=True)),
+        )
+
+    def test_suggestion_corrects_misspelled_terms(self):
+        rebuild_search_lexicon([SearchLexeme.SCOPE_COURSE])
+        self.assertEqual(
+            suggest_search_query(SearchLexeme.SCOPE_COURSE, "postgresq indexng"),
+            "postgresql indexing",
+        )
+        self.assertIsNone(suggest_search_query(SearchLexeme.SCOPE_COURSE, "postgresql"))
+
+    def test_cached_search_is_served_until_index_generation_bumps(self):
+        cold = list(
+            search_courses_cached(Course.objects.all(), "advanced databases").values_list("id", flat=True)
+        )
+        self.assertEqual(cold[0], self.title_match_course.id)
+
+        with mock.patch("courses.search_cache._ranked_course_ids") as ranked:
+            warm = list(
+                search_courses_cached(Course.objects.all(), "Advanced  Databases").values_list("id", flat=True)
+            )
+        ranked.assert_not_called()
+        self.assertEqual(warm, cold)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_course_search_index(self.title_match_course.id)
+        with mock.patch("courses.search_cache._ranked_course_ids", return_value=[]) as ranked:
+            self.assertFalse(search_courses_cached(Course.objects.all(), "advanced databases").exists())
+        ranked.assert_called_once()
+
+    def test_cached_search_ranks_narrowed_scopes_and_pages_past_the_cap(self):
+        learner = User.objects.create_user(username="learner", password="pass123")
+        self.overview_match_course.students.add(learner)
+        catalog = list(
+            search_courses(Course.objects.all(), "advanced databases").values_list("id", flat=True)
+        )
+
+        with mock.patch("courses.search_cache.SEARCH_CACHE_MAX_RESULTS", 1):
+            enrolled = list(
+                search_courses_cached(learner.courses_joined.all(), "advanced databases").values_list(
+                    "id", flat=True
+                )
+            )
+            uncapped = list(
+                search_courses_cached(Course.objects.all(), "advanced databases").values_list(
+                    "id", flat=True
+                )
+            )
+            first = get_search_page("advanced databases", limit=1)
+            second = get_search_page("advanced databases", cursor=first.next_cursor, limit=1)
+
+        self.assertEqual(enrolled, [self.overview_match_course.id])
+        self.assertEqual(uncapped, catalog)
+        self.assertEqual(
+            [course.id for course in first.courses + second.courses],
+            catalog[:2],
+        )
+
+    def test_suggest_endpoint_answers_without_redis_prefix_index(self):
+        # The test cache is local memory, so the prefix index is disabled.
+        response = self.client.get(reverse("search_suggest"), {"q": "adv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"query": "adv", "suggestions": []})
+
+    def test_suggestions_match_word_prefixes_and_hide_unjoined_content(self):
+        notes = Text.objects.create(owner=self.owner, title="Advanced Routing Notes", content="Routes.")
+        content = Content.objects.create(
+            module=self.refresh_target_module,
+            content_type=ContentType.objects.get_for_model(Text),
+            object_id=notes.id,
+        )
+        refresh_content_search_entries_for_content(content)
+        learner = User.objects.create_user(username="learner", password="pass123")
+        redis = _SortedSetRedis()
+
+        with mock.patch("courses.search_suggest._redis", return_value=redis):
+            rebuild_search_suggestions()
+            anonymous = get_search_suggestions("ADV")
+            by_word = get_search_suggestions("data")
+            joined = get_search_suggestions("adv", course_ids=[self.module_match_course.id])
+
+            self.client.force_login(learner)
+            hidden = self.client.get(reverse("search_suggest"), {"q": "advanced r"}).json()
+            # Joined course ids are cached until the enrollment version moves.
+            with self.captureOnCommitCallbacks(execute=True):
+                self.module_match_course.students.add(learner)
+            shown = self.client.get(reverse("search_suggest"), {"q": "advanced r"}).json()
+
+        self.assertEqual(anonymous, [{"text": "Advanced Databases", "kind": "course"}])
+        # Whole-title matches first, then titles with a later word matching.
+        self.assertEqual(
+            [s["text"] for s in by_word],
+            ["Databases", "Advanced Databases"],
+        )
+        self.assertEqual(
+            joined,
+            [
+                {"text": "Advanced Databases", "kind": "course"},
+                {"text": "Advanced Routing Notes", "kind": "content"},
+            ],
+        )
+        self.assertEqual(hidden["suggestions"], [])
+        self.assertEqual(shown["suggestions"], [{"text": "Advanced Routing Notes", "kind": "content"}])
+
+    def test_deleting_courses_and_subjects_drops_their_suggestions(self):
+        subject = Subject.objects.create(title="Quantum Computing", slug="quantum-computing")
+        Course.objects.create(
+            owner=self.owner,
+            subject=subject,
+            title="Qubit Basics",
+            slug="qubit-basics",
+            overview="No modules yet.",
+        )
+        redis = _SortedSetRedis()
+
+        with mock.patch("courses.search_suggest._redis", return_value=redis):
+            rebuild_search_suggestions()
+            before = get_search_suggestions("qu")
+            with self.captureOnCommitCallbacks(execute=True):
+                subject.delete()
+            after = get_search_suggestions("qu")
+
+        self.assertEqual(
+            {s["text"] for s in before},
+            {"Qubit Basics", "Quantum Computing"},
+        )
+        self.assertEqual(after, [])
+
+    def test_global_search_renders_partial_results_when_a_section_is_skipped(self):
+        self.client.force_login(self.owner)
+        with mock.patch(
+            "courses.views.search_notes",
+            side_effect=AssertionError("notes search should not block the page"),
+        ), mock.patch(
+            "courses.views.run_searches",
+            side_effect=lambda searches: (
+                {name: fn() for name, fn in searches.items() if name != "notes"},
+                ["notes"],
+            ),
+        ):
+            response = self.client.get(reverse("global_search"), {"q": "advanced databases"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["skipped_sections"], ["notes"])
+        self.assertEqual(response.context["note_results"], [])
+        self.assertEqual(response.context["course_results"][0].id, self.title_match_course.id)
+
+    def test_resumed_rebuild_only_processes_unfinished_ranges(self):
+        CourseSearchIndex.objects.all().delete()
+        checkpoints = plan_rebuild("course", workers=2)
+        self.assertEqual(len(checkpoints), 2)
+
+        # Simulate a run that crashed after finishing the first range.
+        first = run_rebuild_range(checkpoints[0].id, batch_size=1)
+        result = rebuild_search_index_resumable("course", resume=True, batch_size=1)
+
+        self.assertEqual(first + result["processed"], Course.objects.count())
+        self.assertEqual(CourseSearchIndex.objects.count(), Course.objects.count())
+        self.assertFalse(SearchRebuildCheckpoint.objects.filter(name="course", finished=False).exists())
+
+    def test_content_refresh_only_rewrites_changed_entries(self):
+        text = Text.objects.create(owner=self.owner, title="WAL basics", content="<p>Checkpoints</p>")
+        content = Content.objects.create(
+            module=self.title_match_course.modules.first(),
+            content_type=ContentType.objects.get_for_model(Text),
+            object_id=text.id,
+        )
+        refresh_content_search_entries_for_content(content)
+        entry = ContentSearchEntry.objects.get(content=content)
+
+        refresh_content_search_entries_for_content(content)
+        unchanged = ContentSearchEntry.objects.get(content=content)
+        self.assertEqual((unchanged.id, unchanged.updated), (entry.id, entry.updated))
+
+        text.content = "<p>Checkpoints and replication</p>"
+        text.save()
+        refresh_content_search_entries_for_content(content, item=text)
+        changed = ContentSearchEntry.objects.get(content=content)
+        self.assertEqual(changed.id, entry.id)
+        self.assertIn("replication", changed.document)
+        self.assertNotEqual(changed.document_hash, entry.document_hash)
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql",
+    "PostgreSQL-specific job queue tests.",
+)
+class PdfIndexJobQueueTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pass123")
+        subject = Subject.objects.create(title="Systems", slug="systems")
+        course = Course.objects.create(
+            owner=self.owner,
+            subject=subject,
+            title="Operating Systems",
+            slug="operating-systems",
+            overview="Kernels and schedulers.",
+        )
+        self.module = Module.objects.create(course=course, title="Scheduling")
+        self.pdf_item = File.objects.create(
+            owner=self.owner,
+            title="Scheduler PDF",
+            file=SimpleUploadedFile(
+                "scheduler.pdf",
+                b"%PDF-1.4 fake test pdf",
+                content_type="application/pdf",
+            ),
+        )
+        self.content = Content.objects.create(module=self.module, item=self.pdf_item)
+
+    def _indexed_result(self):
+        return PdfIndexResult(
+            status="indexed",
+            page_count=1,
+            error="",
+            page_texts=["round robin quantum"],
+        )
+
+    def test_pdf_save_enqueues_single_job_without_extracting(self):
+        with mock.patch("courses.pdf_jobs.update_pdf_index_for_file") as extract:
+            self.pdf_item.title = "Scheduler PDF v2"
+            self.pdf_item.save()
+            extract.assert_not_called()
+
+        self.pdf_item.refresh_from_db()
+        self.assertEqual(self.pdf_item.pdf_index_status, File.PDF_STATUS_QUEUED)
+        self.assertEqual(
+            PdfIndexJob.objects.filter(
+                file=self.pdf_item,
+                status=PdfIndexJob.STATUS_QUEUED,
+            ).count(),
+            1,
+        )
+
+    def test_worker_indexes_file_and_refreshes_page_entries(self):
+        with mock.patch(
+            "courses.pdf_jobs.update_pdf_index_for_file",
+            return_value=self._indexed_result(),
+        ):
+            result = process_pdf_index_jobs(limit=5)
+
+        self.assertEqual(result["succeeded"], 1)
+        job = PdfIndexJob.objects.get(file=self.pdf_item)
+        self.assertEqual(job.status, PdfIndexJob.STATUS_DONE)
+        self.assertTrue(
+            ContentSearchEntry.objects.filter(
+                content=self.content,
+                page_number=1,
+                document__icontains="round robin",
+            ).exists()
+        )
+
+    def test_failed_extraction_is_retried_then_marked_failed(self):
+        failed = PdfIndexResult(status="failed", page_count=0, error="broken xref", page_texts=[])
+        with mock.patch("courses.pdf_jobs.update_pdf_index_for_file", return_value=failed):
+            process_pdf_index_jobs(limit=1)
+            job = PdfIndexJob.objects.get(file=self.pdf_item)
+            self.assertEqual(job.status, PdfIndexJob.STATUS_QUEUED)
+            self.assertEqual(job.attempts, 1)
+            self.assertEqual(job.last_error, "broken xref")
+
+            for _ in range(PDF_INDEX_JOB_MAX_ATTEMPTS - 1):
+                PdfIndexJob.objects.filter(id=job.id).update(available_at=job.created)
+                process_pdf_index_jobs(limit=1)
+
+        job.refresh_from_db()
+        self.pdf_item.refresh_from_db()
+        self.assertEqual(job.status, PdfIndexJob.STATUS_FAILED)
+        self.assertEqual(self.pdf_item.pdf_index_status, File.PDF_STATUS_FAILED)
+        self.assertEqual(self.pdf_item.pdf_index_error, "broken xref")
+
+    def test_sandbox_limit_fails_file_without_retrying(self):
+        limited = PdfIndexResult(
+            status="failed",
+            page_count=0,
+            error="CPU time limit of 60s exceeded",
+            page_texts=[],
+            retryable=False,
+        )
+        with mock.patch("courses.pdf_jobs.update_pdf_index_for_file", return_value=limited):
+            process_pdf_index_jobs(limit=1)
+
+        job = PdfIndexJob.objects.get(file=self.pdf_item)
+        self.pdf_item.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.status, PdfIndexJob.STATUS_FAILED)
+        self.assertEqual(self.pdf_item.pdf_index_status, File.PDF_STATUS_FAILED)
+        self.assertEqual(self.pdf_item.pdf_index_error, "CPU time limit of 60s exceeded")
+
+    def test_duplicate_upload_reuses_cached_extraction(self):
+        with mock.patch(
+            "courses.pdf_indexing.extract_pdf_index_data",
+            return_value=self._indexed_result(),
+        ) as extract:
+            process_pdf_index_jobs(limit=5)
+            duplicate = File.objects.create(
+                owner=self.owner,
+                title="Scheduler PDF copy",
+                file=SimpleUploadedFile(
+                    "scheduler-copy.pdf",
+                    b"%PDF-1.4 fake test pdf",
+                    content_type="application/pdf",
+                ),
+            )
+
+        self.assertEqual(extract.call_count, 1)
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.content_sha256, self.pdf_item.content_sha256)
+        self.assertEqual(duplicate.pdf_index_status, File.PDF_STATUS_INDEXED)
+        self.assertFalse(PdfIndexJob.objects.filter(file=duplicate).exists())
+
+    def test_content_hash_is_not_editable_in_the_instructor_form(self):
+        form = ContentCreateUpdateView().get_form(File, instance=self.pdf_item)
+        self.assertNotIn("content_sha256", form.fields)
+
+    def test_streamed_pages_are_written_in_batches_and_pruned(self):
+        pages = ["round robin", "", "priority inversion", "multilevel feedback queue"]
+        with mock.patch(
+            "courses.search._write_content_entry_batch",
+            wraps=search_module._write_content_entry_batch,
+        ) as write_batch, mock.patch("courses.search.PDF_INDEX_BUFFER_CHARS", 1):
+            created = refresh_content_search_entries_for_content(
+                self.content,
+                page_texts=(page for page in pages),
+            )
+
+        self.assertEqual(created, 3)
+        self.assertEqual(write_batch.call_count, 3)
+        self.assertEqual(
+            list(
+                ContentSearchEntry.objects.filter(content=self.content)
+                .order_by("page_number")
+                .values_list("page_number", flat=True)
+            ),
+            [1, 3, 4],
+        )
+
+        refresh_content_search_entries_for_content(self.content, page_texts=iter(pages[:1]))
+        self.assertEqual(
+            list(ContentSearchEntry.objects.filter(content=self.content).values_list("page_number", flat=True)),
+            [1],
+        )
+
+    def test_course_archive_round_trip_bulk_imports_and_queues_pdfs(self):
+        text = Text.objects.create(owner=self.owner, title="Quantum notes", content="Time slices.")
+        Content.objects.create(module=self.module, item=text)
+        archive = io.BytesIO()
+        export_course(self.module.course, archive)
+        archive.seek(0)
+
+        with mock.patch("courses.signals.enqueue_pdf_index_job") as per_row_enqueue:
+            result = import_course(archive, self.owner, slug="operating-systems-copy")
+        per_row_enqueue.assert_not_called()
+
+        course = result["course"]
+        self.assertEqual((result["modules"], result["contents"], result["pdf_jobs"]), (1, 2, 1))
+        module = course.modules.get()
+        items = [content.item for content in module.contents.all()]
+        self.assertEqual([item.title for item in items], ["Scheduler PDF", "Quantum notes"])
+        self.assertEqual(items[0].content_sha256, self.pdf_item.content_sha256)
+        self.assertTrue(
+            PdfIndexJob.objects.filter(file=items[0], status=PdfIndexJob.STATUS_QUEUED).exists()
+        )
+        self.assertTrue(ContentSearchEntry.objects.filter(course=course, kind="text").exists())
+        self.assertTrue(CourseSearchIndex.objects.filter(course=course).exists())
+
+        archive.seek(0)
+        with self.assertRaises(CourseArchiveError):
+            import_course(archive, self.owner, slug="operating-systems-copy")
+
+        # A concurrent import can take the slug after the early check passed.
+        archive.seek(0)
+        filter_courses = Course.objects.filter
+
+        def slug_looks_free(*args, **kwargs):
+            queryset = filter_courses(*args, **kwargs)
+            return queryset.none() if "slug" in kwargs else queryset
+
+        with mock.patch.object(Course.objects, "filter", side_effect=slug_looks_free):
+            with self.assertRaisesMessage(CourseArchiveError, "already exists"):
+                import_course(archive, self.owner, slug="operating-systems-copy")
+        self.assertEqual(Course.objects.filter(slug="operating-systems-copy").count(), 1)
+
+    def test_attach_content_items_loads_each_item_model_once(self):
+        for idx in range(3):
+            text = Text.objects.create(owner=self.owner, title=f"Notes {idx}", content="Body.")
+            Content.objects.create(module=self.module, item=text)
+        contents = list(self.module.contents.all())
+
+        with self.assertNumQueries(2):
+            attach_content_items(contents)
+        with self.assertNumQueries(0):
+            items = [content.item for content in contents]
+        self.assertEqual(items[0], self.pdf_item)
+        self.assertEqual([item.title for item in items[1:]], ["Notes 0", "Notes 1", "Notes 2"])
+
+
+def _statement_timeout():
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW statement_timeout")
+        return cursor.fetchone()[0]
+
+
+def _sleep_in_database():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_sleep(5)")
+    return ["too late"]
+
+
+def _broken_search():
+    raise RuntimeError("index unavailable")
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql",
+    "PostgreSQL-specific search executor tests.",
+)
+class SearchExecutorTests(TestCase):
+    def test_slow_and_failing_sections_are_skipped_at_the_shared_deadline(self):
+        started = time.monotonic()
+        results, skipped = run_searches(
+            {
+                "courses": _sleep_in_database,
+                "content": _statement_timeout,
+                "notes": _broken_search,
+            },
+            timeout=0.5,
+        )
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(results, {"content": "500ms"})
+        self.assertEqual(skipped, ["courses", "notes"])
+        self.assertLess(elapsed, 2.5)
+
+
+class PdfSandboxTests(SimpleTestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as pdf:
+            pdf.write(_text_pdf(["Kernel scheduling", "Round robin quantum", "Priority inversion"]))
+        self.addCleanup(os.remove, self.path)
+
+    def _sandbox(self, **overrides):
+        options = {
+            "max_pages": 60,
+            "max_chars": 180000,
+            "cpu_seconds": 30,
+            "memory_mb": 512,
+            "timeout_seconds": 60,
+        }
+        options.update(overrides)
+        return PdfSandbox(self.path, **options)
+
+    def test_sandbox_extracts_pages_in_a_reaped_child(self):
+        with self._sandbox(max_pages=2) as sandbox:
+            process = sandbox._process
+            pages = list(sandbox.pages())
+
+        self.assertEqual(sandbox.page_count, 3)
+        self.assertEqual(pages, ["Kernel scheduling", "Round robin quantum"])
+        self.assertIsNotNone(process.returncode)
+        self.assertIsNone(sandbox._process)
+
+    def test_sandbox_kills_the_child_when_the_deadline_passes(self):
+        sandbox = self._sandbox(timeout_seconds=0.001)
+        with self.assertRaises(PdfSandboxError) as raised:
+            sandbox.__enter__()
+
+        self.assertTrue(raised.exception.limit_exceeded)
+        self.assertIn("timed out", str(raised.exception))
+        self.assertIsNone(sandbox._process)
+
+    def test_sandbox_does_not_start_the_uwsgi_binary(self):
+        with mock.patch("courses.pdf_sandbox.sys.executable", "/usr/local/bin/uwsgi"):
+            with self._sandbox() as sandbox:
+                pages = list(sandbox.pages())
+        self.assertEqual(len(pages), 3)
+
+    def test_sandbox_refuses_to_start_without_posix_limits(self):
+        sandbox = self._sandbox()
+        with mock.patch("courses.pdf_sandbox.resource", None), mock.patch(
+            "courses.pdf_sandbox.subprocess.Popen"
+        ) as popen:
+            with self.assertRaises(PdfSandboxError) as raised:
+                sandbox.__enter__()
+
+        popen.assert_not_called()
+        self.assertIn("POSIX", str(raised.exception))
+        self.assertFalse(raised.exception.limit_exceeded)
+
+
+class _PoolBrokenAfterFirstTask:
+    """
+    Stands in for ProcessPoolExecutor: the first task runs, then the pool
+    reports its workers died.
+    """
+
+    def __init__(self, max_workers):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.submitted += 1
+        if self.submitted == 1:
+            future.set_result(fn(*args))
+        else:
+            future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+class PdfPageExtractionTests(SimpleTestCase):
+    def setUp(self):
+        self.page_texts = [f"Lecture page {number} on paging" for number in range(1, 11)]
+        handle, self.path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as pdf:
+            pdf.write(_text_pdf(self.page_texts))
+        self.addCleanup(os.remove, self.path)
+        self.reader = pdf_indexing.PdfReader(self.path)
+
+    def test_parallel_pages_match_the_serial_path_in_order(self):
+        serial = list(pdf_indexing._iter_pages_serial(self.reader, 10))
+        parallel = list(pdf_indexing._iter_pages_parallel(self.reader, self.path, 10, 3))
+
+        self.assertEqual(serial, self.page_texts)
+        self.assertEqual(parallel, serial)
+
+    def test_broken_pool_finishes_the_remaining_pages_serially(self):
+        with mock.patch.object(pdf_indexing, "ProcessPoolExecutor", _PoolBrokenAfterFirstTask):
+            pages = list(pdf_indexing._iter_pages_parallel(self.reader, self.path, 10, 3))
+        self.assertEqual(pages, self.page_texts)
+
+        with mock.patch.object(pdf_indexing, "ProcessPoolExecutor", side_effect=OSError("no semaphores")):
+            pages = list(pdf_indexing._iter_pages_parallel(self.reader, self.path, 10, 3))
+        self.assertEqual(pages, self.page_texts)
+
+    def test_spent_char_budget_pads_pages_without_extracting_them(self):
+        pulled = []
+
+        def raw_pages():
+            for text in self.page_texts:
+                pulled.append(text)
+                yield text
+
+        pages = list(apply_char_budget(raw_pages(), 30, len(self.page_texts)))
+
+        self.assertEqual(pages[:2], [self.page_texts[0], self.page_texts[1][:6]])
+        self.assertEqual(pages[2:], [""] * 8)
+        self.assertEqual(len(pulled), 2)
+
+        with mock.patch.object(pdf_indexing, "PDF_INDEX_MAX_CHARS", 30):
+            budgeted = list(pdf_indexing._iter_reader_pages(self.reader, self.path))
+        self.assertEqual(budgeted, pages)
+
+    def test_single_worker_setting_keeps_extraction_in_process(self):
+        with mock.patch.object(pdf_indexing, "PDF_INDEX_WORKERS", 1), mock.patch.object(
+            pdf_indexing, "ProcessPoolExecutor"
+        ) as pool:
+            pages = list(pdf_indexing._iter_reader_pages(self.reader, self.path))
+
+        pool.assert_not_called()
+        self.assertEqual(pages, self.page_texts)
+
+
+class CourseArchiveLimitTests(SimpleTestCase):
+    def _archive(self, course, media=()):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as bundle:
+            bundle.writestr("manifest.json", json.dumps({"version": 1, "course": course, "modules": []}))
+            for name, data in media:
+                bundle.writestr(name, data)
+        archive.seek(0)
+        return archive
+
+    def test_archive_without_subject_slug_is_rejected(self):
+        archive = self._archive({"slug": "orphan", "subject": {"title": "Untitled"}})
+        with self.assertRaisesMessage(CourseArchiveError, "subject slug"):
+            import_course(archive, owner=None)
+
+    def test_archive_size_and_member_count_are_checked_before_extraction(self):
+        course = {"slug": "bomb", "subject": {"slug": "systems", "title": "Systems"}}
+        archive = self._archive(course, media=[("media/0/zeros.bin", b"\0" * 1_000_000)])
+
+        with mock.patch("courses.course_transfer.COURSE_ARCHIVE_MAX_BYTES", 500_000):
+            with self.assertRaisesMessage(CourseArchiveError, "expands to"):
+                import_course(archive, owner=None)
+
+        archive.seek(0)
+        with mock.patch("courses.course_transfer.COURSE_ARCHIVE_MAX_MEMBERS", 1):
+            with self.assertRaisesMessage(CourseArchiveError, "members"):
+                import_course(archive, owner=None)
@@ -82,6 +82,16 @@ urlpatterns = [
         views.ContentOrderview.as_view(),
         name="content_order",
     ),
+    path(
+        "module/move/",
+        views.ModuleMoveView.as_view(),
+        name="module_move",
+    ),
+    path(
+        "content/move/",
+        views.ContentMoveView.as_view(),
+        name="content_move",
+    ),
     path(
         "motto/refresh/",
         views.refresh_daily_motto,
@@ -101,6 +111,11 @@ urlpatterns = [
         views.CourseListview.as_view(),
         name="course_list_subject",
     ),
+    path(
+        "catalog/page/",
+        views.catalog_page,
+        name="course_list_page",
+    ),
     path(
         "<slug:slug>/",
         views.CourseDetailView.as_view(),
@@ -7,7 +7,7 @@ Main view layer for:
 """
 
 # Redirect URL builder used by class-based views after successful actions.
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 
 # Core class-based views.
 from django.views.generic.base import TemplateResponseMixin, View
@@ -16,9 +16,10 @@ from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 
 # Request/response helpers.
+from urllib.parse import urlencode
 from django.shortcuts import get_object_or_404, redirect, render
 from django.http import Http404, JsonResponse
-from django.conf import settings
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST, require_http_methods
 
@@ -30,24 +31,34 @@ from django.db.models import Count
 from django.apps import apps
 from django.forms.models import modelform_factory
 
-# Django cache API (Redis/Memcache/local depending on settings).
-from django.core.cache import cache
-
 # Third-party helpers for JSON endpoints.
 from braces.views import CsrfExemptMixin, JsonRequestResponseMixin
 
 # Local models/forms.
-from .models import Course, Subject, Module, Content, ContentSearchEntry
+from .models import Course, Module, Content, ContentSearchEntry, SearchLexeme
 from .forms import ModuleFormSet
-from .search import search_courses, search_content_entries
+from .ordering import move_between, position_of, reorder
+from .search import add_content_snippets, search_content_entries
+from .content_items import attach_content_items
+from .catalog import (
+    InvalidCursor,
+    bump_catalog_version,
+    bump_course_version,
+    get_catalog_page,
+    get_catalog_snapshot,
+    get_joined_course_ids,
+    get_search_page,
+)
+from .search_cache import search_courses_cached
+from .search_executor import run_searches
+from .search_suggest import get_search_suggestions
+from .search_lexicon import suggest_search_query
 from .motto import get_daily_motto
 from notes.models import NoteSearchIndex
-from notes.search import search_notes
+from notes.search import add_note_snippets, search_notes
 from students.forms import CourseEnrollForm
 
 
-# Shared cache duration for public course list data.
-COURSE_LIST_CACHE_TTL = 60 * 60 * 24 * 7 # 7 days
 SEARCH_CONTENT_LIMIT = 40
 SEARCH_COURSE_LIMIT = 20
 SEARCH_NOTE_LIMIT = 40
@@ -70,13 +81,41 @@ def front_door(request, *args, **kwargs):
 
     return render(request, "courses/landing.html")
 
+
+def _catalog_page(current_subject, query, cursor):
+    subject_id = current_subject.id if current_subject else None
+    try:
+        if query:
+            return get_search_page(query, subject_id=subject_id, cursor=cursor)
+        return get_catalog_page(subject_id=subject_id, cursor=cursor)
+    except InvalidCursor:
+        raise Http404("Invalid cursor.")
+
+
+def _catalog_next_url(current_subject, query, next_cursor):
+    if not next_cursor:
+        return ""
+    params = {"cursor": next_cursor}
+    if current_subject:
+        params["subject"] = current_subject.slug
+    if query:
+        params["q"] = query
+    return f"{reverse('course_list_page')}?{urlencode(params)}"
+
+
+def _enrolled_course_ids(request):
+    if not request.user.is_authenticated:
+        return []
+    return list(request.user.courses_joined.values_list("id", flat=True))
+
+
 class CourseListview(TemplateResponseMixin, View):
     """
     Public catalog page.
     Data flow:
-    - Try cache for subjects + courses
-    - If cache miss, query DB and store in cache
-    - Render list template with filtering by optional subject slug
+    - Read subjects from the versioned catalog snapshot
+    - Read one keyset page of courses (or ranked search results)
+    - Render list template; further pages load from `catalog_page`
     """
     model = Course
     template_name = "courses/course/list.html"
@@ -84,66 +123,64 @@ class CourseListview(TemplateResponseMixin, View):
     def get(self, request, subject=None):
         current_subject = None
         query = (request.GET.get("q") or "").strip()
-        enrolled_course_ids = []
-        if request.user.is_authenticated:
-            enrolled_course_ids = list(
-                request.user.courses_joined.values_list("id", flat=True)
-            )
+        cursor = request.GET.get("cursor") or None
 
-        # 1) Subjects sidebar (with number of courses per subject).
-        if settings.DEBUG:
-            subjects = Subject.objects.annotate(total_courses=Count("courses"))
-        else:
-            subjects = cache.get("all_subjects")
-            if subjects is None:
-                subjects = Subject.objects.annotate(total_courses=Count("courses"))
-                cache.set("all_subjects", subjects, COURSE_LIST_CACHE_TTL)
-
-        # 2) Base queryset for courses (with number of modules per course).
-        all_courses = Course.objects.select_related("subject", "owner").annotate(
-            total_modules=Count("modules")
-        )
+        # 1) Subjects sidebar comes from one cached snapshot, which model
+        #    signals retire on every catalog change.
+        catalog = get_catalog_snapshot()
 
-        # 3) Optional filtering by subject slug from URL.
+        # 2) Optional filtering by subject slug from URL.
         if subject:
-            current_subject = get_object_or_404(Subject, slug=subject)
+            current_subject = catalog.subject_by_slug(subject)
+            if current_subject is None:
+                raise Http404("No Subject matches the given query.")
 
-        # 4) Search path bypasses cached querysets so ranking runs in PostgreSQL.
-        if query:
-            courses = all_courses
-            if current_subject:
-                courses = courses.filter(subject=current_subject)
-            courses = search_courses(courses, query)
-        elif current_subject:
-            if settings.DEBUG:
-                courses = all_courses.filter(subject=current_subject)
-            else:
-                cache_key = f"subject_{current_subject.id}_courses"
-                courses = cache.get(cache_key)
-                if courses is None:
-                    courses = all_courses.filter(subject=current_subject)
-                    cache.set(cache_key, courses, COURSE_LIST_CACHE_TTL)
-        else:
-            if settings.DEBUG:
-                courses = all_courses
-            else:
-                courses = cache.get("all_courses")
-                if courses is None:
-                    courses = all_courses
-                    cache.set("all_courses", courses, COURSE_LIST_CACHE_TTL)
-
-        # 5) Render page context used by courses/course/list.html.
+        # 3) One page of courses; pages are cached under the same version.
+        page = _catalog_page(current_subject, query, cursor)
+
+        # 4) Render page context used by courses/course/list.html.
         return self.render_to_response(
             {
-                "subjects": subjects,
+                "subjects": catalog.subjects,
                 "subject": current_subject,
-                "courses": courses,
+                "courses": page.courses,
+                "next_cursor": page.next_cursor,
+                "next_page_url": _catalog_next_url(current_subject, query, page.next_cursor),
                 "query": query,
-                "enrolled_course_ids": enrolled_course_ids,
+                "enrolled_course_ids": _enrolled_course_ids(request),
             }
         )
 
 
+def catalog_page(request):
+    """
+    Infinite-scroll fragment: the next page of course cards as HTML plus the
+    URL of the page after it.
+    """
+    query = (request.GET.get("q") or "").strip()
+    cursor = request.GET.get("cursor") or None
+    current_subject = None
+    subject_slug = request.GET.get("subject")
+    if subject_slug:
+        current_subject = get_catalog_snapshot().subject_by_slug(subject_slug)
+        if current_subject is None:
+            raise Http404("No Subject matches the given query.")
+
+    page = _catalog_page(current_subject, query, cursor)
+    html = render_to_string(
+        "courses/course/_course_cards.html",
+        {"courses": page.courses, "enrolled_course_ids": _enrolled_course_ids(request)},
+        request=request,
+    )
+    return JsonResponse(
+        {
+            "html": html,
+            "next_cursor": page.next_cursor,
+            "next_url": _catalog_next_url(current_subject, query, page.next_cursor),
+        }
+    )
+
+
 class SearchResultsView(TemplateResponseMixin, View):
     """
     Global search page for courses, course contents, and notes.
@@ -156,6 +193,8 @@ class SearchResultsView(TemplateResponseMixin, View):
         course_results = []
         content_results = []
         note_results = []
+        suggested_query = None
+        skipped_sections = []
         enrolled_course_ids = []
         if request.user.is_authenticated:
             enrolled_course_ids = list(
@@ -163,35 +202,54 @@ class SearchResultsView(TemplateResponseMixin, View):
             )
 
         if query:
+            user = request.user
             course_qs = Course.objects.select_related("subject", "owner").annotate(
                 total_modules=Count("modules")
             )
-            course_results = list(search_courses(course_qs, query)[:SEARCH_COURSE_LIMIT])
+            # Independent searches run side by side; each must return a list.
+            searches = {
+                "courses": lambda: list(
+                    search_courses_cached(course_qs, query)[:SEARCH_COURSE_LIMIT]
+                ),
+            }
 
-            if request.user.is_authenticated:
+            if user.is_authenticated:
                 content_qs = (
                     ContentSearchEntry.objects.select_related("course", "module", "content")
-                    .filter(course__students=request.user)
+                    .filter(course__students=user)
                 )
-                content_results = list(
-                    search_content_entries(content_qs, query)[:SEARCH_CONTENT_LIMIT]
+                searches["content"] = lambda: add_content_snippets(
+                    search_content_entries(content_qs, query)[:SEARCH_CONTENT_LIMIT],
+                    query,
                 )
 
                 note_qs = (
                     NoteSearchIndex.objects.select_related("note")
                     .prefetch_related("note__tags")
-                    .filter(note__user=request.user)
+                    .filter(note__user=user)
                 )
-                note_results = list(
-                    search_notes(note_qs, query)[:SEARCH_NOTE_LIMIT]
+                searches["notes"] = lambda: add_note_snippets(
+                    search_notes(note_qs, query)[:SEARCH_NOTE_LIMIT],
+                    query,
                 )
 
+            results, skipped_sections = run_searches(searches)
+            course_results = results.get("courses", [])
+            content_results = results.get("content", [])
+            note_results = results.get("notes", [])
+
+            if not (course_results or content_results or note_results or skipped_sections):
+                # Suggest from the public catalog lexicon only, never from private notes.
+                suggested_query = suggest_search_query(SearchLexeme.SCOPE_COURSE, query)
+
         return self.render_to_response(
             {
                 "query": query,
                 "content_results": content_results,
                 "course_results": course_results,
                 "note_results": note_results,
+                "suggested_query": suggested_query,
+                "skipped_sections": skipped_sections,
                 "enrolled_course_ids": enrolled_course_ids,
             }
         )
@@ -336,7 +394,11 @@ class ModuleContentListView(TemplateResponseMixin, View):
             id=module_id,
             course__owner=request.user,
         )
-        return self.render_to_response({"module": module})
+        module_number = position_of(module)
+        contents = attach_content_items(module.contents.select_related("content_type"))
+        return self.render_to_response(
+            {"module": module, "module_number": module_number, "contents": contents}
+        )
 
 
 # -------------------------------------------------------------------
@@ -446,33 +508,119 @@ class ContentDeleteView(View):
 # AJAX ordering endpoints
 # -------------------------------------------------------------------
 
+def _ordered_ids(payload, owned_ids):
+    # Payload maps id -> position; unknown or foreign ids are dropped.
+    positions = []
+    for object_id, position in payload.items():
+        try:
+            object_id, position = int(object_id), int(position)
+        except (TypeError, ValueError):
+            continue
+        if object_id in owned_ids:
+            positions.append((position, object_id))
+    return [object_id for _, object_id in sorted(positions)]
+
+
+def _move_payload_id(payload, key):
+    value = payload.get(key)
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
 class ModuleOrderView(CsrfExemptMixin, JsonRequestResponseMixin, View):
     """
-    Receives JSON like {"module_id": new_order, ...} and updates module order.
+    Receives JSON like {"module_id": new_order, ...} and applies the whole
+    ordering in one bulk UPDATE.
     """
     def post(self, request):
-        for id, order in self.request_json.items():
+        owned_ids = set(
             Module.objects.filter(
-                id=id,
+                id__in=[key for key in self.request_json if str(key).isdigit()],
                 course__owner=request.user,
-            ).update(order=order)
+            ).values_list("id", flat=True)
+        )
+        reorder(Module, _ordered_ids(self.request_json, owned_ids))
+        # Bulk rank writes skip post_save; module order is part of the API output.
+        for course_id in set(
+            Module.objects.filter(id__in=owned_ids).values_list("course_id", flat=True)
+        ):
+            bump_course_version(course_id)
+        bump_catalog_version()
         return self.render_json_response({"saved": "OK"})
 
 
 class ContentOrderview(CsrfExemptMixin, JsonRequestResponseMixin, View):
     """
-    Receives JSON like {"content_id": new_order, ...} and updates content order.
+    Receives JSON like {"content_id": new_order, ...} and applies the whole
+    ordering in one bulk UPDATE.
     (Name kept as-is to avoid breaking existing URL references.)
     """
     def post(self, request):
-        for id, order in self.request_json.items():
+        owned_ids = set(
             Content.objects.filter(
-                id=id,
+                id__in=[key for key in self.request_json if str(key).isdigit()],
                 module__course__owner=request.user,
-            ).update(order=order)
+            ).values_list("id", flat=True)
+        )
+        reorder(Content, _ordered_ids(self.request_json, owned_ids))
         return self.render_json_response({"saved": "OK"})
 
 
+class ModuleMoveView(CsrfExemptMixin, JsonRequestResponseMixin, View):
+    """
+    Receives JSON like {"id": 7, "prev_id": 3, "next_id": 9} after a
+    drag-and-drop and rewrites only the moved module's rank.
+    """
+    def post(self, request):
+        module = get_object_or_404(
+            Module,
+            id=_move_payload_id(self.request_json, "id"),
+            course__owner=request.user,
+        )
+        order = move_between(
+            module,
+            prev_id=_move_payload_id(self.request_json, "prev_id"),
+            next_id=_move_payload_id(self.request_json, "next_id"),
+        )
+        bump_course_version(module.course_id)
+        bump_catalog_version()
+        return self.render_json_response({"saved": "OK", "order": order})
+
+
+class ContentMoveView(CsrfExemptMixin, JsonRequestResponseMixin, View):
+    """
+    Same as ModuleMoveView for the contents of one module.
+    """
+    def post(self, request):
+        content = get_object_or_404(
+            Content,
+            id=_move_payload_id(self.request_json, "id"),
+            module__course__owner=request.user,
+        )
+        order = move_between(
+            content,
+            prev_id=_move_payload_id(self.request_json, "prev_id"),
+            next_id=_move_payload_id(self.request_json, "next_id"),
+        )
+        return self.render_json_response({"saved": "OK", "order": order})
+
+
+@require_http_methods(["GET"])
+def search_suggestions(request):
+    """
+    Typeahead for the global search box, answered from the Redis prefix index.
+    """
+    query = (request.GET.get("q") or "").strip()
+    course_ids = []
+    if request.user.is_authenticated:
+        course_ids = get_joined_course_ids(request.user)
+    return JsonResponse(
+        {"query": query, "suggestions": get_search_suggestions(query, course_ids=course_ids)}
+    )
+
+
 @require_http_methods(["GET", "POST"])
 @login_required
 def refresh_daily_motto(request):
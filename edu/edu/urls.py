@@ -15,7 +15,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from courses.views import SearchResultsView, front_door
+from courses.views import SearchResultsView, front_door, search_suggestions
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
@@ -33,6 +33,7 @@ urlpatterns = [
     path("course/", include("courses.urls")),
     path("", front_door, name="home"),
     path("search/", SearchResultsView.as_view(), name="global_search"),
+    path("search/suggest/", search_suggestions, name="search_suggest"),
     path("students/", include("students.urls")),
     path("__debug__/", include("debug_toolbar.urls")),
     path("assistant/", include("assistant.urls", namespace="assistant")),
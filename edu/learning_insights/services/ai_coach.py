@@ -8,7 +8,8 @@ from typing import Any
 
 from assistant.services import GeminiError, generate_ai_response_simple
 from courses.models import ContentSearchEntry, Course
-from courses.search import search_content_entries, search_courses
+from courses.search import add_content_snippets, search_content_entries
+from courses.search_cache import search_courses_cached
 from django.db import transaction
 from django.utils import timezone
 from notes.models import Note
@@ -242,7 +243,7 @@ def _serialize_courses(user) -> list[dict[str, Any]]:
                 "completed_modules": completed_count,
                 "next_module": {
                     "module_id": next_module.id,
-                    "order": next_module.order,
+                    "order": modules.index(next_module),
                     "title": next_module.title,
                 }
                 if next_module
@@ -716,7 +717,7 @@ def _build_prompt_plan_matches(*, user, query_text: str) -> dict[str, Any]:
 
     try:
         enrolled_course_qs = Course.objects.select_related("subject").filter(students=user)
-        enrolled = list(search_courses(enrolled_course_qs, query_text)[:6])
+        enrolled = list(search_courses_cached(enrolled_course_qs, query_text)[:6])
         for course in enrolled:
             matches["enrolled_courses"].append(
                 {
@@ -735,7 +736,7 @@ def _build_prompt_plan_matches(*, user, query_text: str) -> dict[str, Any]:
         content_qs = ContentSearchEntry.objects.select_related("course", "module", "content").filter(
             course__students=user
         )
-        entries = list(search_content_entries(content_qs, query_text)[:10])
+        entries = add_content_snippets(search_content_entries(content_qs, query_text)[:10], query_text)
         for entry in entries:
             matches["enrolled_content"].append(
                 {
@@ -756,7 +757,7 @@ def _build_prompt_plan_matches(*, user, query_text: str) -> dict[str, Any]:
 
     try:
         catalog_qs = Course.objects.select_related("subject").exclude(students=user)
-        catalog = list(search_courses(catalog_qs, query_text)[:6])
+        catalog = list(search_courses_cached(catalog_qs, query_text)[:6])
         for course in catalog:
             matches["catalog_courses"].append(
                 {
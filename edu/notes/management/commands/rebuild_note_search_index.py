@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 
+from courses.search_rebuild import add_rebuild_arguments, run_rebuild_command
 from notes.search import rebuild_note_search_index
 
 
@@ -14,9 +15,15 @@ class Command(BaseCommand):
             dest="note_ids",
             help="Optional note id filter. Repeat for multiple ids.",
         )
+        add_rebuild_arguments(parser)
 
     def handle(self, *args, **options):
         note_ids = options.get("note_ids") or None
+        if not note_ids:
+            # Full rebuilds run in checkpointed batches that can be resumed.
+            run_rebuild_command(self, "note", "Note search index", options)
+            return
+
         result = rebuild_note_search_index(note_ids=note_ids)
         self.stdout.write(
             self.style.SUCCESS(
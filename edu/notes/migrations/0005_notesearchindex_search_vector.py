@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+from django.db.models import F, Func
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0004_note_date_time_now"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notesearchindex",
+            name="note_idx_doc_tsv_gin",
+        ),
+        migrations.AddField(
+            model_name="notesearchindex",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    Func(
+                        F("document"),
+                        function="immutable_unaccent",
+                        output_field=models.TextField(),
+                    ),
+                    config="simple",
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notesearchindex",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"],
+                name="note_idx_doc_tsv_gin",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0005_notesearchindex_search_vector"),
+    ]
+
+    operations = [
+        # Typo tolerance goes through the SearchLexeme lexicon now; no query
+        # reads trigrams of whole documents.
+        migrations.RemoveIndex(
+            model_name="notesearchindex",
+            name="note_idx_doc_trgm_gin",
+        ),
+    ]
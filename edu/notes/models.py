@@ -2,7 +2,7 @@ from django.conf import settings  # Django setting access for AUTH_USER_MODEL.
 from django.db import models  # Django ORM base classes and field types.
 from django.db.models import F, Func
 from django.contrib.postgres.indexes import GinIndex
-from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils.text import slugify  # Utility to normalize tag names into slugs.
 
 
@@ -93,26 +93,27 @@ class NoteSearchIndex(models.Model):
         on_delete=models.CASCADE,
     )
     document = models.TextField(blank=True, default="")
+    # Tokenized once at write time so ranking never re-parses the document.
+    search_vector = models.GeneratedField(
+        expression=SearchVector(
+            Func(
+                F("document"),
+                function="immutable_unaccent",
+                output_field=models.TextField(),
+            ),
+            config="simple",
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             GinIndex(
-                SearchVector(
-                    Func(
-                        F("document"),
-                        function="immutable_unaccent",
-                        output_field=models.TextField(),
-                    ),
-                    config="simple",
-                ),
+                fields=["search_vector"],
                 name="note_idx_doc_tsv_gin",
             ),
-            GinIndex(
-                fields=["document"],
-                opclasses=["gin_trgm_ops"],
-                name="note_idx_doc_trgm_gin",
-            ),
         ]
 
     def __str__(self):
@@ -2,16 +2,11 @@ from __future__ import annotations
 
 import html
 
-from django.contrib.postgres.search import (
-    SearchQuery,
-    SearchRank,
-    SearchVector,
-    TrigramSimilarity,
-)
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import transaction
 from django.db.models import F, FloatField, Q, TextField, Value
 from django.db.models.expressions import ExpressionWrapper
 from django.db.models.functions import Coalesce, Substr
-from django.db.models import Func
 from django.utils.html import strip_tags
 
 try:
@@ -19,10 +14,14 @@ try:
 except Exception:  # pragma: no cover - optional depending on Django version
     SearchHeadline = None
 
+from courses.models import SearchLexeme
+from courses.search_lexicon import build_fuzzy_search_query, record_search_lexemes
+from courses.search_rebuild import iter_id_batches
+
 from .models import Note, NoteSearchIndex
 
 NOTE_RANK_THRESHOLD = 0.02
-NOTE_SIMILARITY_THRESHOLD = 0.08
+NOTE_CANDIDATE_LIMIT = 400
 
 
 def _normalize_whitespace(value: str) -> str:
@@ -55,10 +54,11 @@ def refresh_note_search_index(note_id: int) -> bool:
     except Note.DoesNotExist:
         return False
     document = build_note_search_document(note)
-    NoteSearchIndex.objects.update_or_create(
+    row, _ = NoteSearchIndex.objects.update_or_create(
         note_id=note_id,
         defaults={"document": document},
     )
+    record_search_lexemes(SearchLexeme.SCOPE_NOTE, [row.id])
     return True
 
 
@@ -66,58 +66,109 @@ def delete_note_search_index(note_id: int) -> None:
     NoteSearchIndex.objects.filter(note_id=note_id).delete()
 
 
+def rebuild_note_search_batch(note_ids: list[int]) -> dict[str, int]:
+    notes = list(Note.objects.prefetch_related("tags").filter(id__in=note_ids))
+    if not notes:
+        return {"processed": 0, "created": 0, "updated": 0}
+
+    ids = [note.id for note in notes]
+    existing = set(
+        NoteSearchIndex.objects.filter(note_id__in=ids).values_list("note_id", flat=True)
+    )
+    NoteSearchIndex.objects.bulk_create(
+        [NoteSearchIndex(note=note, document=build_note_search_document(note)) for note in notes],
+        update_conflicts=True,
+        unique_fields=["note"],
+        update_fields=["document", "updated"],
+    )
+    record_search_lexemes(
+        SearchLexeme.SCOPE_NOTE,
+        list(NoteSearchIndex.objects.filter(note_id__in=ids).values_list("id", flat=True)),
+    )
+    return {
+        "processed": len(ids),
+        "created": len(ids) - len(existing),
+        "updated": len(existing),
+    }
+
+
 def rebuild_note_search_index(note_ids: list[int] | None = None) -> dict[str, int]:
-    queryset = Note.objects.prefetch_related("tags")
+    queryset = Note.objects.all()
     if note_ids:
         queryset = queryset.filter(id__in=note_ids)
 
-    created = 0
-    updated = 0
-    processed = 0
-
-    for note in queryset:
-        processed += 1
-        _, row_created = NoteSearchIndex.objects.update_or_create(
-            note_id=note.id,
-            defaults={"document": build_note_search_document(note)},
-        )
-        if row_created:
-            created += 1
-        else:
-            updated += 1
+    totals = {"processed": 0, "created": 0, "updated": 0}
+    for batch in iter_id_batches(queryset):
+        with transaction.atomic():
+            result = rebuild_note_search_batch(batch)
+        for key in totals:
+            totals[key] += result[key]
+    return totals
 
-    return {"processed": processed, "created": created, "updated": updated}
 
-
-def search_notes(queryset, query: str):
+def _note_search_query(query: str):
     normalized_query = _normalize_whitespace(query)
     if not normalized_query:
-        return queryset.none()
-
+        return "", None, None
     query_text = _unaccent_text(normalized_query)
-    document = Coalesce(F("document"), Value(""), output_field=TextField())
-    unaccented_document = Func(
-        document,
-        function="immutable_unaccent",
-        output_field=TextField(),
-    )
-
     search_query = SearchQuery(query_text, config="simple", search_type="websearch")
-    search_vector = SearchVector(unaccented_document, config="simple")
-    search_rank = SearchRank(search_vector, search_query)
+    fuzzy_query = build_fuzzy_search_query(SearchLexeme.SCOPE_NOTE, query_text)
+    return query_text, search_query, fuzzy_query
+
 
-    trigram_document = TrigramSimilarity(unaccented_document, Value(query_text))
-    trigram_score = trigram_document
+def search_notes(queryset, query: str, candidate_limit: int = NOTE_CANDIDATE_LIMIT):
+    """
+    Rank note index rows matching `query`; pair with `add_note_snippets`
+    to highlight the page that is actually rendered.
+    """
+    _, search_query, fuzzy_query = _note_search_query(query)
+    if search_query is None:
+        return queryset.none()
+
+    search_rank = SearchRank(F("search_vector"), search_query)
+    fuzzy_rank = SearchRank(F("search_vector"), fuzzy_query)
 
     combined_score = ExpressionWrapper(
-        (search_rank * Value(2.2)) + (trigram_document * Value(1.0)),
+        (search_rank * Value(2.2)) + (fuzzy_rank * Value(1.0)),
         output_field=FloatField(),
     )
 
+    # Phase one: GIN-matched ids, newest first, bounded before any scoring;
+    # ranks are only computed for these candidates.
+    candidates = (
+        queryset.filter(search_vector=fuzzy_query)
+        .order_by("-updated", "-id")
+        .values("id")[:candidate_limit]
+    )
+
+    return (
+        queryset.filter(id__in=candidates)
+        .annotate(
+            search_rank=search_rank,
+            fuzzy_rank=fuzzy_rank,
+            combined_score=combined_score,
+        )
+        .filter(
+            Q(search_rank__gte=NOTE_RANK_THRESHOLD)
+            | Q(fuzzy_rank__gte=NOTE_RANK_THRESHOLD)
+        )
+        .order_by("-combined_score", "-updated")
+    )
+
+
+def add_note_snippets(results, query: str):
+    results = list(results)
+    if not results:
+        return results
+    _, search_query, fuzzy_query = _note_search_query(query)
+    if search_query is None:
+        return results
+
+    document = Coalesce(F("document"), Value(""), output_field=TextField())
     if SearchHeadline:
         headline = SearchHeadline(
             document,
-            search_query,
+            fuzzy_query,
             config="simple",
             start_sel="<mark class=\"search-highlight\">",
             stop_sel="</mark>",
@@ -129,17 +180,11 @@ def search_notes(queryset, query: str):
     else:
         headline = Substr(document, 1, 180)
 
-    return (
-        queryset.annotate(
-            search_rank=search_rank,
-            trigram_document=trigram_document,
-            trigram_score=trigram_score,
-            combined_score=combined_score,
-            snippet=headline,
-        )
-        .filter(
-            Q(search_rank__gte=NOTE_RANK_THRESHOLD)
-            | Q(trigram_score__gte=NOTE_SIMILARITY_THRESHOLD)
-        )
-        .order_by("-combined_score", "-updated")
+    snippets = dict(
+        NoteSearchIndex.objects.filter(id__in=[row.id for row in results])
+        .annotate(snippet=headline)
+        .values_list("id", "snippet")
     )
+    for row in results:
+        row.snippet = snippets.get(row.id, "")
+    return results
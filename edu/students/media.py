@@ -0,0 +1,249 @@
+"""
+Serving authorized course media.
+
+The views in students.views decide who may read a file; this module decides
+how its bytes leave the server.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import secrets
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+# Internal nginx location aliased to MEDIA_ROOT (see config/nginx). When set,
+# views only authorize and nginx sends the file, ranges included; empty keeps
+# Python streaming, which copies ranged responses through the app.
+MEDIA_ACCEL_REDIRECT_PREFIX = str(getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "") or "")
+MEDIA_RANGE_CHUNK_SIZE = 512 * 1024
+# A Range header asking for more parts than this is ignored (whole file sent).
+MEDIA_MAX_RANGES = 16
+
+
+def guess_content_type(name: str) -> str:
+    content_type, _ = mimetypes.guess_type(name)
+    return content_type or "application/octet-stream"
+
+
+def accel_redirect_response(
+    field_file,
+    *,
+    content_type: str | None = None,
+    as_attachment: bool = False,
+    filename: str | None = None,
+) -> HttpResponse | None:
+    """
+    Hand a stored file to nginx with `X-Accel-Redirect`, or return None when
+    offloading is off or the file is not on local disk.
+
+    nginx keeps Content-Type, Content-Disposition and caching headers from
+    this response and handles Range requests and sendfile itself.
+    """
+    if not MEDIA_ACCEL_REDIRECT_PREFIX or not isinstance(field_file.storage, FileSystemStorage):
+        return None
+
+    filename = filename or os.path.basename(field_file.name)
+    response = HttpResponse(content_type=content_type or guess_content_type(filename))
+    response["X-Accel-Redirect"] = MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(field_file.name)
+    response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def parse_range_header(header: str | None, size: int) -> list[tuple[int, int]] | None:
+    """
+    Parse `bytes=` ranges into sorted, merged, inclusive `(start, end)` pairs.
+
+    Returns None when the header is absent, malformed or asks for too many
+    parts (serve the whole file), and [] when no range is satisfiable (416).
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    specs = header[len("bytes="):].split(",")
+    if len(specs) > MEDIA_MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        start_str, sep, end_str = spec.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start_str:
+                # Suffix range: "-500" is the last 500 bytes.
+                suffix = int(end_str)
+                if suffix <= 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str else size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        if end < start:
+            return None
+        ranges.append((start, min(end, size - 1)))
+
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_allows(request, etag: str | None, last_modified: int | None) -> bool:
+    # A stale If-Range means "send the whole, current file" instead of parts.
+    validator = request.headers.get("If-Range")
+    if not validator:
+        return True
+    if validator.startswith(("\"", "W/")):
+        return etag is not None and validator == etag and not validator.startswith("W/")
+    return last_modified is not None and parse_http_date_safe(validator) == last_modified
+
+
+def _read_window(handle, start: int, length: int):
+    handle.seek(start)
+    remaining = length
+    while remaining > 0:
+        chunk = handle.read(min(MEDIA_RANGE_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _stream_range(handle, start: int, end: int):
+    try:
+        yield from _read_window(handle, start, end - start + 1)
+    finally:
+        handle.close()
+
+
+def _multipart_parts(ranges, size: int, content_type: str, boundary: str):
+    for start, end in ranges:
+        head = (
+            f"--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode("latin-1")
+        yield head, start, end
+    yield f"--{boundary}--\r\n".encode("latin-1"), None, None
+
+
+def _stream_multipart(handle, ranges, size: int, content_type: str, boundary: str):
+    try:
+        for head, start, end in _multipart_parts(ranges, size, content_type, boundary):
+            yield head
+            if start is not None:
+                yield from _read_window(handle, start, end - start + 1)
+                yield b"\r\n"
+    finally:
+        handle.close()
+
+
+def _file_validators(field_file, size: int) -> tuple[str | None, int | None]:
+    try:
+        stat = os.stat(field_file.path)
+    except (NotImplementedError, ValueError, OSError):
+        try:
+            return None, int(field_file.storage.get_modified_time(field_file.name).timestamp())
+        except (NotImplementedError, OSError):
+            return None, None
+    # Same shape nginx uses, so validators survive switching offload on or off.
+    return f'"{int(stat.st_mtime):x}-{size:x}"', int(stat.st_mtime)
+
+
+def serve_media_file(
+    request,
+    field_file,
+    *,
+    content_type: str | None = None,
+    as_attachment: bool = False,
+    filename: str | None = None,
+):
+    """
+    Respond with a stored file, honouring conditional and Range requests.
+
+    Offloaded to nginx when MEDIA_ACCEL_REDIRECT_PREFIX is set (the default
+    in production): nginx answers Range requests, including video seeks,
+    with sendfile, so no byte passes through Python.
+
+    Without offloading (runserver, remote storage) whole-file responses go
+    through `FileResponse`, which WSGI servers send with `wsgi.file_wrapper`.
+    Byte ranges, single or `multipart/byteranges`, are still copied through
+    Python in bounded reads: file_wrapper implementations such as uWSGI's
+    send from the start of the descriptor to its end, so a file slice cannot
+    be handed to them safely. `If-Range` falls back to the whole file when
+    the file changed.
+    """
+    filename = filename or os.path.basename(field_file.name)
+    content_type = content_type or guess_content_type(filename)
+    offloaded = accel_redirect_response(
+        field_file,
+        content_type=content_type,
+        as_attachment=as_attachment,
+        filename=filename,
+    )
+    if offloaded is not None:
+        return offloaded
+
+    try:
+        field_file.open("rb")
+    except FileNotFoundError as exc:
+        raise Http404("File not found.") from exc
+    handle = field_file.file
+    size = field_file.size
+    etag, last_modified = _file_validators(field_file, size)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        handle.close()
+    else:
+        ranges = parse_range_header(request.headers.get("Range"), size)
+        if ranges is not None and not _if_range_allows(request, etag, last_modified):
+            ranges = None
+
+        if ranges is None:
+            response = FileResponse(handle, content_type=content_type)
+            response["Content-Length"] = str(size)
+        elif not ranges:
+            handle.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            response = StreamingHttpResponse(
+                _stream_range(handle, start, end), status=206, content_type=content_type
+            )
+            response["Content-Length"] = str(end - start + 1)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            boundary = secrets.token_hex(16)
+            length = sum(
+                len(head) + (end - start + 3 if start is not None else 0)
+                for head, start, end in _multipart_parts(ranges, size, content_type, boundary)
+            )
+            response = StreamingHttpResponse(
+                _stream_multipart(handle, ranges, size, content_type, boundary),
+                status=206,
+                content_type=f"multipart/byteranges; boundary={boundary}",
+            )
+            response["Content-Length"] = str(length)
+
+    response["Accept-Ranges"] = "bytes"
+    if etag:
+        response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    if response.status_code in (200, 206):
+        response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    return response
@@ -1,4 +1,5 @@
 import json
+from unittest import mock
 
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
@@ -59,7 +60,6 @@ class ContentProgressTrackingTests(TestCase):
                 content_type="application/pdf",
             ),
             pdf_index_status="indexed",
-            pdf_text_index="searchable pdf body",
             pdf_page_count=3,
         )
 
@@ -171,3 +171,47 @@ class ContentProgressTrackingTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'data-start-page="2"')
         self.assertContains(response, 'data-max-page-seen="2"')
+
+    def test_media_views_offload_to_nginx_when_accel_redirect_is_enabled(self):
+        pdf_item = self.pdf_content.item
+        with mock.patch("students.media.MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/"):
+            download = self.client.get(reverse("student_file_download", args=[pdf_item.id]))
+            preview = self.client.get(reverse("student_file_view", args=[pdf_item.id]))
+
+        self.assertEqual(download["X-Accel-Redirect"], f"/protected-media/{pdf_item.file.name}")
+        self.assertTrue(download["Content-Disposition"].startswith("attachment"))
+        self.assertEqual(download.content, b"")
+        self.assertEqual(preview["Content-Type"], "application/pdf")
+        self.assertTrue(preview["Content-Disposition"].startswith("inline"))
+
+        streamed = self.client.get(reverse("student_file_download", args=[pdf_item.id]))
+        self.assertFalse(streamed.has_header("X-Accel-Redirect"))
+        self.assertEqual(b"".join(streamed.streaming_content), b"%PDF-1.4 fake content")
+
+    def test_file_preview_answers_single_multi_and_stale_range_requests(self):
+        url = reverse("student_file_view", args=[self.pdf_content.item.id])
+        body = b"%PDF-1.4 fake content"
+
+        single = self.client.get(url, HTTP_RANGE="bytes=0-7")
+        self.assertEqual(single.status_code, 206)
+        self.assertEqual(single["Content-Range"], f"bytes 0-7/{len(body)}")
+        self.assertEqual(b"".join(single.streaming_content), body[:8])
+
+        multi = self.client.get(url, HTTP_RANGE="bytes=0-3,-7")
+        self.assertEqual(multi.status_code, 206)
+        self.assertTrue(multi["Content-Type"].startswith("multipart/byteranges; boundary="))
+        payload = b"".join(multi.streaming_content)
+        self.assertEqual(int(multi["Content-Length"]), len(payload))
+        self.assertIn(b"Content-Range: bytes 0-3/21\r\n\r\n%PDF\r\n", payload)
+        self.assertIn(b"Content-Range: bytes 14-20/21\r\n\r\ncontent\r\n", payload)
+
+        stale = self.client.get(url, HTTP_RANGE="bytes=0-7", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(b"".join(stale.streaming_content), body)
+
+        fresh = self.client.get(url, HTTP_RANGE="bytes=0-7", HTTP_IF_RANGE=single["ETag"])
+        self.assertEqual(fresh.status_code, 206)
+
+        unsatisfiable = self.client.get(url, HTTP_RANGE="bytes=100-")
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable["Content-Range"], f"bytes */{len(body)}")
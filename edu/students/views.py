@@ -8,8 +8,6 @@ Student-facing views:
 
 # URL builder used for redirects after successful actions.
 import json
-import os
-import mimetypes
 import subprocess
 import re
 from pathlib import Path
@@ -18,7 +16,7 @@ from types import SimpleNamespace
 from django.conf import settings
 from django.db import connection
 from django.db.utils import OperationalError, ProgrammingError
-from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
 from django.contrib.contenttypes.models import ContentType
@@ -41,6 +39,8 @@ from django.views.generic import TemplateView, DetailView, View
 
 # Local enrollment form and Course model.
 from .forms import CourseEnrollForm
+from .media import serve_media_file
+from courses.content_items import attach_content_items
 from courses.models import Content, Course, File, Image, Module, ContentSearchEntry, Video
 from courses.search import search_content_entries
 from .models import ContentProgress, CourseProgress, ModuleProgress
@@ -274,7 +274,9 @@ class StudentCourseDetailView(LoginRequiredMixin, DetailView):
                 pass
 
         # Build a concrete list of module contents, and attach content progress state.
-        module_contents = list(module.contents.select_related("content_type")) if module else []
+        module_contents = (
+            attach_content_items(module.contents.select_related("content_type")) if module else []
+        )
         content_progress_rows = {
             row.content_id: row
             for row in ContentProgress.objects.filter(
@@ -493,18 +495,7 @@ class DownloadModuleFileView(LoginRequiredMixin, View):
         if not file_obj or not file_obj.file:
             raise Http404("File not found.")
 
-        filename = os.path.basename(file_obj.file.name)
-
-        try:
-            return FileResponse(
-                file_obj.file.open("rb"),
-                as_attachment=True,
-                filename=filename,
-            )
-        except FileNotFoundError as exc:
-            raise Http404("File not found.") from exc
-
-
+        return serve_media_file(request, file_obj.file, as_attachment=True)
 
 
 class ModuleImageView(LoginRequiredMixin, View):
@@ -525,64 +516,7 @@ class ModuleImageView(LoginRequiredMixin, View):
         if not image_obj or not image_obj.file:
             raise Http404("Image not found.")
 
-        filename = os.path.basename(image_obj.file.name)
-
-        try:
-            return FileResponse(
-                image_obj.file.open("rb"),
-                filename=filename,
-            )
-        except FileNotFoundError as exc:
-            raise Http404("Image not found.") from exc
-
-
-def _parse_byte_range(range_header: str | None, file_size: int):
-    if not range_header:
-        return None
-    if not range_header.startswith("bytes="):
-        return None
-
-    range_spec = range_header.replace("bytes=", "", 1).split(",")[0].strip()
-    if "-" not in range_spec:
-        return None
-
-    start_str, end_str = range_spec.split("-", 1)
-    try:
-        if start_str == "":
-            # Suffix range: "-500" means last 500 bytes
-            suffix_len = int(end_str)
-            if suffix_len <= 0:
-                return None
-            start = max(file_size - suffix_len, 0)
-            end = file_size - 1
-        else:
-            start = int(start_str)
-            end = int(end_str) if end_str else file_size - 1
-            if start < 0:
-                return None
-            end = min(end, file_size - 1)
-        if start > end or start >= file_size:
-            return None
-        return start, end
-    except (TypeError, ValueError):
-        return None
-
-
-def _stream_file_range(file_obj, start: int, length: int, chunk_size: int = 1024 * 512):
-    file_obj.seek(start)
-    remaining = length
-    try:
-        while remaining > 0:
-            chunk = file_obj.read(min(chunk_size, remaining))
-            if not chunk:
-                break
-            remaining -= len(chunk)
-            yield chunk
-    finally:
-        try:
-            file_obj.close()
-        except Exception:
-            pass
+        return serve_media_file(request, image_obj.file)
 
 
 class ModuleVideoStreamView(LoginRequiredMixin, View):
@@ -602,35 +536,9 @@ class ModuleVideoStreamView(LoginRequiredMixin, View):
         if not video_obj or not video_obj.file:
             raise Http404("Video not found.")
 
-        try:
-            video_obj.file.open("rb")
-        except FileNotFoundError as exc:
-            raise Http404("Video not found.") from exc
-
-        file_obj = video_obj.file.file
-        file_size = getattr(video_obj.file, "size", None) or 0
-        content_type, _ = mimetypes.guess_type(video_obj.file.name)
-        if not content_type:
-            content_type = "application/octet-stream"
-
-        range_header = request.headers.get("Range") or request.META.get("HTTP_RANGE")
-        byte_range = _parse_byte_range(range_header, file_size)
-
-        if byte_range:
-            start, end = byte_range
-            length = end - start + 1
-            response = StreamingHttpResponse(
-                _stream_file_range(file_obj, start, length),
-                status=206,
-                content_type=content_type,
-            )
-            response["Content-Length"] = str(length)
-            response["Content-Range"] = f"bytes {start}-{end}/{file_size}"
-        else:
-            response = FileResponse(file_obj, content_type=content_type)
-            response["Content-Length"] = str(file_size)
-
-        response["Accept-Ranges"] = "bytes"
+        # Range requests (seeking) are answered by serve_media_file, or by
+        # nginx when offloading is on.
+        response = serve_media_file(request, video_obj.file)
         patch_response_headers(response, cache_timeout=VIDEO_CACHE_SECONDS)
         return response
 
@@ -654,23 +562,8 @@ class ModuleFilePreviewView(LoginRequiredMixin, View):
         if not file_obj or not file_obj.file:
             raise Http404("File not found.")
 
-        filename = os.path.basename(file_obj.file.name)
-        content_type, _ = mimetypes.guess_type(filename)
-        if not content_type:
-            content_type = "application/octet-stream"
-
-        try:
-            response = FileResponse(
-                file_obj.file.open("rb"),
-                as_attachment=False,
-                filename=filename,
-                content_type=content_type,
-            )
-        except FileNotFoundError as exc:
-            raise Http404("File not found.") from exc
-
-        # Force inline rendering in browser viewers (PDF/image support).
-        response["Content-Disposition"] = f'inline; filename="{filename}"'
+        # Inline so browser viewers render it; pdf.js fetches pages by Range.
+        response = serve_media_file(request, file_obj.file)
         patch_cache_control(response, private=True, max_age=PDF_CACHE_SECONDS)
         return response
 
@@ -701,7 +594,7 @@ class ModuleFileSearchView(LoginRequiredMixin, View):
             return JsonResponse(cached)
 
         qs = ContentSearchEntry.objects.filter(content=content, page_number__isnull=False)
-        results = list(search_content_entries(qs, query)[:500])
+        results = list(search_content_entries(qs, query, candidate_limit=500)[:500])
 
         page_map = {}
         for row in results:
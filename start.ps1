@@ -21,6 +21,10 @@ $djangoOut = Join-Path $root "error/django-out.log"
 $djangoErr = Join-Path $root "error/django-err.log"
 $workerOut = Join-Path $root "error/insights-worker-out.log"
 $workerErr = Join-Path $root "error/insights-worker-err.log"
+$pdfWorkerOut = Join-Path $root "error/pdf-worker-out.log"
+$pdfWorkerErr = Join-Path $root "error/pdf-worker-err.log"
+$searchWorkerOut = Join-Path $root "error/search-worker-out.log"
+$searchWorkerErr = Join-Path $root "error/search-worker-err.log"
 $lockFile = Join-Path $root "error/.start.lock"
 
 function Log([string]$m) {
@@ -182,6 +186,52 @@ try {
         Log "Learning Insights worker already running"
     }
 
+    # Start PDF indexing worker (background PDF text extraction) if needed.
+    $pdfWorkerProcIds = Get-CimInstance Win32_Process -Filter "Name='python.exe'" |
+        Where-Object {
+            $_.CommandLine -and
+            $_.CommandLine -match "manage\.py\s+process_pdf_index_jobs" -and
+            $_.CommandLine -like "*$root*"
+        } |
+        Select-Object -ExpandProperty ProcessId -Unique
+
+    if (-not $pdfWorkerProcIds) {
+        $pdfWorkerOut = Initialize-Utf8Log -path $pdfWorkerOut
+        $pdfWorkerErr = Initialize-Utf8Log -path $pdfWorkerErr
+
+        Log "Starting PDF indexing worker"
+        $pdfWorkerCmdLine = 'set "PYTHONUTF8=1" && set "PYTHONIOENCODING=utf-8" && "' + $python + '" -X utf8 manage.py process_pdf_index_jobs --settings=edu.settings.local 1>>"' + $pdfWorkerOut + '" 2>>"' + $pdfWorkerErr + '"'
+        Start-Process -FilePath "cmd.exe" `
+            -WorkingDirectory $app `
+            -ArgumentList @("/d","/s","/c",$pdfWorkerCmdLine) `
+            -WindowStyle Hidden
+    } else {
+        Log "PDF indexing worker already running"
+    }
+
+    # Start search outbox worker (background search index updates) if needed.
+    $searchWorkerProcIds = Get-CimInstance Win32_Process -Filter "Name='python.exe'" |
+        Where-Object {
+            $_.CommandLine -and
+            $_.CommandLine -match "manage\.py\s+process_search_index_outbox" -and
+            $_.CommandLine -like "*$root*"
+        } |
+        Select-Object -ExpandProperty ProcessId -Unique
+
+    if (-not $searchWorkerProcIds) {
+        $searchWorkerOut = Initialize-Utf8Log -path $searchWorkerOut
+        $searchWorkerErr = Initialize-Utf8Log -path $searchWorkerErr
+
+        Log "Starting search outbox worker"
+        $searchWorkerCmdLine = 'set "PYTHONUTF8=1" && set "PYTHONIOENCODING=utf-8" && "' + $python + '" -X utf8 manage.py process_search_index_outbox --settings=edu.settings.local 1>>"' + $searchWorkerOut + '" 2>>"' + $searchWorkerErr + '"'
+        Start-Process -FilePath "cmd.exe" `
+            -WorkingDirectory $app `
+            -ArgumentList @("/d","/s","/c",$searchWorkerCmdLine) `
+            -WindowStyle Hidden
+    } else {
+        Log "Search outbox worker already running"
+    }
+
     Start-Process $url
     Log "Browser opened: $url"
 }
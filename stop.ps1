@@ -17,6 +17,32 @@ foreach ($procId in $workerProcIds) {
     Stop-Process -Id $procId -Force
 }
 
+# Stop PDF indexing worker started from this project
+$pdfWorkerProcIds = Get-CimInstance Win32_Process -Filter "Name='python.exe'" |
+    Where-Object {
+        $_.CommandLine -and
+        $_.CommandLine -match "manage\.py\s+process_pdf_index_jobs" -and
+        $_.CommandLine -like "*$root*"
+    } |
+    Select-Object -ExpandProperty ProcessId -Unique
+
+foreach ($procId in $pdfWorkerProcIds) {
+    Stop-Process -Id $procId -Force
+}
+
+# Stop search outbox worker started from this project
+$searchWorkerProcIds = Get-CimInstance Win32_Process -Filter "Name='python.exe'" |
+    Where-Object {
+        $_.CommandLine -and
+        $_.CommandLine -match "manage\.py\s+process_search_index_outbox" -and
+        $_.CommandLine -like "*$root*"
+    } |
+    Select-Object -ExpandProperty ProcessId -Unique
+
+foreach ($procId in $searchWorkerProcIds) {
+    Stop-Process -Id $procId -Force
+}
+
 # Stop Django runserver started from this project
 $djangoProcIds = Get-CimInstance Win32_Process -Filter "Name='python.exe'" |
     Where-Object {